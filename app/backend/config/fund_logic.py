@@ -0,0 +1,76 @@
+"""
+Fund scoring configuration shared with the frontend.
+
+Mirrors ``FUND_LOGIC_CONFIG`` in ``app/frontend/config/fundLogicConfig.ts`` so
+server-side recommendations score funds exactly like the browser did. Keep the
+two files in sync when tuning weights or thresholds.
+"""
+
+import math
+from typing import Any, Dict
+
+FUND_LOGIC_CONFIG: Dict[str, Any] = {
+    "costThresholds": {
+        "veryCompetitive": 0.6,
+        "average": 1.0,
+    },
+    "performanceThresholds": {
+        "aboveAverage": 4.0,
+        "inLine": 2.0,
+    },
+    "categoryRiskScores": {
+        "GAR": 10,
+        "OBB PURO": 25,
+        "OBB": 30,
+        "OBB MISTO": 40,
+        "BIL": 55,
+        "AZN": 85,
+    },
+    "coherence": {
+        "defaultIdealRisk": 50,
+        "shortHorizonRisk": 20,
+        "horizonRiskRules": [
+            {"minYearsExclusive": 20, "idealRisk": 75},
+            {"minYearsExclusive": 15, "idealRisk": 65},
+            {"minYearsExclusive": 10, "idealRisk": 50},
+            {"minYearsExclusive": 5, "idealRisk": 35},
+        ],
+        "ageFallbackRisk": {
+            "under35": 70,
+            "35-50": 50,
+            "over50": 30,
+        },
+    },
+    "shortlist": {
+        "weights": {
+            "cost": 0.5,
+            "returns": 0.4,
+            "riskBoostMax": 0.14,
+            "hasFpnBoost": 0.18,
+            "contractualCategoryBoost": 0.12,
+            "ageConservatism": 0.06,
+        },
+        "horizonCategoryRules": [
+            {"maxYearsInclusive": 10, "categories": ["GAR", "OBB", "MISTO PRUDENTE"]},
+            {"maxYearsInclusive": 20, "categories": ["BIL", "OBB MISTO", "MISTO"]},
+            {"maxYearsInclusive": math.inf, "categories": ["AZN", "AZ", "CRESCITA", "BIL"]},
+        ],
+        "missingValues": {
+            "cost": 999,
+            "returns10y": -999,
+        },
+        "riskPreferenceMap": {
+            "low": 0,
+            "medium": 0.5,
+            "high": 1,
+        },
+        "categoryPatterns": {
+            "equityLike": ["AZN", "AZ", "CRESCITA"],
+            "mixedLike": ["MISTO", "BIL", "OBB MISTO", "OBB"],
+        },
+        "ageBias": {
+            "over50Penalty": 0.06,
+            "under35BoostFactor": 0.5,
+        },
+    },
+}
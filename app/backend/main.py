@@ -1,3 +1,5 @@
+import asyncio
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import os
@@ -14,6 +16,7 @@ from backend.routes import (
     feedback, 
     admin,
     admin_feedback,
+    admin_funds,
     funds,
     simulator,
     content
@@ -22,6 +25,9 @@ from backend.middleware.request_id import RequestIDMiddleware
 from backend.middleware.logging import LoggingMiddleware
 from backend.middleware.security_headers import SecurityHeadersMiddleware
 from backend.providers.firebase_auth import initialize_firebase_app
+from backend.services.fund_data_service import get_fund_store
+from backend.services.simulation_job_service import get_simulation_jobs
+from backend.services.simulation_pool_service import get_simulation_pool
 
 
 app = FastAPI(title="Webapp Factory API", version="1.0.0")
@@ -48,6 +54,38 @@ def log_startup_info():
     except Exception:
         logger.exception("Failed to log startup auth info")
 
+
+@app.on_event("startup")
+async def load_fund_dataset():
+    # Parse and join the fund CSVs once so requests never pay for it
+    store = get_fund_store()
+    try:
+        await asyncio.to_thread(store.load)
+    except Exception:
+        logger.exception("Failed to load fund dataset")
+    # Pick up new COVIP exports dropped into the data folder without a restart
+    if settings.funds_reload_interval_seconds > 0:
+        app.state.fund_reload_task = asyncio.create_task(store.watch(settings.funds_reload_interval_seconds))
+
+
+@app.on_event("shutdown")
+async def stop_fund_dataset_watch():
+    task = getattr(app.state, "fund_reload_task", None)
+    if task is not None:
+        task.cancel()
+
+
+@app.on_event("startup")
+def start_simulation_pool():
+    # Monte Carlo and batch simulations run here, off the event loop
+    get_simulation_pool().start()
+
+
+@app.on_event("shutdown")
+def stop_simulation_pool():
+    get_simulation_jobs().shutdown()
+    get_simulation_pool().shutdown()
+
 # Add security headers middleware
 app.add_middleware(SecurityHeadersMiddleware)
 app.add_middleware(RequestIDMiddleware)
@@ -76,6 +114,7 @@ app.include_router(simulator.router, prefix="/api", tags=["simulator"])  # Pensi
 app.include_router(content.router, prefix="/api", tags=["content"])  # Guides & FAQ
 app.include_router(admin.router, prefix="/api", tags=["admin"])  # Admin management
 app.include_router(admin_feedback.router, prefix="/api", tags=["admin", "feedback"])  # Admin feedback
+app.include_router(admin_funds.router, prefix="/api", tags=["admin", "funds"])  # Fund dataset management
 
 # Legacy routes
 app.include_router(protected.router)
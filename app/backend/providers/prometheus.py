@@ -0,0 +1,47 @@
+"""
+Prometheus metric helpers.
+
+Collectors registered here are exported by the ``/metrics`` mount in
+``main.py``. The helpers are idempotent so that modules reachable through more
+than one import path (``backend.services.x`` and ``services.x``) share a
+single collector instead of failing on duplicate registration.
+"""
+
+import importlib
+import threading
+from typing import Dict, Sequence
+
+from prometheus_client import Counter, Gauge
+
+_CANONICAL_MODULE = "backend.providers.prometheus"
+
+if __name__ == _CANONICAL_MODULE:
+    _lock = threading.Lock()
+    _collectors: Dict[str, object] = {}
+else:
+    # This module can itself be loaded again under another package name
+    # (``providers.prometheus``): share the canonical copy's collectors
+    _canonical = importlib.import_module(_CANONICAL_MODULE)
+    _lock = _canonical._lock
+    _collectors = _canonical._collectors
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    """Return the process-wide counter with this name, creating it once."""
+    return _get_or_create(Counter, name, documentation, labelnames)
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    """Return the process-wide gauge with this name, creating it once."""
+    return _get_or_create(Gauge, name, documentation, labelnames)
+
+
+def _get_or_create(kind, name: str, documentation: str, labelnames: Sequence[str]):
+    with _lock:
+        existing = _collectors.get(name)
+        if existing is None:
+            # Raises ValueError if a collector outside these helpers took the name
+            existing = _collectors[name] = kind(name, documentation, labelnames=tuple(labelnames))
+        elif not isinstance(existing, kind):
+            raise ValueError(f"Metric {name} is already registered as a {type(existing).__name__}")
+        return existing
@@ -0,0 +1,117 @@
+"""
+Admin Fund Dataset Routes
+
+Endpoints for administrators to inspect and replace the COVIP fund dataset
+served by /api/funds without a redeploy.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import List
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile, status
+
+from backend.auth.deps import require_roles
+from backend.auth.models import AuthClaims
+from backend.services.fund_data_service import (
+    SOURCE_FILENAMES,
+    FundDataError,
+    FundStore,
+    get_fund_store,
+)
+
+logger = logging.getLogger("uvicorn.error")
+
+router = APIRouter(prefix="/admin/funds", tags=["admin", "funds"])
+
+
+def _dataset_info(store: FundStore) -> dict:
+    snapshot = store.snapshot
+    return {
+        "dataset_version": snapshot.version,
+        "funds": snapshot.size,
+        "loaded_at": store.loaded_at,
+        "data_dir": str(store.data_dir),
+    }
+
+
+@router.get("/dataset")
+async def get_dataset(
+    claims: AuthClaims = Depends(require_roles("admin")),
+):
+    """
+    Current fund dataset version and size.
+    Admin-only endpoint.
+    """
+    try:
+        return _dataset_info(get_fund_store())
+    except FundDataError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+        )
+
+
+@router.post("/dataset")
+async def upload_dataset(
+    files: List[UploadFile] = File(...),
+    claims: AuthClaims = Depends(require_roles("admin")),
+):
+    """
+    Replace some or all of the fund CSVs and swap the served snapshot.
+
+    Each file must be named after one of the dataset sources (e.g.
+    ``FP_costi (1).csv``); missing sources are kept from the data folder.
+    The upload is parsed off the event loop and only persisted if valid;
+    requests already in flight finish on the previous version.
+    Admin-only endpoint.
+    """
+    uploads = {}
+    for upload in files:
+        if upload.filename not in SOURCE_FILENAMES:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unexpected file {upload.filename!r}; expected one of: {', '.join(SOURCE_FILENAMES)}",
+            )
+        uploads[upload.filename] = await upload.read()
+
+    store = get_fund_store()
+    previous = store.version
+    try:
+        snapshot = await asyncio.to_thread(store.install, uploads)
+    except FundDataError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e),
+        )
+    except Exception as e:
+        logger.error(f"Error installing fund dataset: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Uploaded fund data could not be parsed",
+        )
+
+    logger.info(f"Admin {claims.sub} installed fund dataset {snapshot.version} (was {previous})")
+    return {**_dataset_info(store), "previous_version": previous}
+
+
+@router.post("/dataset/reload")
+async def reload_dataset(
+    claims: AuthClaims = Depends(require_roles("admin")),
+):
+    """
+    Re-read the data folder now instead of waiting for the next poll.
+    Admin-only endpoint.
+    """
+    store = get_fund_store()
+    try:
+        snapshot = await asyncio.to_thread(store.reload_if_changed)
+    except Exception as e:
+        logger.error(f"Error reloading fund dataset: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to reload fund dataset",
+        )
+    return {**_dataset_info(store), "changed": snapshot is not None}
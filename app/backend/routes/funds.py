@@ -7,47 +7,132 @@ Provides different levels of access based on user role:
 - Admins: Full access + additional management capabilities
 """
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Tuple
 import logging
 
 from backend.auth import auth_required, require_permission, require_active_subscription
 from backend.auth.models import AuthClaims
 from backend.auth.roles import Permission, UserRole, UserStatus, can_access_feature
-from backend.services import user_service
+from backend.services import (
+    fund_analysis_service,
+    fund_comparison_service,
+    fund_export_service,
+    fund_facet_service,
+    fund_frontier_service,
+    fund_history_service,
+    fund_search_service,
+    fund_similarity_service,
+    fund_sync_service,
+    user_service,
+)
+from backend.services.fund_data_service import (
+    FundDataError,
+    FundSnapshot,
+    InvalidCursorError,
+    StaleCursorError,
+    UnknownVersionError,
+    get_fund_store,
+    parse_fields,
+)
+from backend.services.fund_recommendation_service import RecommendationProfile, recommend
+from backend.settings import settings
 
 logger = logging.getLogger("uvicorn.error")
 
 router = APIRouter(prefix="/funds", tags=["funds"])
 
+# Legacy risk_profile values accepted by /recommendations
+_LEGACY_RISK_PROFILES = {
+    "conservative": "low",
+    "balanced": "medium",
+    "aggressive": "high",
+    "low": "low",
+    "medium": "medium",
+    "high": "high",
+}
 
-# Mock data - in production this would come from a database/service
-# This represents your pensionFundsData from frontend
-MOCK_FUNDS = [
-    {"id": f"fund_{i}", "name": f"Fondo {i}", "category": "azionario", "cost": 0.5 + i * 0.1}
-    for i in range(1, 51)
-]
+
+def current_snapshot(
+    response: Response,
+    as_of: Optional[str] = Query(default=None, max_length=64)
+) -> FundSnapshot:
+    """
+    Take the current fund snapshot once for the whole request, or 503 if the
+    dataset is unavailable.
+    
+    The handler keeps serving from this snapshot even if a reload swaps in a
+    newer one meanwhile; its version is echoed in `X-Dataset-Version`.
+    `?as_of=<dataset_version>` serves a past version (see `/funds/versions`)
+    instead, or 404 when it was never recorded.
+    """
+    store = get_fund_store()
+    try:
+        snapshot = store.snapshot_at(as_of) if as_of else store.snapshot
+    except UnknownVersionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=str(e)
+        )
+    except FundDataError as e:
+        logger.error(f"Fund dataset unavailable: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Fund data is not available"
+        )
+    response.headers["X-Dataset-Version"] = snapshot.version
+    return snapshot
+
+
+def _parse_fields(fields: Optional[str], extra: Tuple[str, ...] = ()) -> Optional[Tuple[str, ...]]:
+    """Validate a `fields=` projection, 400 on unknown names."""
+    try:
+        return parse_fields(fields, extra=extra)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
 
 
 @router.get("/list")
 async def list_funds(
     limit: int = Query(default=10, ge=1, le=100),
-    offset: int = Query(default=0, ge=0),
-    category: Optional[str] = Query(default=None),
-    claims: AuthClaims = Depends(auth_required)
+    cursor: Optional[str] = Query(default=None),
+    sort: Optional[str] = Query(default=None),
+    category: Optional[List[str]] = Query(default=None),
+    fund_type: Optional[List[str]] = Query(default=None, alias="type"),
+    societa: Optional[List[str]] = Query(default=None),
+    n_albo: Optional[List[int]] = Query(default=None, alias="nAlbo"),
+    fields: Optional[str] = Query(default=None),
+    claims: AuthClaims = Depends(auth_required),
+    snapshot: FundSnapshot = Depends(current_snapshot)
 ):
     """
     List pension funds with role-based access control.
     
     Access levels:
-    - Free users: Max 10 funds (enforced)
+    - Free users: Max 10 funds (enforced: first page only, cursors are refused with 403)
     - Subscribers: All funds
     - Admins: All funds
     
     Query Parameters:
     - limit: Number of funds to return (1-100)
-    - offset: Pagination offset
-    - category: Filter by category (optional)
+    - cursor: Opaque cursor from a previous page's `next_cursor`
+    - sort: Comma-separated sort keys, `-` prefix for descending
+      (e.g. `isc35a,-ultimi10Anni`); nulls always sort last
+    - category: Filter by categoria, e.g. AZN (optional, repeatable)
+    - type: Filter by fund type FPN/FPA/PIP (optional, repeatable)
+    - societa: Filter by management company (optional, repeatable)
+    - nAlbo: Filter by COVIP register number (optional, repeatable)
+    - fields: Comma-separated projection of the fund records, e.g.
+      `name,categoria,isc35a,ultimi10Anni` (`id` is always included)
+    
+    Values of the same filter are OR-ed, different filters are intersected.
+    
+    Cursors are bound to the dataset version: if the fund data is reloaded
+    between pages the request fails with 409 and pagination must restart.
     """
     try:
         # Get user profile to check role and status
@@ -72,28 +157,60 @@ async def list_funds(
         # Check if user can view all funds
         can_view_all = can_access_feature(user_role, user_status, Permission.VIEW_ALL_FUNDS)
         
-        # Free users are limited to 10 funds
+        # Free users are limited to 10 funds: the first page, no cursors
         if not can_view_all:
+            if cursor:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="A subscription is required to browse more than 10 funds"
+                )
             if limit > 10:
                 limit = 10
             max_available = 10
         else:
-            max_available = len(MOCK_FUNDS)
+            max_available = snapshot.size
         
-        # Apply filters (mock implementation)
-        funds = MOCK_FUNDS
-        if category:
-            funds = [f for f in funds if f.get("category") == category]
+        projection = _parse_fields(fields)
         
-        # Apply pagination
-        paginated_funds = funds[offset:offset + limit]
+        # Apply filters through the prebuilt secondary indexes, ordered by
+        # slicing the presorted permutation for the requested sort
+        try:
+            rows = snapshot.select({
+                "categoria": category,
+                "type": fund_type,
+                "societa": societa,
+                "nAlbo": n_albo,
+            }, sort=sort)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        
+        # Apply keyset pagination
+        try:
+            paginated_rows, next_cursor = snapshot.paginate(rows, limit, cursor=cursor, sort=sort)
+        except StaleCursorError:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Stale cursor: fund data has changed, restart pagination"
+            )
+        except InvalidCursorError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid cursor: {e}"
+            )
+        if not can_view_all:
+            next_cursor = None
         
         return {
-            "funds": paginated_funds,
-            "total": len(funds),
+            "funds": snapshot.to_records(paginated_rows, fields=projection),
+            "total": int(rows.size),
             "limit": limit,
-            "offset": offset,
-            "has_more": offset + limit < len(funds),
+            "next_cursor": next_cursor,
+            "has_more": next_cursor is not None,
+            "sort": snapshot.ordering(sort).key,
+            "dataset_version": snapshot.version,
             "user_access": {
                 "role": user_role.value,
                 "status": user_status.value,
@@ -102,6 +219,8 @@ async def list_funds(
             }
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error listing funds: {e}")
         raise HTTPException(
@@ -110,140 +229,383 @@ async def list_funds(
         )
 
 
-@router.get("/{fund_id}")
-async def get_fund_details(
-    fund_id: str,
-    claims: AuthClaims = Depends(auth_required)
-):
-    """
-    Get detailed information about a specific fund.
-    
-    All authenticated users can view fund details.
-    """
-    # Mock implementation
-    fund = next((f for f in MOCK_FUNDS if f["id"] == fund_id), None)
-    
-    if not fund:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Fund {fund_id} not found"
-        )
-    
-    return fund
-
-
 @router.post("/compare")
 async def compare_funds(
     fund_ids: List[str],
-    claims: AuthClaims = Depends(require_permission(Permission.COMPARE_FUNDS))
+    fields: Optional[str] = Query(default=None),
+    claims: AuthClaims = Depends(require_permission(Permission.COMPARE_FUNDS)),
+    snapshot: FundSnapshot = Depends(current_snapshot)
 ):
     """
     Compare multiple pension funds.
     
     Requires: COMPARE_FUNDS permission (Subscriber or Admin with active status)
     
-    This endpoint performs detailed comparison analysis.
+    Returns, for every compared fund, its rank and delta against the best
+    fund on each cost and return metric, plus the share of capital eroded
+    by costs over the 2/5/10/35-year ISC horizons. Up to
+    `funds_compare_max_funds` funds can be compared in one request.
+    `fields` projects the returned fund records as in /list.
     """
+    projection = _parse_fields(fields)
+    fund_ids = list(dict.fromkeys(fund_ids))
     if len(fund_ids) < 2:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="At least 2 funds required for comparison"
         )
     
-    if len(fund_ids) > 5:
+    if len(fund_ids) > settings.funds_compare_max_funds:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Maximum 5 funds can be compared at once"
+            detail=f"Maximum {settings.funds_compare_max_funds} funds can be compared at once"
         )
     
-    # Mock comparison
-    funds = [f for f in MOCK_FUNDS if f["id"] in fund_ids]
+    rows, missing = snapshot.rows_of(fund_ids)
     
-    if len(funds) != len(fund_ids):
+    if missing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="One or more funds not found"
         )
     
+    comparison = fund_comparison_service.compare_funds(snapshot, rows)
+    
     return {
-        "funds": funds,
-        "comparison": {
-            "best_performance": funds[0]["id"],
-            "lowest_cost": funds[0]["id"],
-            "recommendation": "Based on your profile..."
-        }
+        "funds": snapshot.to_records(rows, fields=projection),
+        "comparison": fund_comparison_service.comparison_summary(snapshot, comparison),
+        "dataset_version": snapshot.version,
     }
 
 
 @router.get("/filters/options")
 async def get_filter_options(
-    claims: AuthClaims = Depends(auth_required)
+    category: Optional[List[str]] = Query(default=None),
+    fund_type: Optional[List[str]] = Query(default=None, alias="type"),
+    societa: Optional[List[str]] = Query(default=None),
+    contract_category: Optional[List[str]] = Query(default=None, alias="categoriaContratto"),
+    claims: AuthClaims = Depends(auth_required),
+    snapshot: FundSnapshot = Depends(current_snapshot)
 ):
     """
-    Get available filter options (categories, companies, etc.)
+    Get available filter options (categories, companies, etc.) with counts
+    
+    Every value comes with the number of funds it would match given the
+    current selection on the *other* facets, so chips of an active facet keep
+    their counts. `total` counts the funds matching the whole selection.
+    
+    Query Parameters (same semantics as /list):
+    - category: Selected categorie (optional, repeatable)
+    - type: Selected fund types (optional, repeatable)
+    - societa: Selected companies (optional, repeatable)
+    - categoriaContratto: Selected contractual categories (optional, repeatable)
     
     Available to all authenticated users.
     """
-    return {
-        "categories": ["azionario", "bilanciato", "obbligazionario", "garantito"],
-        "companies": ["Compagnia A", "Compagnia B", "Compagnia C"],
-        "types": ["FPN", "FPA", "PIP"]
-    }
+    facets = fund_facet_service.facet_counts(snapshot, {
+        "categoria": category,
+        "type": fund_type,
+        "societa": societa,
+        "categoriaContratto": contract_category,
+    })
+    facets["dataset_version"] = snapshot.version
+    return facets
 
 
 @router.post("/analysis/{fund_id}")
 async def analyze_fund(
     fund_id: str,
-    claims: AuthClaims = Depends(require_permission(Permission.COMPARE_FUNDS))
+    similar: int = Query(default=5, ge=0, le=20),
+    claims: AuthClaims = Depends(require_permission(Permission.COMPARE_FUNDS)),
+    snapshot: FundSnapshot = Depends(current_snapshot)
 ):
     """
     Perform advanced analysis on a specific fund.
     
     Requires: COMPARE_FUNDS permission (Subscriber or Admin)
     
-    This is for the "have-fund" section where users analyze their current fund.
+    This is for the "have-fund" section where users analyze their current fund:
+    percentile ranks within its categoria for every ISC horizon and return
+    window (100 = best of the categoria), 0-10 cost and performance scores,
+    and better-scored alternatives from the same categoria.
+    
+    `similar_alternatives` lists the `similar` nearest funds (risk score,
+    ISC curve and returns) that are strictly cheaper or better performing.
     """
-    fund = next((f for f in MOCK_FUNDS if f["id"] == fund_id), None)
+    row = snapshot.row_of(fund_id)
     
-    if not fund:
+    if row is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Fund {fund_id} not found"
         )
     
+    analysis = fund_analysis_service.analyze_fund(snapshot, row)
+    analysis["similar_alternatives"] = fund_similarity_service.similar_summary(snapshot, row, k=similar)
+    
     return {
-        "fund": fund,
-        "analysis": {
-            "performance_score": 7.5,
-            "cost_efficiency": 8.0,
-            "risk_level": "medium",
-            "alternatives": [
-                {"id": "fund_2", "name": "Better Alternative 1"},
-                {"id": "fund_3", "name": "Better Alternative 2"}
-            ],
-            "recommendation": "Your fund is performing well, but here are some alternatives..."
-        }
+        "fund": snapshot.to_record(row),
+        "analysis": analysis,
+        "dataset_version": snapshot.version,
     }
 
 
 @router.get("/recommendations")
 async def get_recommendations(
+    horizon_years: Optional[int] = Query(default=None, ge=1, le=60),
+    age_range: Optional[str] = Query(default=None, pattern="^(under35|35-50|over50)$"),
+    risk_preference: Optional[str] = Query(default=None, pattern="^(low|medium|high)$"),
+    has_fpn: Optional[bool] = Query(default=None),
+    contractual_category: Optional[str] = Query(default=None),
+    max_results: int = Query(default=5, ge=1, le=50),
     risk_profile: Optional[str] = Query(default=None),
-    claims: AuthClaims = Depends(require_active_subscription())
+    claims: AuthClaims = Depends(require_active_subscription()),
+    snapshot: FundSnapshot = Depends(current_snapshot)
 ):
     """
     Get personalized fund recommendations.
     
     Requires: Active subscription (Subscriber or Admin with active status)
     
-    Provides AI-powered recommendations based on user profile.
+    Scores the whole fund universe for the given profile with the same rules
+    as the frontend shortlist (FUND_LOGIC_CONFIG.shortlist), so clients no
+    longer need the full dataset to rank funds.
+    
+    Query Parameters:
+    - horizon_years: Years to retirement (required to get results)
+    - age_range: under35 | 35-50 | over50
+    - risk_preference: low | medium | high
+    - has_fpn: Whether the user has access to a contractual (FPN) fund
+    - contractual_category: Contractual category to match FPN funds against
+    - max_results: Number of funds to return (1-50)
+    - risk_profile: Legacy alias for risk_preference (conservative/balanced/aggressive)
     """
-    # Mock recommendations
+    risk_preference = risk_preference or _LEGACY_RISK_PROFILES.get((risk_profile or "").lower())
+    if not horizon_years:
+        return {
+            "recommended_funds": [],
+            "risk_profile": risk_profile or "balanced",
+            "personalized": False,
+            "dataset_version": snapshot.version,
+        }
+    
+    profile = RecommendationProfile(
+        horizon_years=horizon_years,
+        age_range=age_range,
+        risk_preference=risk_preference,
+        has_fpn=has_fpn,
+        contractual_category=contractual_category,
+    )
+    recommendations = recommend(snapshot, profile, max_results=max_results)
+    records = snapshot.to_records([r.row for r in recommendations])
+    
     return {
         "recommended_funds": [
-            {"id": "fund_1", "name": "Top Pick", "score": 9.5, "reason": "Best fit for your profile"},
-            {"id": "fund_2", "name": "Second Best", "score": 9.0, "reason": "Low cost, good returns"},
+            {
+                "id": fund["id"],
+                "name": f"{fund['pip']} - {fund['linea']}",
+                "score": round(rec.score, 4),
+                "reason": "Low cost for your horizon" if rec.cost_score >= rec.return_score else "Strong long-term returns",
+                "fund": fund,
+            }
+            for rec, fund in zip(recommendations, records)
         ],
-        "risk_profile": risk_profile or "balanced",
-        "personalized": True
+        "risk_profile": risk_profile or risk_preference or "balanced",
+        "personalized": True,
+        "dataset_version": snapshot.version
     }
+
+
+@router.get("/frontier")
+async def get_frontier(
+    category: Optional[List[str]] = Query(default=None),
+    cost: str = Query(default=fund_frontier_service.DEFAULT_COST_METRIC),
+    returns: str = Query(default=fund_frontier_service.DEFAULT_RETURN_METRIC, alias="return"),
+    claims: AuthClaims = Depends(auth_required),
+    snapshot: FundSnapshot = Depends(current_snapshot)
+):
+    """
+    Cost/return Pareto frontier per categoria.
+    
+    A fund is on the frontier when no other fund of its categoria is both
+    cheaper (or as cheap) and better performing (or as good) on the chosen
+    pair. Funds missing either metric are not ranked.
+    
+    Query Parameters:
+    - category: Restrict to these categorie (optional, repeatable)
+    - cost: ISC horizon, one of isc2a/isc5a/isc10a/isc35a (default isc10a)
+    - return: Return window, e.g. ultimi10Anni (default ultimi10Anni)
+    """
+    try:
+        frontier = fund_frontier_service.get_frontier(snapshot, cost=cost, returns=returns)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    
+    return {
+        "cost": frontier.cost,
+        "return": frontier.returns,
+        "categories": fund_frontier_service.frontier_summary(snapshot, frontier, category),
+        "dataset_version": snapshot.version,
+    }
+
+
+@router.get("/search")
+async def search_funds(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(default=10, ge=1, le=50),
+    claims: AuthClaims = Depends(auth_required),
+    snapshot: FundSnapshot = Depends(current_snapshot)
+):
+    """
+    Search funds by fondo, societa and comparto names.
+    
+    Matching ignores case and accents ("stabilita" finds "STABILITÀ"),
+    accepts prefixes for search-as-you-type and tolerates typos. Every word
+    of the query has to match; results are ranked by how well they match.
+    
+    Query Parameters:
+    - q: Search text
+    - limit: Maximum number of results (1-50)
+    """
+    return {
+        "query": q,
+        "results": fund_search_service.search_summary(snapshot, q, limit=limit),
+        "dataset_version": snapshot.version,
+    }
+
+
+@router.get("/export")
+async def export_funds(
+    request: Request,
+    export_format: str = Query(default="csv", alias="format", pattern="^(arrow|parquet|csv)$"),
+    claims: AuthClaims = Depends(require_permission(Permission.VIEW_ALL_FUNDS)),
+    snapshot: FundSnapshot = Depends(current_snapshot)
+):
+    """
+    Download the whole fund universe in one request.
+    
+    Requires: VIEW_ALL_FUNDS permission (Subscriber or Admin with active status)
+    
+    Query Parameters:
+    - format: `csv` (default), `arrow` (Arrow IPC stream) or `parquet`;
+      the last two need pyarrow on the server (501 otherwise)
+    
+    One row per fund with a column per ISC horizon and return window. The
+    response is versioned by dataset: its `ETag` is the dataset version, so
+    clients revalidate with `If-None-Match` and get 304 until the data changes.
+    """
+    etag = f'"{snapshot.version}-{export_format}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "private, no-cache",
+        "X-Dataset-Version": snapshot.version,
+    }
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    try:
+        export = fund_export_service.export_funds(snapshot, export_format)
+    except fund_export_service.ExportUnavailableError as e:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail=str(e)
+        )
+    
+    headers["Content-Disposition"] = f'attachment; filename="{export.filename}"'
+    return StreamingResponse(export.chunks, media_type=export.media_type, headers=headers)
+
+
+@router.get("/changes")
+async def fund_changes(
+    since: str = Query(..., min_length=1, max_length=64),
+    fields: Optional[str] = Query(default=None),
+    claims: AuthClaims = Depends(require_permission(Permission.VIEW_ALL_FUNDS)),
+    snapshot: FundSnapshot = Depends(current_snapshot)
+):
+    """
+    Funds changed since a previous dataset version, for incremental sync.
+    
+    Requires: VIEW_ALL_FUNDS permission (Subscriber or Admin with active status)
+    
+    Query Parameters:
+    - since: `dataset_version` the client last synced
+    - fields: Comma-separated projection of the returned fund records
+    
+    Returns the inserted and updated fund records and the deleted fund ids;
+    the client stores `dataset_version` for its next sync. Recent versions
+    are diffed from memory and older ones are rebuilt from the dataset
+    history (see `/funds/versions`). Only a `since` found in neither gets
+    410, and the client then has to download the full dataset again.
+    """
+    projection = _parse_fields(fields)
+    try:
+        changes = fund_sync_service.fund_changes(snapshot, since)
+    except UnknownVersionError as e:
+        raise HTTPException(
+            status_code=status.HTTP_410_GONE,
+            detail=str(e)
+        )
+    return fund_sync_service.changes_summary(snapshot, changes, fields=projection)
+
+
+@router.get("/versions")
+async def list_dataset_versions(
+    claims: AuthClaims = Depends(auth_required),
+    snapshot: FundSnapshot = Depends(current_snapshot)
+):
+    """
+    Recorded dataset versions (COVIP releases), newest first.
+    
+    Any of them can be passed as `as_of` to the other fund endpoints to see
+    the funds, costs and returns as they were in that release.
+    """
+    try:
+        entries = get_fund_store().history.entries()
+    except OSError as e:
+        logger.error(f"Fund history unavailable: {e}")
+        entries = []
+    return {
+        "versions": fund_history_service.history_summary(entries),
+        "dataset_version": snapshot.version,
+    }
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag in candidates or "*" in candidates
+
+
+# Keep last: the catch-all path would otherwise shadow the static GET routes above
+@router.get("/{fund_id}")
+async def get_fund_details(
+    fund_id: str,
+    fields: Optional[str] = Query(default=None),
+    claims: AuthClaims = Depends(auth_required),
+    snapshot: FundSnapshot = Depends(current_snapshot)
+):
+    """
+    Get detailed information about a specific fund.
+    
+    All authenticated users can view fund details. `dominated_by` lists the
+    (ISC horizon, return window) pairs on which a cheaper-or-equal and
+    better-or-equal fund of the same categoria exists, with that fund's id.
+    `fields` projects the record as in /list and also accepts `dominated_by`.
+    """
+    projection = _parse_fields(fields, extra=("dominated_by",))
+    row = snapshot.row_of(fund_id)
+    
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Fund {fund_id} not found"
+        )
+    
+    fund = snapshot.to_record(row, fields=projection)
+    if projection is None or "dominated_by" in projection:
+        fund["dominated_by"] = fund_frontier_service.dominated_by(snapshot, row)
+    return fund
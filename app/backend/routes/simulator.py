@@ -5,14 +5,25 @@ Provides access to the pension simulation tools.
 Only available to subscribers and admins with active status.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Path, status
+from fastapi.responses import JSONResponse, Response
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import Annotated, Any, Dict, List, Optional, Tuple
+from functools import partial
 import logging
 
 from backend.auth import require_permission, require_active_subscription
 from backend.auth.models import AuthClaims
 from backend.auth.roles import Permission
+from backend.services import simulation_job_service, simulation_montecarlo_service, simulation_service
+from backend.services.fund_data_service import RENDIMENTI_COLUMNS, FundDataError, get_fund_store
+from backend.services.simulation_job_service import JobTask, SimulationJobsBusyError, get_simulation_jobs
+from backend.services.simulation_pool_service import (
+    SimulationPoolBusyError,
+    SimulationTimeoutError,
+    get_simulation_pool,
+)
+from backend.settings import settings
 
 logger = logging.getLogger("uvicorn.error")
 
@@ -66,6 +77,57 @@ class SimulationResponse(BaseModel):
     breakdown: dict
 
 
+class MonteCarloRequest(SimulationRequest):
+    """Request model for the stochastic (Monte Carlo) simulation."""
+    
+    allocazione: Dict[str, float] = Field(
+        default_factory=lambda: {"BIL": 1.0},
+        description="Weight per fund categoria (GAR, OBB, OBB MISTO, BIL, AZN)"
+    )
+    n_paths: int = Field(default=1000, ge=100, description="Number of simulated paths")
+    seed: Optional[int] = Field(default=None, ge=0, description="Random seed, for reproducible bands")
+    bootstrap: bool = Field(default=False, description="Resample the published last-year fund returns")
+
+
+class SimulationColumns(BaseModel):
+    """Columnar scenarios: one list per SimulationRequest field, all of the same length."""
+    
+    eta_attuale: List[Annotated[int, Field(ge=18, le=67)]]
+    eta_pensione: List[Annotated[int, Field(ge=50, le=70)]]
+    contributo_mensile: List[Annotated[float, Field(ge=0)]]
+    contributo_azienda: List[Annotated[float, Field(ge=0)]]
+    montante_attuale: Optional[List[Annotated[float, Field(ge=0)]]] = None
+    tfr_to_fund: Optional[List[bool]] = None
+    tfr_annuale: Optional[List[Optional[Annotated[float, Field(ge=0)]]]] = None
+    rendimento_atteso: Optional[List[Annotated[float, Field(ge=-5, le=15)]]] = None
+    reddito_annuo: List[Annotated[float, Field(ge=0)]]
+    anni_contribuzione: List[Annotated[int, Field(ge=0, le=50)]]
+
+
+class BatchSimulationRequest(BaseModel):
+    """Scenarios for /calculate-batch, either as a list or as columns (not both)."""
+    
+    scenarios: Optional[List[SimulationRequest]] = None
+    columns: Optional[SimulationColumns] = None
+
+
+class FundProjectionRequest(SimulationRequest):
+    """A /calculate scenario projected with the published return of every fund."""
+    
+    periodo: str = Field(
+        default="ultimi10Anni",
+        description=f"Return period used as rendimento_atteso ({', '.join(RENDIMENTI_COLUMNS)})"
+    )
+
+
+class SimulationJobRequest(BaseModel):
+    """A background simulation: exactly one of montecarlo, batch or funds."""
+    
+    montecarlo: Optional[MonteCarloRequest] = None
+    batch: Optional[BatchSimulationRequest] = None
+    funds: Optional[FundProjectionRequest] = None
+
+
 @router.post("/calculate", response_model=SimulationResponse)
 async def calculate_simulation(
     request: SimulationRequest,
@@ -91,38 +153,29 @@ async def calculate_simulation(
             )
         
         anni_accumulo = request.eta_pensione - request.eta_attuale
-        
-        # Mock calculation (in production, use actual financial formulas)
-        contributo_annuo = (request.contributo_mensile + request.contributo_azienda) * 12
-        if request.tfr_to_fund and request.tfr_annuale:
-            contributo_annuo += request.tfr_annuale
-        
-        # Simple compound interest calculation (mock)
-        montante_finale = request.montante_attuale
-        contributo_totale = request.montante_attuale
-        
-        montante_chart = []
-        
-        for anno in range(anni_accumulo):
-            montante_finale += contributo_annuo
-            montante_finale *= (1 + request.rendimento_atteso / 100)
-            contributo_totale += contributo_annuo
-            
-            montante_chart.append({
-                "anno": request.eta_attuale + anno + 1,
-                "montante": round(montante_finale, 2),
-                "contributi": round(contributo_totale, 2)
-            })
-        
-        rendimento_totale = montante_finale - contributo_totale
+        contributo_annuo = _contributo_annuo(request)
         
         # Tax calculations (mock)
-        aliquota_irpef = _calcola_aliquota_irpef(request.reddito_annuo)
+        aliquota_irpef = float(simulation_service.aliquota_irpef(request.reddito_annuo))
         risparmio_fiscale_annuo = contributo_annuo * (aliquota_irpef / 100)
         risparmio_fiscale_totale = risparmio_fiscale_annuo * anni_accumulo
         
+        # Senza fiscale, con fiscale and TFR paths in one closed-form pass
+        paths = simulation_service.simulate_montante(
+            request.montante_attuale,
+            contributo_annuo,
+            request.rendimento_atteso,
+            anni_accumulo,
+            risparmio_fiscale_annuo=risparmio_fiscale_annuo,
+        )
+        montante_finale = float(paths.senza_fiscale[-1])
+        contributo_totale = float(paths.contributi[-1])
+        rendimento_totale = montante_finale - contributo_totale
+        
+        montante_chart = simulation_service.montante_chart(paths, request.eta_attuale)
+        
         # Pension tax (mock)
-        aliquota_pensione = _calcola_aliquota_pensione(request.anni_contribuzione)
+        aliquota_pensione = float(simulation_service.aliquota_pensione(request.anni_contribuzione))
         tassazione_stimata = montante_finale * (aliquota_pensione / 100)
         netto_stimato = montante_finale - tassazione_stimata
         
@@ -156,6 +209,166 @@ async def calculate_simulation(
         )
 
 
+@router.post("/montecarlo")
+async def calculate_monte_carlo(
+    request: MonteCarloRequest,
+    claims: AuthClaims = Depends(require_permission(Permission.USE_SIMULATOR))
+):
+    """
+    Stochastic pension simulation with percentile fan chart.
+    
+    Requires: USE_SIMULATOR permission (Subscriber or Admin with active status)
+    
+    Annual returns are drawn per fund categoria of `allocazione`, with
+    correlated returns across categories, for `n_paths` paths (up to
+    `simulator_montecarlo_max_paths`). `rendimento_atteso`, when given,
+    overrides the expected return of the allocation. With `bootstrap` the
+    returns are resampled from the funds' published last-year returns.
+    The same `seed` gives the same result.
+    
+    Returns the P5/P25/P50/P75/P95 montante per year (`montante_chart`)
+    and at retirement.
+    """
+    args, kwargs = _monte_carlo_arguments(request, settings.simulator_montecarlo_max_paths)
+    try:
+        result = await _run_in_pool(simulation_montecarlo_service.monte_carlo, *args, **kwargs)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    return simulation_montecarlo_service.monte_carlo_summary(result, request.eta_attuale)
+
+
+@router.post("/calculate-batch")
+async def calculate_simulation_batch(
+    request: BatchSimulationRequest,
+    claims: AuthClaims = Depends(require_permission(Permission.USE_SIMULATOR))
+):
+    """
+    Evaluate many what-if scenarios in one request.
+    
+    Requires: USE_SIMULATOR permission (Subscriber or Admin with active status)
+    
+    Scenarios are sent either as `scenarios`, a list of /calculate requests,
+    or as `columns`, one list per /calculate field (`montante_attuale`,
+    `tfr_to_fund`, `tfr_annuale` and `rendimento_atteso` may be omitted).
+    All scenarios are computed together; the response is columnar too:
+    `columns` holds one list per /calculate total, in scenario order, plus
+    `montante_con_fiscale` and `montante_tfr`. No chart data is returned.
+    Up to `simulator_batch_max_scenarios` scenarios per request.
+    """
+    columns = _batch_columns(request, settings.simulator_batch_max_scenarios)
+    try:
+        results = await _run_in_pool(simulation_service.simulate_batch, columns)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    # Plain lists of numbers: skip the generic response encoding
+    return JSONResponse(simulation_service.batch_summary(results))
+
+
+@router.post("/jobs", status_code=status.HTTP_202_ACCEPTED)
+async def submit_simulation_job(
+    request: SimulationJobRequest,
+    claims: AuthClaims = Depends(require_permission(Permission.USE_SIMULATOR))
+):
+    """
+    Start a long simulation in the background and return its job id.
+    
+    Requires: USE_SIMULATOR permission (Subscriber or Admin with active status)
+    
+    The body holds one of:
+    - `montecarlo`: a /montecarlo request, up to `simulator_jobs_max_paths` paths
+    - `batch`: a /calculate-batch request, up to `simulator_jobs_max_scenarios` scenarios
+    - `funds`: a /calculate request projected once per fund, with the fund's
+      `periodo` return as `rendimento_atteso`; the result is /calculate-batch
+      columns plus the fund `ids`
+    
+    The job id is a hash of the request (and of the dataset version when fund
+    data is used): submitting the same request again returns the existing job
+    instead of computing it twice. Poll GET /jobs/{job_id} for progress and
+    the result; finished jobs are kept for `simulator_jobs_ttl_seconds`.
+    Answers 503 when too many jobs are queued or running.
+    """
+    given = [name for name in ("montecarlo", "batch", "funds") if getattr(request, name) is not None]
+    if len(given) != 1:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide exactly one of montecarlo, batch or funds"
+        )
+    kind = given[0]
+    payload = getattr(request, kind).model_dump(mode="json")
+    
+    if kind == "montecarlo":
+        args, kwargs = _monte_carlo_arguments(request.montecarlo, settings.simulator_jobs_max_paths)
+        # An omitted rendimento_atteso means the allocation's own expected return
+        payload["rendimento_atteso"] = kwargs["rendimento"]
+        if request.montecarlo.bootstrap:
+            payload["dataset_version"] = get_fund_store().version
+        tasks = [JobTask(simulation_job_service.monte_carlo_task, (request.montecarlo.eta_attuale,) + args, kwargs)]
+        combine = _first_result
+    elif kind == "batch":
+        columns = _batch_columns(request.batch, settings.simulator_jobs_max_scenarios)
+        tasks = simulation_job_service.batch_tasks(columns, settings.simulator_jobs_chunk_size)
+        combine = simulation_job_service.combine_batches
+    else:
+        if request.funds.eta_pensione <= request.funds.eta_attuale:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Retirement age must be greater than current age"
+            )
+        snapshot = _fund_snapshot()
+        try:
+            fund_ids, columns = simulation_job_service.fund_projection_columns(
+                snapshot, request.funds.model_dump(), request.funds.periodo
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+        payload.pop("rendimento_atteso", None)
+        payload["dataset_version"] = snapshot.version
+        tasks = simulation_job_service.batch_tasks(columns, settings.simulator_jobs_chunk_size)
+        combine = partial(simulation_job_service.combine_fund_projection, fund_ids)
+    
+    try:
+        record = await get_simulation_jobs().submit(kind, payload, tasks, combine)
+    except SimulationJobsBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "5"}
+        )
+    return JSONResponse(simulation_job_service.job_summary(record), status_code=status.HTTP_202_ACCEPTED)
+
+
+@router.get("/jobs/{job_id}")
+async def get_simulation_job(
+    job_id: str = Path(..., max_length=64),
+    claims: AuthClaims = Depends(require_permission(Permission.USE_SIMULATOR))
+):
+    """
+    Status, progress and (once done) result of a simulation job.
+    
+    Requires: USE_SIMULATOR permission (Subscriber or Admin with active status)
+    
+    `status` is queued, running, done or failed (`error` says why);
+    `progress` goes from 0 to 1 as the job's tasks complete.
+    """
+    body = await get_simulation_jobs().response(job_id)
+    if body is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Unknown or expired simulation job"
+        )
+    # Encoded once when the job finished: polls never serialize the result again
+    return Response(body, media_type="application/json")
+
+
 @router.get("/parameters")
 async def get_simulation_parameters(
     claims: AuthClaims = Depends(require_active_subscription())
@@ -230,24 +443,95 @@ async def get_simulation_history(
     }
 
 
-def _calcola_aliquota_irpef(reddito: float) -> float:
-    """Calculate Italian IRPEF tax rate based on income."""
-    if reddito <= 15000:
-        return 23.0
-    elif reddito <= 28000:
-        return 25.0
-    elif reddito <= 50000:
-        return 35.0
-    else:
-        return 43.0
+async def _run_in_pool(fn, *args, **kwargs):
+    """Run a CPU-bound simulation in the worker pool, 503 when full and 504 on timeout."""
+    try:
+        return await get_simulation_pool().run(fn, *args, **kwargs)
+    except SimulationPoolBusyError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=str(e),
+            headers={"Retry-After": "1"}
+        )
+    except SimulationTimeoutError as e:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=str(e)
+        )
 
 
-def _calcola_aliquota_pensione(anni_contribuzione: int) -> float:
-    """Calculate pension withdrawal tax rate based on contribution years."""
-    if anni_contribuzione <= 15:
-        return 15.0
-    elif anni_contribuzione <= 35:
-        # Linear decrease from 15% to 9%
-        return 15.0 - ((anni_contribuzione - 15) * 0.3)
+def _fund_snapshot():
+    try:
+        return get_fund_store().snapshot
+    except FundDataError as e:
+        logger.error(f"Fund dataset unavailable: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Fund data is not available"
+        )
+
+
+def _monte_carlo_arguments(request: MonteCarloRequest, max_paths: int) -> Tuple[tuple, Dict[str, Any]]:
+    """Validate a Monte Carlo request and return the monte_carlo() arguments."""
+    if request.eta_pensione <= request.eta_attuale:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Retirement age must be greater than current age"
+        )
+    if request.n_paths > max_paths:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Maximum {max_paths} paths per simulation"
+        )
+    
+    pools = _fund_snapshot().derived("return_pools") if request.bootstrap else None
+    args = (
+        request.montante_attuale,
+        _contributo_annuo(request),
+        request.eta_pensione - request.eta_attuale,
+        request.allocazione,
+    )
+    kwargs = {
+        "paths": request.n_paths,
+        "seed": request.seed,
+        "rendimento": request.rendimento_atteso if "rendimento_atteso" in request.model_fields_set else None,
+        "pools": pools,
+    }
+    return args, kwargs
+
+
+def _batch_columns(request: BatchSimulationRequest, max_scenarios: int) -> Dict[str, Optional[list]]:
+    """Validate a batch request and return its scenarios as columns."""
+    if (request.scenarios is None) == (request.columns is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either scenarios or columns"
+        )
+    
+    if request.columns is not None:
+        columns = request.columns.model_dump()
     else:
-        return 9.0
+        columns = {
+            name: [getattr(scenario, name) for scenario in request.scenarios]
+            for name in simulation_service.SCENARIO_COLUMNS
+        }
+    
+    count = max((len(values) for values in columns.values() if values is not None), default=0)
+    if count > max_scenarios:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Maximum {max_scenarios} scenarios per request"
+        )
+    return columns
+
+
+def _first_result(results: list) -> Any:
+    return results[0]
+
+
+def _contributo_annuo(request: SimulationRequest) -> float:
+    """Yearly payment into the fund: contributions plus the TFR when transferred."""
+    contributo_annuo = (request.contributo_mensile + request.contributo_azienda) * 12
+    if request.tfr_to_fund and request.tfr_annuale:
+        contributo_annuo += request.tfr_annuale
+    return contributo_annuo
@@ -0,0 +1,92 @@
+"""
+Build the fund artifacts from the COVIP CSVs: the binary snapshot mapped by
+the backend and app/frontend/data/funds.ts.
+
+Usage:
+    python scripts/build_fund_snapshot.py [--data-dir ../../data] [--output data/funds.snapshot]
+                                          [--frontend-output ../frontend/data/funds.ts | --no-frontend]
+                                          [--history-dir data/funds.snapshot.history] [--force]
+
+Only the CSVs whose content changed since the last run are parsed again, and
+only the artifacts whose content changes are rewritten. Run it before building
+the backend image so workers map the snapshot at startup instead of parsing
+the CSVs.
+
+Every built version is also recorded in the fund history (default
+``<output>.history``, or APP_FUNDS_HISTORY_PATH), which backs ``?as_of=`` and
+``/funds/changes``. The history is a runtime artifact, not part of the
+repository: point ``--history-dir`` or APP_FUNDS_HISTORY_PATH at the volume
+the backend reads it from.
+"""
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+# Add the parent directory to the path so we can import from services
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backend  # noqa: F401,E402  (registers the backend.* import alias)
+from backend.services.fund_data_service import (  # noqa: E402
+    DEFAULT_DATA_DIR,
+    DEFAULT_SNAPSHOT_PATH,
+    FundDataError,
+)
+from backend.services.fund_ingestion_service import DEFAULT_FRONTEND_PATH, ingest_funds  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Build the fund snapshot and funds.ts from the COVIP CSVs")
+    parser.add_argument("--data-dir", type=Path, default=DEFAULT_DATA_DIR, help="Folder with the COVIP CSVs")
+    parser.add_argument("--output", type=Path, default=DEFAULT_SNAPSHOT_PATH, help="Snapshot file to write")
+    parser.add_argument(
+        "--frontend-output", type=Path, default=DEFAULT_FRONTEND_PATH, help="funds.ts module to write"
+    )
+    parser.add_argument("--no-frontend", action="store_true", help="Only build the backend snapshot")
+    parser.add_argument(
+        "--history-dir", type=Path, default=None, help="Fund history to record the version in (default <output>.history)"
+    )
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and rebuild everything")
+    args = parser.parse_args()
+
+    try:
+        result = ingest_funds(
+            args.data_dir,
+            args.output,
+            frontend_path=None if args.no_frontend else args.frontend_output,
+            force=args.force,
+            history_path=args.history_dir,
+        )
+    except FundDataError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    if result.up_to_date:
+        print(f"✅ Fund artifacts up to date: version {result.version}")
+        return 0
+    if not result.parsed and not result.written:
+        print(f"✅ Recorded version {result.version} in the fund history")
+        return 0
+
+    print(f"Parsed: {', '.join(result.parsed) or 'nothing (parse cache)'}")
+    for path in result.written:
+        print(f"✅ Wrote {path} ({path.stat().st_size} bytes)")
+    print(f"Version {result.version}, {result.funds} funds")
+    if result.recorded:
+        print("✅ Recorded it in the fund history")
+
+    report = result.matches
+    if report is not None:
+        uncertain = [m for m in report.matches.values() if m.confidence < 1.0]
+        for match in uncertain:
+            print(f"  ~ {match.name} -> {match.target_name} ({match.method}, confidence {match.confidence})")
+        if report.unmatched:
+            print(f"⚠️  FPN funds without a contract category: {', '.join(report.unmatched)}")
+        if report.unused:
+            print(f"⚠️  Fondi di Categoria entries matching no fund: {', '.join(report.unused)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
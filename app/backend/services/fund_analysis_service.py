@@ -0,0 +1,159 @@
+"""
+Fund analysis service - "where does my comparto stand" within its categoria.
+
+Percentile ranks of every fund against the other funds of its categoria are
+precomputed once per snapshot for each ISC horizon and each rendimenti
+window, together with a best-first ordering of every categoria. Analysing a
+fund and listing better alternatives are then lookups into that ranking.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+import numpy as np
+
+from backend.config.fund_logic import FUND_LOGIC_CONFIG
+from backend.services.fund_comparison_service import (
+    COMPARISON_METRICS,
+    competition_ranks,
+    orient_metrics,
+)
+from backend.services.fund_data_service import FundSnapshot, register_derivation
+
+logger = logging.getLogger(__name__)
+
+# Headline metrics of the "check my fund" flow (CheckMyFundFlow.tsx)
+COST_METRIC = "isc10a"
+PERFORMANCE_METRIC = "ultimi10Anni"
+
+# categoryRiskScores upper bounds for the low/medium risk levels
+_RISK_LEVELS = ((30, "low"), (55, "medium"))
+
+_COST_INDEX = COMPARISON_METRICS.index(COST_METRIC)
+_PERFORMANCE_INDEX = COMPARISON_METRICS.index(PERFORMANCE_METRIC)
+
+
+@dataclass(frozen=True)
+class CategoryRanking:
+    """
+    Per-categoria ranking of a snapshot.
+
+    ``percentiles`` and ``peer_counts`` are ``(funds, metrics)`` matrices over
+    :data:`COMPARISON_METRICS`. A percentile is the share of the other funds
+    of the categoria (with a value for that metric) that the fund matches or
+    beats: 100 is the best of its categoria, 0 the worst. ``score`` averages
+    the cost and performance headline percentiles; ``orderings`` lists the
+    rows of every categoria by descending score.
+    """
+
+    percentiles: np.ndarray
+    peer_counts: np.ndarray
+    score: np.ndarray
+    categories: np.ndarray
+    orderings: Dict[object, np.ndarray]
+
+
+def build_category_ranking(snapshot: FundSnapshot) -> CategoryRanking:
+    """Precompute category percentiles and best-first orderings for a snapshot."""
+    values = snapshot.derived("metric_matrix")
+    percentiles = np.full(values.shape, np.nan)
+    peer_counts = np.zeros(values.shape, dtype=np.intp)
+    categories = np.full(snapshot.size, None, dtype=object)
+
+    postings = snapshot.indexes["categoria"].postings
+    for key, rows in postings.items():
+        ranks, _ = competition_ranks(orient_metrics(values[rows]))
+        counts = (~np.isnan(values[rows])).sum(axis=0)
+        # A fund alone in its categoria (for that metric) is its best fund
+        standing = np.where(counts > 1, 100.0 * (counts - ranks) / np.maximum(counts - 1, 1), 100.0)
+        standing[np.isnan(ranks)] = np.nan
+        percentiles[rows] = standing
+        peer_counts[rows] = counts
+        categories[rows] = key
+
+    headline = percentiles[:, [_COST_INDEX, _PERFORMANCE_INDEX]]
+    available = ~np.isnan(headline)
+    totals = np.where(available, headline, 0.0).sum(axis=1)
+    counts = available.sum(axis=1)
+    score = np.where(counts > 0, totals / np.maximum(counts, 1), np.nan)
+
+    orderings: Dict[object, np.ndarray] = {}
+    for key, rows in postings.items():
+        ranked = rows[np.argsort(np.where(np.isnan(score[rows]), np.inf, -score[rows]), kind="stable")]
+        ranked.flags.writeable = False
+        orderings[key] = ranked
+
+    for array in (percentiles, peer_counts, score, categories):
+        array.flags.writeable = False
+    return CategoryRanking(
+        percentiles=percentiles,
+        peer_counts=peer_counts,
+        score=score,
+        categories=categories,
+        orderings=orderings,
+    )
+
+
+register_derivation("category_ranking", build_category_ranking)
+
+
+def better_alternatives(snapshot: FundSnapshot, row: int, limit: int = 3) -> np.ndarray:
+    """Rows of the best-scored funds in the same categoria that outscore ``row``."""
+    ranking: CategoryRanking = snapshot.derived("category_ranking")
+    ordering = ranking.orderings.get(ranking.categories[row])
+    if ordering is None:
+        return np.empty(0, dtype=np.intp)
+    head = ordering[: limit + 1]
+    better = (head != row) & ~np.isnan(ranking.score[head])
+    if not math.isnan(ranking.score[row]):
+        better &= ranking.score[head] > ranking.score[row]
+    return head[better][:limit]
+
+
+def risk_level(categoria: Optional[str]) -> Optional[str]:
+    """Map a categoria to low/medium/high through ``categoryRiskScores``."""
+    score = FUND_LOGIC_CONFIG["categoryRiskScores"].get((categoria or "").strip().upper())
+    if score is None:
+        return None
+    return next((level for bound, level in _RISK_LEVELS if score <= bound), "high")
+
+
+def analyze_fund(snapshot: FundSnapshot, row: int, max_alternatives: int = 3) -> Dict[str, object]:
+    """Serialize the categoria standing of a fund for ``/funds/analysis``."""
+    ranking: CategoryRanking = snapshot.derived("category_ranking")
+    percentiles = ranking.percentiles[row]
+    alternatives = better_alternatives(snapshot, row, limit=max_alternatives)
+    categoria = snapshot.columns["categoria"][row]
+    peers = ranking.orderings.get(ranking.categories[row])
+
+    return {
+        "categoria": categoria,
+        "peer_count": 0 if peers is None else int(peers.size),
+        "percentiles": {metric: _round(percentiles[i]) for i, metric in enumerate(COMPARISON_METRICS)},
+        "cost_efficiency": _score(percentiles[_COST_INDEX]),
+        "performance_score": _score(percentiles[_PERFORMANCE_INDEX]),
+        "category_score": _round(ranking.score[row]),
+        "risk_level": risk_level(categoria),
+        "alternatives": [
+            {
+                "id": record["id"],
+                "name": f"{record['pip']} - {record['linea']}",
+                "category_score": _round(ranking.score[alt]),
+                "fund": record,
+            }
+            for alt, record in zip(alternatives.tolist(), snapshot.to_records(alternatives))
+        ],
+    }
+
+
+def _score(percentile: float) -> Optional[float]:
+    """Percentile on the 0-10 scale used by the analysis response."""
+    return None if math.isnan(percentile) else round(float(percentile) / 10.0, 1)
+
+
+def _round(value: float) -> Optional[float]:
+    return None if math.isnan(value) else round(float(value), 2)
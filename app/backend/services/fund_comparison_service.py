@@ -0,0 +1,198 @@
+"""
+Fund comparison service - side-by-side metrics for a set of funds.
+
+The numeric metrics of every fund are stacked once per snapshot into a single
+``(funds, metrics)`` matrix. A comparison gathers the requested rows with one
+fancy index and computes ranks, deltas against the best fund and cost drag for
+all metrics at once, so its cost barely depends on how many funds are compared.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.services.fund_data_service import (
+    ISC_COLUMNS,
+    NUMERIC_COLUMNS,
+    RENDIMENTI_COLUMNS,
+    FundSnapshot,
+    register_derivation,
+)
+
+logger = logging.getLogger(__name__)
+
+COMPARISON_METRICS = NUMERIC_COLUMNS
+
+# Holding period (years) each ISC column refers to
+COST_HORIZONS: Dict[str, int] = {"isc2a": 2, "isc5a": 5, "isc10a": 10, "isc35a": 35}
+
+# Costs are better when lower, returns when higher
+_LOWER_IS_BETTER = np.array([name in ISC_COLUMNS for name in COMPARISON_METRICS])
+_ISC_SLICE = slice(0, len(ISC_COLUMNS))
+_HORIZON_YEARS = np.array([COST_HORIZONS[name] for name in ISC_COLUMNS], dtype=np.float64)
+
+
+@dataclass(frozen=True)
+class FundComparison:
+    """
+    Comparison of ``rows`` over :data:`COMPARISON_METRICS`.
+
+    Every matrix is ``(len(rows), len(COMPARISON_METRICS))`` except the cost
+    drag ones, which have one column per ISC horizon. Missing values are NaN.
+    """
+
+    rows: np.ndarray
+    values: np.ndarray
+    ranks: np.ndarray
+    best_values: np.ndarray
+    best_positions: np.ndarray
+    deltas: np.ndarray
+    cost_drag: np.ndarray
+    excess_cost_drag: np.ndarray
+
+    def best_row(self, metric: str) -> Optional[int]:
+        """Row of the best fund for a metric, or None if no fund has a value."""
+        position = self.best_positions[COMPARISON_METRICS.index(metric)]
+        return None if position < 0 else int(self.rows[position])
+
+    def headline_metric(self, candidates: Sequence[str]) -> Optional[str]:
+        """The last of ``candidates`` (longest horizon) that any fund reports."""
+        for metric in reversed(candidates):
+            if self.best_positions[COMPARISON_METRICS.index(metric)] >= 0:
+                return metric
+        return None
+
+
+def build_metric_matrix(snapshot: FundSnapshot) -> np.ndarray:
+    """Stack the numeric columns of a snapshot into a read-only matrix."""
+    matrix = np.column_stack([snapshot.columns[name] for name in COMPARISON_METRICS])
+    matrix.flags.writeable = False
+    return matrix
+
+
+register_derivation("metric_matrix", build_metric_matrix)
+
+
+def orient_metrics(values: np.ndarray) -> np.ndarray:
+    """Flip metrics so that lower is better everywhere; missing values become +inf."""
+    oriented = np.where(_LOWER_IS_BETTER, values, -values)
+    return np.where(np.isnan(values), np.inf, oriented)
+
+
+def competition_ranks(oriented: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rank each column of an oriented matrix (1 = best, ties share the lowest rank).
+
+    Returns ``(ranks, order)`` where ``order`` is the stable best-first
+    argsort of every column; missing (+inf) entries get a NaN rank.
+    """
+    order = np.argsort(oriented, axis=0, kind="stable")
+    ordered = np.take_along_axis(oriented, order, axis=0)
+
+    # Competition rank = 1 + position of the first equal value in sorted order
+    first_of_tie = np.ones(ordered.shape, dtype=bool)
+    first_of_tie[1:] = ordered[1:] != ordered[:-1]
+    positions = np.arange(oriented.shape[0], dtype=np.float64)[:, None]
+    sorted_ranks = 1.0 + np.maximum.accumulate(np.where(first_of_tie, positions, 0.0), axis=0)
+    ranks = np.empty_like(sorted_ranks)
+    np.put_along_axis(ranks, order, sorted_ranks, axis=0)
+    ranks[np.isinf(oriented)] = np.nan
+    return ranks, order
+
+
+def compare_funds(snapshot: FundSnapshot, rows: np.ndarray) -> FundComparison:
+    """
+    Compare the given rows.
+
+    - Ranks are competition ranks (1 = best, ties share the lowest rank);
+      funds without a value get no rank.
+    - Deltas are ``value - best`` per metric (>= 0 for costs, <= 0 for returns).
+    - Cost drag is the share of a lump sum eroded by costs over each ISC
+      horizon, ``1 - (1 - isc)^years``, in percent; excess drag is measured
+      against the cheapest compared fund for that horizon.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    if rows.size == 0:
+        raise ValueError("At least one fund is required for a comparison")
+    values = snapshot.derived("metric_matrix")[rows]
+    missing = np.isnan(values)
+
+    oriented = orient_metrics(values)
+    ranks, order = competition_ranks(oriented)
+
+    has_value = ~missing.all(axis=0)
+    best_positions = np.where(has_value, order[0], -1)
+    best_values = np.full(len(COMPARISON_METRICS), np.nan)
+    best_values[has_value] = values[best_positions[has_value], np.flatnonzero(has_value)]
+    deltas = values - best_values
+
+    isc = values[:, _ISC_SLICE]
+    cost_drag = 100.0 * (1.0 - np.power(1.0 - isc / 100.0, _HORIZON_YEARS))
+    cheapest = 100.0 * (1.0 - np.power(1.0 - best_values[_ISC_SLICE] / 100.0, _HORIZON_YEARS))
+    excess_cost_drag = cost_drag - cheapest
+
+    return FundComparison(
+        rows=rows,
+        values=values,
+        ranks=ranks,
+        best_values=best_values,
+        best_positions=best_positions,
+        deltas=deltas,
+        cost_drag=cost_drag,
+        excess_cost_drag=excess_cost_drag,
+    )
+
+
+def comparison_summary(snapshot: FundSnapshot, comparison: FundComparison) -> Dict[str, object]:
+    """Serialize a comparison for the ``/funds/compare`` response."""
+    ids = snapshot.columns["id"][comparison.rows].tolist()
+    performance_metric = comparison.headline_metric(RENDIMENTI_COLUMNS)
+    cost_metric = comparison.headline_metric(ISC_COLUMNS)
+
+    def fund_id(metric: Optional[str]) -> Optional[str]:
+        row = comparison.best_row(metric) if metric else None
+        return None if row is None else snapshot.columns["id"][row]
+
+    ranks = _to_lists(comparison.ranks, integer=True)
+    deltas = _to_lists(comparison.deltas)
+    drag = _to_lists(comparison.cost_drag)
+    excess = _to_lists(comparison.excess_cost_drag)
+    horizons = [str(COST_HORIZONS[name]) for name in ISC_COLUMNS]
+
+    return {
+        "best_performance": fund_id(performance_metric),
+        "best_performance_metric": performance_metric,
+        "lowest_cost": fund_id(cost_metric),
+        "lowest_cost_metric": cost_metric,
+        "best": {
+            metric: {"fund_id": fund_id(metric), "value": _round(comparison.best_values[i])}
+            for i, metric in enumerate(COMPARISON_METRICS)
+        },
+        "ranking": [
+            {
+                "id": ids[i],
+                "ranks": dict(zip(COMPARISON_METRICS, ranks[i])),
+                "delta_vs_best": dict(zip(COMPARISON_METRICS, deltas[i])),
+                "cost_drag": dict(zip(horizons, drag[i])),
+                "excess_cost_drag": dict(zip(horizons, excess[i])),
+            }
+            for i in range(len(ids))
+        ],
+    }
+
+
+def _to_lists(matrix: np.ndarray, integer: bool = False) -> List[List[Optional[float]]]:
+    rounded = matrix if integer else np.round(matrix, 4)
+    return [
+        [None if math.isnan(v) else (int(v) if integer else v) for v in row]
+        for row in rounded.tolist()
+    ]
+
+
+def _round(value: float) -> Optional[float]:
+    return None if math.isnan(value) else round(float(value), 4)
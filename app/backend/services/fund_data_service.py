@@ -0,0 +1,1074 @@
+"""
+Fund data service - columnar in-memory store for the COVIP pension fund dataset.
+
+The cost (ISC) and returns CSVs published by COVIP are parsed and joined once,
+then kept as NumPy columns so route handlers can filter, gather and serialize
+funds without scanning Python dicts on every request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import base64
+import binascii
+import csv
+import hashlib
+import json
+import logging
+import mmap
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.services.fund_matching_service import MatchReport, match_names
+from backend.settings import settings
+
+if TYPE_CHECKING:  # pragma: no cover
+    from backend.services.fund_history_service import FundHistory
+
+logger = logging.getLogger(__name__)
+
+_BACKEND_DIR = Path(__file__).resolve().parents[1]
+# Repository-level data folder (app/backend -> repo root -> data/)
+DEFAULT_DATA_DIR = _BACKEND_DIR.parent.parent / "data"
+# Compiled binary snapshot, shipped inside the backend image by the build step
+DEFAULT_SNAPSHOT_PATH = _BACKEND_DIR / "data" / "funds.snapshot"
+
+COSTI_FILENAME = "FP_costi (1).csv"
+RENDIMENTI_FILENAME = "FP_data_rendimenti (1).csv"
+FONDI_INFO_FILENAME = "fondi_info.csv"
+CATEGORIA_FILENAME = "Fondi di Categoria.csv"
+# Hashed in this order into the dataset version
+SOURCE_FILENAMES = (COSTI_FILENAME, RENDIMENTI_FILENAME, FONDI_INFO_FILENAME, CATEGORIA_FILENAME)
+REQUIRED_FILENAMES = (COSTI_FILENAME, RENDIMENTI_FILENAME)
+
+SNAPSHOT_MAGIC = b"FUNDSNAP"
+SNAPSHOT_FORMAT_VERSION = 1
+_SNAPSHOT_ALIGNMENT = 8
+
+ISC_COLUMNS = ("isc2a", "isc5a", "isc10a", "isc35a")
+RENDIMENTI_COLUMNS = ("ultimoAnno", "ultimi3Anni", "ultimi5Anni", "ultimi10Anni", "ultimi20Anni")
+NUMERIC_COLUMNS = ISC_COLUMNS + RENDIMENTI_COLUMNS
+STRING_COLUMNS = ("id", "type", "pip", "societa", "linea", "categoria", "categoriaContratto", "sitoWeb")
+INDEXED_COLUMNS = ("categoria", "type", "societa", "nAlbo", "categoriaContratto")
+
+# Keys of a serialized fund, in output order; "isc" and "rendimenti" nest their columns
+RECORD_FIELDS = (
+    "id", "type", "nAlbo", "pip", "societa", "linea", "categoria", "ramo",
+    "isc", "costoAnnuo", "rendimenti", "categoriaContratto", "sitoWeb",
+)
+FIELD_ALIASES = {"name": "pip"}
+_RECORD_GROUPS = {"isc": ISC_COLUMNS, "rendimenti": RENDIMENTI_COLUMNS}
+_NULLABLE_STRINGS = ("societa", "categoriaContratto", "sitoWeb")
+
+DEFAULT_SORT = "default"
+# Sort keys accepted by /api/funds/list (frontend SortableKey names plus ISC horizons)
+SORTABLE_COLUMNS = ("pip", "linea", "categoria", "type", "societa", "nAlbo") + NUMERIC_COLUMNS
+SORT_ALIASES = {"name": "pip", "costoAnnuo": "isc5a"}
+_MAX_CACHED_ORDERINGS = 64
+
+_EMPTY_ROWS = np.empty(0, dtype=np.intp)
+_EMPTY_ROWS.flags.writeable = False
+# Per-snapshot precomputations registered by the engines built on the store
+_DERIVATIONS: Dict[str, Callable[["FundSnapshot"], Any]] = {}
+
+# Canonical dataset order (TYPE, N. ALBO), used when no sort key is requested
+TYPE_ORDER = {"FPN": 1, "FPA": 2, "PIP": 3}
+
+
+class FundDataError(RuntimeError):
+    """Raised when the fund dataset cannot be loaded."""
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded or does not apply."""
+
+
+class StaleCursorError(InvalidCursorError):
+    """Raised when a pagination cursor was issued for another dataset version."""
+
+
+class UnknownVersionError(ValueError):
+    """Raised when a dataset version is not (or no longer) known to the store."""
+
+
+class FundIndex:
+    """
+    Secondary index over one column.
+
+    Keeps a hash map from normalized value to the sorted row positions holding
+    it, plus a boolean bitmap per value so that combined filters reduce to
+    bitmap intersections. ``codes`` numbers every row's value (``-1`` when
+    not indexed) in the order of ``labels``, the first spelling of each value,
+    so per-value counts under a bitmap are one ``bincount``.
+    """
+
+    def __init__(self, values: np.ndarray):
+        self.size = len(values)
+        raw = values.tolist()
+        keys = [_index_key(value) for value in raw]
+        groups: Dict[object, List[int]] = {}
+        for row, key in enumerate(keys):
+            if key is not None:
+                groups.setdefault(key, []).append(row)
+
+        self.postings: Dict[object, np.ndarray] = {}
+        self.bitmaps: Dict[object, np.ndarray] = {}
+        self.labels: List[object] = []
+        self.codes = np.full(self.size, -1, dtype=np.intp)
+        for code, (key, rows) in enumerate(groups.items()):
+            postings = np.asarray(rows, dtype=np.intp)
+            bitmap = np.zeros(self.size, dtype=bool)
+            bitmap[postings] = True
+            postings.flags.writeable = False
+            bitmap.flags.writeable = False
+            self.postings[key] = postings
+            self.bitmaps[key] = bitmap
+            self.labels.append(raw[rows[0]])
+            self.codes[postings] = code
+        self.codes.flags.writeable = False
+
+    def values(self) -> List[object]:
+        return list(self.postings)
+
+    def key(self, value: object) -> object:
+        """Normalized key under which ``value`` is indexed."""
+        return _index_key(value)
+
+    def rows(self, value: object) -> np.ndarray:
+        return self.postings.get(_index_key(value), _EMPTY_ROWS)
+
+    def bitmap(self, values: Iterable[object]) -> np.ndarray:
+        """OR together the bitmaps of the given values."""
+        bitmaps = [self.bitmaps[key] for key in {_index_key(v) for v in values} if key in self.bitmaps]
+        if not bitmaps:
+            return np.zeros(self.size, dtype=bool)
+        if len(bitmaps) == 1:
+            return bitmaps[0]
+        return np.logical_or.reduce(bitmaps)
+
+    def counts(self, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Number of rows (within ``mask`` when given) holding each value, in ``labels`` order."""
+        codes = self.codes if mask is None else self.codes[mask]
+        return np.bincount(codes[codes >= 0], minlength=len(self.labels))
+
+
+class FundOrdering:
+    """A row permutation for one sort spec, plus each row's position in it."""
+
+    def __init__(self, key: str, permutation: np.ndarray):
+        self.key = key
+        self.permutation = permutation
+        self.positions = np.empty_like(permutation)
+        self.positions[permutation] = np.arange(permutation.size)
+        self.permutation.flags.writeable = False
+        self.positions.flags.writeable = False
+
+
+@dataclass(frozen=True)
+class RowHashes:
+    """Fund ids of a dataset version and a 64-bit content hash per row."""
+
+    version: str
+    ids: np.ndarray
+    hashes: np.ndarray
+
+    def diff(self, previous: "RowHashes") -> Tuple[np.ndarray, np.ndarray, Tuple[str, ...]]:
+        """
+        Compare with an earlier version by fund id.
+
+        Returns the inserted and updated rows of this version and the ids
+        only present in ``previous``, all in dataset order.
+        """
+        _, rows, previous_rows = np.intersect1d(self.ids, previous.ids, assume_unique=True, return_indices=True)
+        kept = np.zeros(self.ids.size, dtype=bool)
+        kept[rows] = True
+        changed = self.hashes[rows] != previous.hashes[previous_rows]
+        removed = np.ones(previous.ids.size, dtype=bool)
+        removed[previous_rows] = False
+        return np.flatnonzero(~kept), np.sort(rows[changed]), tuple(previous.ids[removed].tolist())
+
+
+class FundSnapshot:
+    """
+    Immutable, columnar view of the merged fund dataset.
+
+    Numeric metrics are float64 columns with NaN for missing values; string
+    attributes are object arrays. Rows are ordered by TYPE (FPN, FPA, PIP) and
+    N. ALBO, matching the order of ``app/frontend/data/funds.ts``.
+    """
+
+    def __init__(self, columns: Mapping[str, np.ndarray], version: str):
+        self.columns: Dict[str, np.ndarray] = dict(columns)
+        for column in self.columns.values():
+            column.flags.writeable = False
+        self.version = version
+        self.size = len(self.columns["id"])
+        self.id_index: Dict[str, int] = {fund_id: row for row, fund_id in enumerate(self.columns["id"])}
+        self.indexes: Dict[str, FundIndex] = {name: FundIndex(self.columns[name]) for name in INDEXED_COLUMNS}
+
+        # Presorted permutations: dense ranks (nulls last) per sortable column,
+        # and a stable argsort per column and direction.
+        self._ranks: Dict[str, Tuple[np.ndarray, np.ndarray]] = {
+            name: _directional_ranks(self.columns[name]) for name in SORTABLE_COLUMNS
+        }
+        self._orderings: Dict[str, FundOrdering] = {
+            DEFAULT_SORT: FundOrdering(DEFAULT_SORT, np.arange(self.size)),
+        }
+        for name, (ascending, descending) in self._ranks.items():
+            self._orderings[name] = FundOrdering(name, np.argsort(ascending, kind="stable"))
+            self._orderings[f"-{name}"] = FundOrdering(f"-{name}", np.argsort(descending, kind="stable"))
+        self._presorted = len(self._orderings)
+        self._orderings_lock = threading.Lock()
+        self._derived: Dict[str, Any] = {}
+        self._derived_lock = threading.RLock()  # derivations may depend on other derivations
+
+    def __len__(self) -> int:
+        return self.size
+
+    def row_of(self, fund_id: str) -> Optional[int]:
+        """Return the row position of a fund id, or None when unknown."""
+        return self.id_index.get(fund_id)
+
+    def rows_of(self, fund_ids: Sequence[str]) -> Tuple[np.ndarray, List[str]]:
+        """Resolve fund ids to row positions, returning (rows, missing_ids)."""
+        rows: List[int] = []
+        missing: List[str] = []
+        for fund_id in fund_ids:
+            row = self.id_index.get(fund_id)
+            if row is None:
+                missing.append(fund_id)
+            else:
+                rows.append(row)
+        return np.asarray(rows, dtype=np.intp), missing
+
+    def select(
+        self,
+        filters: Optional[Mapping[str, Iterable[object]]] = None,
+        sort: Optional[str] = None,
+    ) -> np.ndarray:
+        """
+        Return the row positions matching every filter, in ``sort`` order.
+
+        ``filters`` maps an indexed column to the accepted values: values of the
+        same column are OR-ed, different columns are intersected. Ordering is
+        served from the presorted permutations (see :meth:`ordering`).
+        """
+        ordering = self.ordering(sort)
+        active = {name: list(values) for name, values in (filters or {}).items() if values}
+        if not active:
+            return ordering.permutation
+
+        unknown = set(active) - set(self.indexes)
+        if unknown:
+            raise ValueError(f"Columns are not indexed: {', '.join(sorted(unknown))}")
+
+        if len(active) == 1 and ordering.key == DEFAULT_SORT:
+            ((name, values),) = active.items()
+            if len(values) == 1:
+                return self.indexes[name].rows(values[0])
+
+        mask = np.logical_and.reduce([self.indexes[name].bitmap(values) for name, values in active.items()])
+        if ordering.key == DEFAULT_SORT:
+            return np.flatnonzero(mask)
+        permutation = ordering.permutation
+        return permutation[mask[permutation]]
+
+    def ordering(self, sort: Optional[str] = None) -> FundOrdering:
+        """
+        Return the :class:`FundOrdering` for a sort spec.
+
+        ``sort`` is a comma-separated list of sortable columns, each optionally
+        prefixed with ``-`` for descending order (e.g. ``"isc35a,-ultimi10Anni"``).
+        Nulls sort last in both directions and ties keep the dataset order.
+        Single keys are precomputed; multi-key specs are composed from the
+        per-column ranks and cached.
+        """
+        key = normalize_sort(sort)
+        ordering = self._orderings.get(key)
+        if ordering is not None:
+            return ordering
+
+        rank_keys = []
+        for part in key.split(","):
+            ascending, descending = self._ranks[part.lstrip("-")]
+            rank_keys.append(descending if part.startswith("-") else ascending)
+        # np.lexsort sorts by the last key first and is stable
+        ordering = FundOrdering(key, np.lexsort(rank_keys[::-1]))
+
+        with self._orderings_lock:
+            if len(self._orderings) >= self._presorted + _MAX_CACHED_ORDERINGS:
+                for cached in [k for k in self._orderings if "," in k]:
+                    del self._orderings[cached]
+            self._orderings[key] = ordering
+        return ordering
+
+    def derived(self, name: str) -> Any:
+        """Return a registered per-snapshot precomputation, building it once."""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        builder = _DERIVATIONS.get(name)
+        if builder is None:
+            raise KeyError(f"Unknown fund snapshot derivation: {name}")
+        with self._derived_lock:
+            if name not in self._derived:
+                self._derived[name] = builder(self)
+            return self._derived[name]
+
+    def warm(self) -> "FundSnapshot":
+        """Build every registered derivation up front (done at dataset load)."""
+        for name in list(_DERIVATIONS):
+            self.derived(name)
+        return self
+
+    def paginate(
+        self,
+        rows: np.ndarray,
+        limit: int,
+        cursor: Optional[str] = None,
+        sort: Optional[str] = None,
+    ) -> Tuple[np.ndarray, Optional[str]]:
+        """
+        Keyset pagination over ``rows``, which must already be in ``sort`` order.
+
+        The cursor stores the dataset version, the sort key and the id of the
+        last fund served; the next page is located with a binary search on the
+        sort positions, so deep pages cost the same as the first one.
+
+        Returns the page rows and the cursor for the following page (None on
+        the last page).
+        """
+        sort = normalize_sort(sort)
+        start = 0
+        if cursor:
+            payload = decode_cursor(cursor)
+            if payload["v"] != self.version:
+                raise StaleCursorError("Cursor was issued for a different fund dataset version")
+            if payload["s"] != sort:
+                raise InvalidCursorError("Cursor was issued for a different sort order")
+            last_row = self.id_index.get(payload["k"])
+            if last_row is None:
+                raise InvalidCursorError("Cursor refers to an unknown fund")
+            positions = self._sort_positions(sort)
+            start = int(np.searchsorted(positions[rows], positions[last_row], side="right"))
+
+        page = rows[start:start + limit]
+        next_cursor = None
+        if page.size and start + limit < rows.size:
+            next_cursor = encode_cursor(self.version, sort, self.columns["id"][page[-1]])
+        return page, next_cursor
+
+    def _sort_positions(self, sort: str) -> np.ndarray:
+        """Return, for every row, its position in the given sort order."""
+        try:
+            return self.ordering(sort).positions
+        except ValueError as exc:
+            raise InvalidCursorError(str(exc)) from exc
+
+    def to_records(self, rows: Iterable[int], fields: Optional[Iterable[str]] = None) -> List[Dict[str, object]]:
+        """
+        Serialize the given rows to the frontend ``PensionFund`` shape.
+
+        ``fields`` (see :func:`parse_fields`) restricts the output to those
+        keys; only the requested columns are gathered and converted.
+        """
+        rows = np.asarray(rows, dtype=np.intp)
+        if rows.size == 0:
+            return []
+        wanted = None if fields is None else set(fields)
+
+        keys: List[str] = []
+        values: List[List[object]] = []
+        for key in RECORD_FIELDS:
+            if key in _RECORD_GROUPS:
+                members = [m for m in _RECORD_GROUPS[key] if wanted is None or key in wanted or m in wanted]
+                if not members:
+                    continue
+                numbers = [_nan_to_none(self.columns[m][rows]) for m in members]
+                column = [dict(zip(members, group)) for group in zip(*numbers)]
+            elif wanted is not None and key not in wanted:
+                continue
+            elif key == "ramo":
+                column = [None] * rows.size
+            elif key == "costoAnnuo":
+                column = _nan_to_none(self.columns["isc5a"][rows])
+            elif key in _NULLABLE_STRINGS:
+                column = [value or None for value in self.columns[key][rows].tolist()]
+            else:
+                column = self.columns[key][rows].tolist()
+            keys.append(key)
+            values.append(column)
+        return [dict(zip(keys, record)) for record in zip(*values)]
+
+    def to_record(self, row: int, fields: Optional[Iterable[str]] = None) -> Dict[str, object]:
+        return self.to_records([row], fields=fields)[0]
+
+
+class FundStore:
+    """
+    Holds the current :class:`FundSnapshot` and swaps in new versions.
+
+    Reads are lock-free: callers take the ``snapshot`` reference once and keep
+    serving from it, so in-flight requests finish on the version they started
+    with while a reload parses the new CSVs and replaces the reference.
+    """
+
+    def __init__(
+        self,
+        data_dir: Optional[Path] = None,
+        snapshot_path: Optional[Path] = None,
+        history_path: Optional[Path] = None,
+    ):
+        self._data_dir = Path(data_dir) if data_dir else None
+        self._snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._history_path = Path(history_path) if history_path else None
+        self._history: Optional["FundHistory"] = None
+        self._snapshot: Optional[FundSnapshot] = None
+        self._fingerprint: Optional[Tuple[Tuple[str, int, int], ...]] = None
+        self._rejected_fingerprint: Optional[Tuple[Tuple[str, int, int], ...]] = None
+        # Row hashes of the last versions served, oldest first (see row_hashes)
+        self._recent_hashes: "OrderedDict[str, RowHashes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.loaded_at: Optional[float] = None
+
+    @property
+    def data_dir(self) -> Path:
+        if self._data_dir is not None:
+            return self._data_dir
+        configured = getattr(settings, "funds_data_dir", None)
+        return Path(configured) if configured else DEFAULT_DATA_DIR
+
+    @property
+    def snapshot_path(self) -> Path:
+        if self._snapshot_path is not None:
+            return self._snapshot_path
+        configured = getattr(settings, "funds_snapshot_path", None)
+        return Path(configured) if configured else DEFAULT_SNAPSHOT_PATH
+
+    @property
+    def history_path(self) -> Path:
+        if self._history_path is not None:
+            return self._history_path
+        return default_history_path(self.snapshot_path)
+
+    @property
+    def history(self) -> "FundHistory":
+        """Every dataset version this store served, stored as deltas on disk."""
+        if self._history is None:
+            # Imported here: the history service builds on this module
+            from backend.services.fund_history_service import FundHistory
+
+            self._history = FundHistory(
+                self.history_path, cache_size=int(getattr(settings, "funds_history_cache_size", 4))
+            )
+        return self._history
+
+    @property
+    def version(self) -> Optional[str]:
+        """Version of the current snapshot, without triggering a load."""
+        snapshot = self._snapshot
+        return snapshot.version if snapshot is not None else None
+
+    @property
+    def history_size(self) -> int:
+        return max(1, int(getattr(settings, "funds_history_size", 10)))
+
+    def row_hashes(self, version: str) -> Optional[RowHashes]:
+        """Row hashes of one of the last ``history_size`` versions, or None."""
+        return self._recent_hashes.get(version)
+
+    @property
+    def snapshot(self) -> FundSnapshot:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._set(*self._read())
+                snapshot = self._snapshot
+        return snapshot
+
+    def snapshot_at(self, version: str) -> FundSnapshot:
+        """
+        The snapshot of a past dataset version, rebuilt from the history.
+
+        Raises :class:`UnknownVersionError` when the version was never recorded.
+        """
+        current = self.snapshot
+        if version == current.version:
+            return current
+        return self.history.snapshot(version)
+
+    def load(self) -> FundSnapshot:
+        """Read the dataset from disk and make it the current snapshot."""
+        with self._lock:
+            snapshot, fingerprint = self._read()
+            self._set(snapshot.warm(), fingerprint)
+        logger.info("Loaded fund dataset %s with %d funds", snapshot.version, snapshot.size)
+        return snapshot
+
+    def _read(self) -> Tuple[FundSnapshot, Optional[Tuple[Tuple[str, int, int], ...]]]:
+        """
+        Map the compiled snapshot when one exists, else parse the CSVs.
+
+        A mapped snapshot leaves the fingerprint unset: the first poll then
+        compares its version with the CSVs' content hash, so a snapshot that
+        is older than ``data_dir`` gets replaced.
+        """
+        if self.snapshot_path.exists():
+            snapshot = open_snapshot_file(self.snapshot_path)
+            logger.info("Mapped fund snapshot %s from %s", snapshot.version, self.snapshot_path)
+            return snapshot, None
+        fingerprint = source_fingerprint(self.data_dir)
+        return load_snapshot(self.data_dir), fingerprint
+
+    def reload_if_changed(self) -> Optional[FundSnapshot]:
+        """
+        Reload when the source files changed on disk since the last load.
+
+        Returns the new snapshot, or None when nothing changed (same file
+        stats, or same content hash). Files that failed to parse are not
+        retried until they change again.
+        """
+        with self._lock:
+            fingerprint = source_fingerprint(self.data_dir)
+            if fingerprint in (self._fingerprint, self._rejected_fingerprint):
+                return None
+            present = {name for name, _, _ in fingerprint}
+            if not present.issuperset(REQUIRED_FILENAMES):
+                # No CSVs to watch (e.g. an image shipping only the compiled snapshot)
+                self._fingerprint = fingerprint
+                return None
+            current = self._snapshot
+            try:
+                sources = read_sources(self.data_dir)
+                if current is not None and sources_version(sources) == current.version:
+                    self._fingerprint = fingerprint
+                    return None
+                snapshot = snapshot_from_sources(sources)
+            except Exception:
+                self._rejected_fingerprint = fingerprint
+                raise
+            self._set(snapshot.warm(), fingerprint)
+        logger.info(
+            "Reloaded fund dataset %s -> %s (%d funds)",
+            current.version if current is not None else None, snapshot.version, snapshot.size,
+        )
+        return snapshot
+
+    def install(self, files: Mapping[str, bytes]) -> FundSnapshot:
+        """
+        Validate uploaded source files, persist them to ``data_dir`` and swap.
+
+        Files not included in the upload are taken from ``data_dir``. Nothing
+        is written unless the merged sources parse into a valid snapshot.
+        """
+        unknown = sorted(set(files) - set(SOURCE_FILENAMES))
+        if unknown:
+            raise FundDataError(f"Unexpected fund data files: {', '.join(unknown)}")
+
+        with self._lock:
+            sources = read_sources(self.data_dir, required=False)
+            sources.update(files)
+            snapshot = snapshot_from_sources(sources).warm()
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            for name, content in files.items():
+                target = self.data_dir / name
+                staging = target.with_name(f".{name}.upload")
+                staging.write_bytes(content)
+                os.replace(staging, target)
+            self._set(snapshot, source_fingerprint(self.data_dir))
+        logger.info("Installed uploaded fund dataset %s with %d funds", snapshot.version, snapshot.size)
+        return snapshot
+
+    async def watch(self, interval: float) -> None:
+        """Poll ``data_dir`` every ``interval`` seconds, reloading off the event loop."""
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await asyncio.to_thread(self.reload_if_changed)
+            except Exception:
+                logger.exception("Fund dataset reload failed; keeping version %s", self.version)
+
+    def _set(self, snapshot: FundSnapshot, fingerprint: Tuple[Tuple[str, int, int], ...]) -> None:
+        # A single reference assignment: readers see either version, never a mix
+        self._snapshot = snapshot
+        self._fingerprint = fingerprint
+        self.loaded_at = time.time()
+        self._recent_hashes[snapshot.version] = snapshot.derived("row_hashes")
+        self._recent_hashes.move_to_end(snapshot.version)
+        while len(self._recent_hashes) > self.history_size:
+            self._recent_hashes.popitem(last=False)
+        # The snapshot is live already: a history that cannot be written or
+        # read (corrupt entry, broken chain) only costs this version's entry
+        try:
+            self.history.record(snapshot)
+        except (OSError, FundDataError) as exc:
+            logger.warning("Could not record fund dataset %s in %s: %s", snapshot.version, self.history_path, exc)
+
+
+_STORE = FundStore()
+
+
+def default_history_path(snapshot_path: Path) -> Path:
+    """``funds_history_path`` when configured, else ``<snapshot_path>.history``."""
+    configured = getattr(settings, "funds_history_path", None)
+    if configured:
+        return Path(configured)
+    return snapshot_path.with_name(f"{snapshot_path.name}.history")
+
+
+def get_fund_store() -> FundStore:
+    """Return the process-wide fund store."""
+    return _STORE
+
+
+def register_derivation(name: str, builder: Callable[[FundSnapshot], Any]) -> None:
+    """
+    Register a precomputation derived from a snapshot.
+
+    Builders run once per snapshot (eagerly when the store loads a dataset,
+    lazily otherwise) and their result is shared by every request served
+    from that snapshot.
+    """
+    _DERIVATIONS[name] = builder
+
+
+def build_row_hashes(snapshot: FundSnapshot) -> RowHashes:
+    """Hash the serialized record of every row, to diff versions by fund id."""
+    hashes = np.fromiter(
+        (
+            int.from_bytes(
+                hashlib.blake2b(
+                    json.dumps(record, sort_keys=True, separators=(",", ":")).encode("utf-8"), digest_size=8
+                ).digest(),
+                "little",
+            )
+            for record in snapshot.to_records(range(snapshot.size))
+        ),
+        dtype=np.uint64,
+        count=snapshot.size,
+    )
+    hashes.flags.writeable = False
+    return RowHashes(version=snapshot.version, ids=snapshot.columns["id"], hashes=hashes)
+
+
+register_derivation("row_hashes", build_row_hashes)
+
+
+def parse_fields(spec: Optional[str], extra: Iterable[str] = ()) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a ``fields=`` projection (comma-separated) into record keys.
+
+    Accepts :data:`RECORD_FIELDS`, single ISC/rendimenti columns (kept nested
+    under their group), :data:`FIELD_ALIASES` and the endpoint-specific
+    ``extra`` names. ``id`` is always included. Returns None (full records)
+    for an empty spec; raises ValueError for unknown fields.
+    """
+    names = [name.strip() for name in (spec or "").split(",") if name.strip()]
+    if not names:
+        return None
+    allowed = set(RECORD_FIELDS) | set(NUMERIC_COLUMNS) | set(extra)
+    fields = {FIELD_ALIASES.get(name, name) for name in names}
+    unknown = sorted(fields - allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    fields.add("id")
+    return tuple(sorted(fields))
+
+
+def normalize_sort(sort: Optional[str]) -> str:
+    """Validate a sort spec and return its canonical form (aliases resolved)."""
+    if not sort or sort == DEFAULT_SORT:
+        return DEFAULT_SORT
+    parts: List[str] = []
+    for raw in sort.split(","):
+        raw = raw.strip()
+        descending = raw.startswith("-")
+        name = raw.lstrip("+-").strip()
+        name = SORT_ALIASES.get(name, name)
+        if name not in SORTABLE_COLUMNS:
+            raise ValueError(f"Unsupported sort key: {raw or sort}")
+        part = f"-{name}" if descending else name
+        if part not in parts:
+            parts.append(part)
+    return ",".join(parts)
+
+
+def encode_cursor(version: str, sort: str, last_id: str) -> str:
+    """Build an opaque, dataset-version-stamped pagination cursor."""
+    payload = json.dumps({"v": version, "s": sort, "k": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Dict[str, str]:
+    """Decode a cursor produced by :func:`encode_cursor`."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, ValueError) as exc:
+        raise InvalidCursorError("Malformed cursor") from exc
+    if not isinstance(payload, dict) or not all(isinstance(payload.get(k), str) for k in ("v", "s", "k")):
+        raise InvalidCursorError("Malformed cursor")
+    return payload
+
+
+def load_snapshot(data_dir: Path) -> FundSnapshot:
+    """Parse and join the CSVs in ``data_dir`` into a :class:`FundSnapshot`."""
+    return snapshot_from_sources(read_sources(data_dir))
+
+
+def read_sources(data_dir: Path, required: bool = True) -> Dict[str, bytes]:
+    """Read the raw source files present in ``data_dir``."""
+    data_dir = Path(data_dir)
+    if required:
+        for name in REQUIRED_FILENAMES:
+            if not (data_dir / name).exists():
+                raise FundDataError(f"Fund data file not found: {data_dir / name}")
+    return {name: (data_dir / name).read_bytes() for name in SOURCE_FILENAMES if (data_dir / name).exists()}
+
+
+def source_fingerprint(data_dir: Path) -> Tuple[Tuple[str, int, int], ...]:
+    """Cheap change detector: (name, mtime_ns, size) of every present source file."""
+    fingerprint = []
+    for name in SOURCE_FILENAMES:
+        try:
+            stat = (Path(data_dir) / name).stat()
+        except FileNotFoundError:
+            continue
+        fingerprint.append((name, stat.st_mtime_ns, stat.st_size))
+    return tuple(fingerprint)
+
+
+def snapshot_from_sources(sources: Mapping[str, bytes]) -> FundSnapshot:
+    """Build a snapshot from raw source files keyed by filename."""
+    for name in REQUIRED_FILENAMES:
+        if name not in sources:
+            raise FundDataError(f"Fund data file not found: {name}")
+
+    parsed: Dict[str, object] = {}
+    for name in SOURCE_FILENAMES:
+        if name not in sources:
+            continue
+        try:
+            content = sources[name].decode("utf-8-sig")
+        except UnicodeDecodeError as exc:
+            raise FundDataError(f"{name} is not valid UTF-8: {exc}") from exc
+        parsed[name] = parse_source(name, content.splitlines())
+
+    rows, _ = merge_sources(parsed)
+    if not rows:
+        raise FundDataError("Fund data files contain no fund rows")
+    return build_snapshot(rows, version=sources_version(sources))
+
+
+def iter_csv_rows(lines: Iterable[str]) -> Iterator[List[str]]:
+    """
+    Stream a COVIP CSV (semicolon or comma separated), dropping the header.
+
+    The delimiter is detected on the header line; rows whose width differs
+    from the header are skipped.
+    """
+    lines = (line for line in lines if line.strip())
+    first = next(lines, None)
+    if first is None:
+        return
+    delimiter = ";" if first.count(";") > first.count(",") else ","
+    width = len(next(csv.reader([first], delimiter=delimiter)))
+    for row in csv.reader(lines, delimiter=delimiter):
+        if len(row) == width:
+            yield row
+
+
+def parse_source(name: str, lines: Iterable[str]) -> object:
+    """
+    Parse one source file into the JSON-friendly shape :func:`merge_sources` joins.
+
+    Costs and returns are lists of rows; ``fondi_info.csv`` becomes a
+    ``TYPE|N. ALBO`` -> website mapping and ``Fondi di Categoria.csv`` a list
+    of ``[fondo, contract category, website]`` entries.
+    """
+    if name == FONDI_INFO_FILENAME:
+        return {f"{row[0].strip()}|{row[1].strip()}": row[3].strip() for row in iter_csv_rows(lines) if len(row) >= 4}
+    if name == CATEGORIA_FILENAME:
+        return [
+            [row[0].strip(), row[1].strip(), row[2].strip() if len(row) > 2 else ""]
+            for row in iter_csv_rows(lines)
+            if len(row) >= 2 and row[0].strip()
+        ]
+    if name in (COSTI_FILENAME, RENDIMENTI_FILENAME):
+        return list(iter_csv_rows(lines))
+    raise FundDataError(f"Unexpected fund data file: {name}")
+
+
+def merge_sources(parsed: Mapping[str, object]) -> Tuple[List[Dict[str, object]], MatchReport]:
+    """
+    Join parsed sources (see :func:`parse_source`) into ordered fund rows.
+
+    Also returns how FPN fondo names were matched to ``Fondi di Categoria.csv``.
+    """
+    if FONDI_INFO_FILENAME not in parsed:
+        logger.warning("%s not found, skipping website data", FONDI_INFO_FILENAME)
+    if CATEGORIA_FILENAME not in parsed:
+        logger.warning("%s not found, skipping contract category data", CATEGORIA_FILENAME)
+    rows, report = _merge_rows(
+        costi=parsed[COSTI_FILENAME],
+        rendimenti=parsed[RENDIMENTI_FILENAME],
+        websites=parsed.get(FONDI_INFO_FILENAME, {}),
+        contract_categories=parsed.get(CATEGORIA_FILENAME, []),
+    )
+    if report.unmatched:
+        logger.info("FPN funds without a %s entry: %s", CATEGORIA_FILENAME, ", ".join(report.unmatched))
+    return rows, report
+
+
+def sources_version(sources: Mapping[str, bytes]) -> str:
+    """Dataset version: content hash of the source files, without parsing them."""
+    digest = hashlib.sha256()
+    for name in SOURCE_FILENAMES:
+        if name in sources:
+            digest.update(name.encode("utf-8"))
+            digest.update(sources[name])
+    return digest.hexdigest()[:16]
+
+
+def write_snapshot_file(snapshot: FundSnapshot, path: Path) -> Path:
+    """
+    Compile a snapshot into the binary format read by :func:`open_snapshot_file`.
+
+    Layout: ``FUNDSNAP`` magic, little-endian uint64 header length, a JSON
+    header, then 8-byte aligned sections - one fixed-width little-endian array
+    per numeric column, one int32 code array per string column, and a shared
+    string table (uint32 offsets + UTF-8 bytes). The file is written next to
+    ``path`` and renamed into place.
+    """
+    path = Path(path)
+    table: Dict[str, int] = {}
+    columns: Dict[str, Dict[str, object]] = {}
+    payloads: List[bytes] = []
+    # Header entry and key receiving the file offset of each payload
+    targets: List[Tuple[Dict[str, object], str]] = []
+
+    for name, values in snapshot.columns.items():
+        if values.dtype == object:
+            codes = np.array([table.setdefault(str(v), len(table)) for v in values.tolist()], dtype="<i4")
+            columns[name] = {"dtype": "str", "count": int(codes.size)}
+            payloads.append(codes.tobytes())
+        else:
+            data = values.astype(values.dtype.newbyteorder("<"), copy=False)
+            columns[name] = {"dtype": data.dtype.str, "count": int(data.size)}
+            payloads.append(data.tobytes())
+        targets.append((columns[name], "offset"))
+
+    encoded = [text.encode("utf-8") for text in table]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u4")
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    strings: Dict[str, object] = {"count": len(encoded), "length": int(offsets[-1])}
+    payloads += [offsets.tobytes(), b"".join(encoded)]
+    targets += [(strings, "offsets"), (strings, "data")]
+
+    header = {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "version": snapshot.version,
+        "size": snapshot.size,
+        "columns": columns,
+        "strings": strings,
+    }
+    # Payload offsets depend on the header length, which depends on the offsets
+    header_bytes = b""
+    while True:
+        position = _align(len(SNAPSHOT_MAGIC) + 8 + len(header_bytes))
+        for (entry, key), payload in zip(targets, payloads):
+            entry[key] = position
+            position = _align(position + len(payload))
+        encoded_header = json.dumps(header, sort_keys=True).encode("utf-8")
+        settled = len(encoded_header) == len(header_bytes)
+        header_bytes = encoded_header
+        if settled:
+            break
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = path.with_name(f".{path.name}.tmp")
+    with open(staging, "wb") as fh:
+        fh.write(SNAPSHOT_MAGIC)
+        fh.write(len(header_bytes).to_bytes(8, "little"))
+        fh.write(header_bytes)
+        for (entry, key), payload in zip(targets, payloads):
+            fh.write(b"\0" * (entry[key] - fh.tell()))
+            fh.write(payload)
+    os.replace(staging, path)
+    return path
+
+
+def open_snapshot_file(path: Path) -> FundSnapshot:
+    """
+    Memory-map a compiled snapshot.
+
+    Numeric columns are zero-copy read-only views of the mapping, so every
+    worker process mapping the same file shares its pages; only the string
+    table is decoded.
+    """
+    path = Path(path)
+    try:
+        with open(path, "rb") as fh:
+            buffer = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as exc:
+        raise FundDataError(f"Cannot map fund snapshot {path}: {exc}") from exc
+
+    try:
+        if buffer[: len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            raise FundDataError(f"{path} is not a fund snapshot file")
+        start = len(SNAPSHOT_MAGIC)
+        header_length = int.from_bytes(buffer[start:start + 8], "little")
+        header = json.loads(buffer[start + 8:start + 8 + header_length])
+        if header.get("format") != SNAPSHOT_FORMAT_VERSION:
+            raise FundDataError(f"Unsupported fund snapshot format {header.get('format')} in {path}")
+
+        strings = header["strings"]
+        offsets = np.frombuffer(buffer, dtype="<u4", count=strings["count"] + 1, offset=strings["offsets"])
+        data = buffer[strings["data"]:strings["data"] + strings["length"]]
+        table = np.array(
+            [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(strings["count"])],
+            dtype=object,
+        )
+
+        columns: Dict[str, np.ndarray] = {}
+        for name, spec in header["columns"].items():
+            if spec["dtype"] == "str":
+                codes = np.frombuffer(buffer, dtype="<i4", count=spec["count"], offset=spec["offset"])
+                columns[name] = table[codes]
+            else:
+                columns[name] = np.frombuffer(buffer, dtype=spec["dtype"], count=spec["count"], offset=spec["offset"])
+    except (KeyError, TypeError, ValueError) as exc:
+        raise FundDataError(f"Corrupt fund snapshot {path}: {exc}") from exc
+
+    missing = [name for name in ("id",) + STRING_COLUMNS + ("nAlbo",) + NUMERIC_COLUMNS if name not in columns]
+    if missing:
+        raise FundDataError(f"Fund snapshot {path} lacks columns: {', '.join(sorted(set(missing)))}")
+    return FundSnapshot(columns, version=header["version"])
+
+
+def _align(position: int) -> int:
+    return -(-position // _SNAPSHOT_ALIGNMENT) * _SNAPSHOT_ALIGNMENT
+
+
+def build_snapshot(rows: Sequence[Mapping[str, object]], version: str) -> FundSnapshot:
+    """Build a snapshot from merged row dicts (already ordered, without ids)."""
+    columns: Dict[str, np.ndarray] = {}
+    columns["id"] = np.array(_generate_ids(rows), dtype=object)
+    for name in STRING_COLUMNS[1:]:
+        columns[name] = np.array([str(row.get(name) or "") for row in rows], dtype=object)
+    columns["nAlbo"] = np.array([int(row["nAlbo"]) for row in rows], dtype=np.int32)
+    for name in NUMERIC_COLUMNS:
+        columns[name] = np.array([_parse_decimal(row.get(name)) for row in rows], dtype=np.float64)
+    return FundSnapshot(columns, version=version)
+
+
+def _merge_rows(
+    costi: List[List[str]],
+    rendimenti: List[List[str]],
+    websites: Mapping[str, str],
+    contract_categories: Sequence[Sequence[str]],
+) -> Tuple[List[Dict[str, object]], MatchReport]:
+    # Join on TYPE;N. ALBO;FONDO;SOCIETA;COMPARTO. CATEGORIA can differ between
+    # the two files, the returns file is authoritative.
+    costi_by_key = {tuple(row[:5]): row for row in costi}
+    joined = [(rend, costi_by_key[tuple(rend[:5])]) for rend in rendimenti if tuple(rend[:5]) in costi_by_key]
+
+    # Contract categories exist for FPN funds only, matched by fondo name
+    report = match_names(
+        (rend[2].strip() for rend, _ in joined if rend[0].strip() == "FPN"),
+        [entry[0] for entry in contract_categories],
+    )
+
+    merged: Dict[Tuple[str, ...], Dict[str, object]] = {}
+    for rend, cost in joined:
+        fund_type, n_albo, fondo, societa, comparto, categoria = (v.strip() for v in rend[:6])
+        match = report.get(fondo) if fund_type == "FPN" else None
+        entry = contract_categories[match.target] if match else ("", "", "")
+        row: Dict[str, object] = {
+            "type": fund_type,
+            "nAlbo": n_albo,
+            "pip": fondo,
+            "societa": societa,
+            "linea": comparto,
+            "categoria": categoria,
+            "sitoWeb": websites.get(f"{fund_type}|{n_albo}") or entry[2],
+            "categoriaContratto": entry[1],
+        }
+        row.update(zip(RENDIMENTI_COLUMNS, rend[6:11]))
+        row.update(zip(ISC_COLUMNS, cost[6:10]))
+        merged[tuple(rend[:5])] = row
+
+    ordered = list(merged.values())
+    ordered.sort(key=lambda r: (TYPE_ORDER.get(str(r["type"]), 999), int(r["nAlbo"])))
+    return ordered, report
+
+
+def _generate_ids(rows: Sequence[Mapping[str, object]]) -> List[str]:
+    """Mirror ``generateId`` in funds.ts so ids stay stable across front and back end."""
+    seen: Dict[str, int] = {}
+    ids: List[str] = []
+    for row in rows:
+        comparto = re.sub(r"[^a-z0-9]+", "-", str(row.get("linea") or "").lower()).strip("-")
+        base = f"{row['nAlbo']}-{comparto}"
+        count = seen.get(base, 0) + 1
+        seen[base] = count
+        ids.append(base if count == 1 else f"{base}-{count}")
+    return ids
+
+
+def _parse_decimal(value: object) -> float:
+    text = str(value or "").strip().replace(",", ".")
+    if not text:
+        return np.nan
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
+
+
+def _directional_ranks(values: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dense ranks of a column for ascending and descending order, nulls last.
+
+    Numbers use NaN as null; strings compare case-insensitively with the empty
+    string as null.
+    """
+    if values.dtype == object:
+        keys = np.array([str(v).casefold() for v in values.tolist()], dtype=object)
+        valid = keys != ""
+    else:
+        keys = values
+        valid = ~np.isnan(values) if values.dtype.kind == "f" else np.ones(values.size, dtype=bool)
+
+    ascending = np.empty(values.size, dtype=np.int64)
+    descending = np.empty(values.size, dtype=np.int64)
+    uniques, inverse = np.unique(keys[valid], return_inverse=True)
+    ascending[valid] = inverse
+    descending[valid] = uniques.size - 1 - inverse
+    ascending[~valid] = uniques.size
+    descending[~valid] = uniques.size
+    return ascending, descending
+
+
+def _index_key(value: object) -> object:
+    """Normalize a value for index lookups (case-insensitive strings, integer N. ALBO)."""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    text = str(value).strip().upper()
+    if not text:
+        return None
+    return int(text) if text.isdigit() else text
+
+
+def _nan_to_none(values: np.ndarray) -> List[Optional[float]]:
+    return [None if v != v else v for v in values.tolist()]
@@ -0,0 +1,154 @@
+"""
+Fund export service - the whole snapshot as CSV, Arrow IPC or Parquet.
+
+Exports are flat tables (one column per ISC horizon and return window) built
+straight from the snapshot columns. Arrow arrays wrap the NumPy buffers
+without copying them (only the validity bitmaps of nullable columns are
+built), and the encoded Arrow and Parquet payloads are cached per snapshot,
+so repeated downloads of the same dataset version are served from memory.
+CSV is encoded in chunks as it is streamed. pyarrow is optional: without it
+only CSV is available.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import logging
+from dataclasses import dataclass
+from typing import Iterator
+
+import numpy as np
+
+from backend.services.fund_data_service import NUMERIC_COLUMNS, FundSnapshot, register_derivation
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except Exception:  # pragma: no cover - optional dependency
+    pa = None  # type: ignore
+    pq = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+EXPORT_COLUMNS = (
+    "id", "type", "nAlbo", "pip", "societa", "linea", "categoria", "categoriaContratto", "sitoWeb",
+) + NUMERIC_COLUMNS
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Rows per CSV chunk / Arrow record batch, bytes per streamed chunk of a cached payload
+_BATCH_ROWS = 256
+_STREAM_CHUNK = 64 * 1024
+
+
+class ExportUnavailableError(RuntimeError):
+    """The requested export format needs an optional dependency that is missing."""
+
+
+@dataclass(frozen=True)
+class FundExport:
+    media_type: str
+    filename: str
+    chunks: Iterator[bytes]
+
+
+def build_arrow_table(snapshot: FundSnapshot) -> "pa.Table":
+    """Arrow view of the snapshot; numeric columns share the NumPy buffers."""
+    _require_arrow("arrow")
+    arrays = []
+    for name in EXPORT_COLUMNS:
+        values = snapshot.columns[name]
+        if values.dtype == object:
+            arrays.append(pa.array([v or None for v in values.tolist()], type=pa.string()))
+        elif values.dtype.kind == "f":
+            valid = ~np.isnan(values)
+            validity = pa.py_buffer(np.packbits(valid, bitorder="little"))
+            data = np.ascontiguousarray(values, dtype="<f8")
+            arrays.append(pa.Array.from_buffers(
+                pa.float64(), values.size, [validity, pa.py_buffer(data)], null_count=int(values.size - valid.sum()),
+            ))
+        else:
+            data = np.ascontiguousarray(values, dtype="<i4")
+            arrays.append(pa.Array.from_buffers(pa.int32(), values.size, [None, pa.py_buffer(data)]))
+    schema = pa.schema(
+        [pa.field(name, array.type) for name, array in zip(EXPORT_COLUMNS, arrays)],
+        metadata={"dataset_version": snapshot.version},
+    )
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def _build_arrow_payload(snapshot: FundSnapshot) -> "pa.Buffer":
+    table = snapshot.derived("export_arrow_table")
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        for batch in table.to_batches(max_chunksize=_BATCH_ROWS):
+            writer.write_batch(batch)
+    return sink.getvalue()
+
+
+def _build_parquet_payload(snapshot: FundSnapshot) -> "pa.Buffer":
+    table = snapshot.derived("export_arrow_table")
+    sink = pa.BufferOutputStream()
+    pq.write_table(table, sink, compression="zstd")
+    return sink.getvalue()
+
+
+# Only when pyarrow is installed: warm() builds every registered derivation
+if pa is not None:
+    register_derivation("export_arrow_table", build_arrow_table)
+    register_derivation("export_arrow", _build_arrow_payload)
+    register_derivation("export_parquet", _build_parquet_payload)
+
+
+def iter_csv(snapshot: FundSnapshot, batch_rows: int = _BATCH_ROWS) -> Iterator[bytes]:
+    """CSV export encoded ``batch_rows`` rows at a time; nulls are empty cells."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(EXPORT_COLUMNS)
+    for start in range(0, snapshot.size, batch_rows):
+        rows = slice(start, start + batch_rows)
+        columns = []
+        for name in EXPORT_COLUMNS:
+            values = snapshot.columns[name][rows]
+            if values.dtype.kind == "f":
+                columns.append(["" if v != v else repr(v) for v in values.tolist()])
+            else:
+                columns.append(values.tolist())
+        writer.writerows(zip(*columns))
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def export_funds(snapshot: FundSnapshot, fmt: str) -> FundExport:
+    """
+    Export of the snapshot in ``fmt`` (csv, arrow or parquet).
+
+    Raises ValueError for unknown formats and :class:`ExportUnavailableError`
+    when pyarrow is needed but not installed.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}. Use one of {', '.join(EXPORT_FORMATS)}")
+    media_type, extension = EXPORT_FORMATS[fmt]
+    filename = f"funds-{snapshot.version}.{extension}"
+    if fmt == "csv":
+        return FundExport(media_type=media_type, filename=filename, chunks=iter_csv(snapshot))
+
+    _require_arrow(fmt)
+    payload = snapshot.derived(f"export_{fmt}")
+    return FundExport(media_type=media_type, filename=filename, chunks=_iter_buffer(memoryview(payload)))
+
+
+def _iter_buffer(view: memoryview) -> Iterator[bytes]:
+    for start in range(0, len(view), _STREAM_CHUNK):
+        yield bytes(view[start:start + _STREAM_CHUNK])
+
+
+def _require_arrow(fmt: str) -> None:
+    if pa is None:
+        raise ExportUnavailableError(f"The {fmt} export requires pyarrow, which is not installed")
@@ -0,0 +1,71 @@
+"""
+Fund facet service - filter options with live counts.
+
+Facet values come from the secondary indexes of the snapshot. Counts for the
+current selection are bitmap intersections: each facet is counted under the
+filters of every *other* facet, so the values of a facet that is already
+filtered stay selectable ("AZN (37) given type=FPA").
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Dict, List, Mapping, Optional
+
+import numpy as np
+
+from backend.services.fund_data_service import TYPE_ORDER, FundSnapshot
+
+logger = logging.getLogger(__name__)
+
+# Response key -> indexed column
+FACETS = {
+    "categories": "categoria",
+    "types": "type",
+    "companies": "societa",
+    "contract_categories": "categoriaContratto",
+}
+
+def facet_counts(
+    snapshot: FundSnapshot,
+    filters: Optional[Mapping[str, Optional[List[object]]]] = None,
+) -> Dict[str, object]:
+    """
+    Values and counts of every facet under ``filters`` (indexed column ->
+    accepted values, as for :meth:`FundSnapshot.select`).
+
+    Raises ValueError for filters on columns that are not indexed.
+    """
+    active = {name: list(values) for name, values in (filters or {}).items() if values}
+    unknown = set(active) - set(snapshot.indexes)
+    if unknown:
+        raise ValueError(f"Columns are not indexed: {', '.join(sorted(unknown))}")
+
+    masks = {name: snapshot.indexes[name].bitmap(values) for name, values in active.items()}
+    everything = np.ones(snapshot.size, dtype=bool)
+
+    facets: Dict[str, object] = {}
+    for key, column in FACETS.items():
+        others = [mask for name, mask in masks.items() if name != column]
+        mask = np.logical_and.reduce(others) if others else everything
+        index = snapshot.indexes[column]
+        counts = index.counts(mask)
+        selected = {index.key(v) for v in active.get(column, ())}
+        facets[key] = _facet_values(column, index.labels, counts, [index.key(label) in selected for label in index.labels])
+
+    matching = np.logical_and.reduce(list(masks.values())) if masks else everything
+    facets["total"] = int(matching.sum())
+    return facets
+
+
+def _facet_values(column: str, labels: List[object], counts: np.ndarray, selected: List[bool]) -> List[Dict[str, object]]:
+    values = [
+        {"value": label, "count": int(count), "selected": is_selected}
+        for label, count, is_selected in zip(labels, counts.tolist(), selected)
+    ]
+    if column == "type":
+        # The store's own type order, unknown types last
+        values.sort(key=lambda v: TYPE_ORDER.get(str(v["value"]), len(TYPE_ORDER) + 1))
+    else:
+        values.sort(key=lambda v: str(v["value"]).casefold())
+    return values
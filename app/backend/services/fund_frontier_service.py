@@ -0,0 +1,170 @@
+"""
+Fund frontier service - cost/return Pareto frontiers per categoria.
+
+For every categoria and every (ISC horizon, return window) pair, a fund is
+dominated when another fund of the same categoria is no more expensive and
+performs at least as well, being strictly better on one of the two. The
+frontiers are materialized once per snapshot with an O(n log n) sweep per
+pair, so ``/funds/frontier`` and the ``dominated_by`` field of fund details
+are lookups.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.services.fund_data_service import (
+    ISC_COLUMNS,
+    RENDIMENTI_COLUMNS,
+    FundSnapshot,
+    register_derivation,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_COST_METRIC = "isc10a"
+DEFAULT_RETURN_METRIC = "ultimi10Anni"
+
+# ``dominators`` markers for funds that are not dominated
+NOT_DOMINATED = -1
+NOT_RANKED = -2
+
+
+@dataclass(frozen=True)
+class ParetoFrontier:
+    """
+    Frontier of one (cost, return) pair across every categoria.
+
+    ``dominators[row]`` is the best-performing fund dominating ``row``,
+    :data:`NOT_DOMINATED` for frontier funds and :data:`NOT_RANKED` when
+    the fund lacks one of the two metrics. ``frontiers`` maps each
+    categoria to its frontier rows by increasing cost.
+    """
+
+    cost: str
+    returns: str
+    dominators: np.ndarray
+    frontiers: Dict[object, np.ndarray]
+
+
+def pareto_sweep(cost: np.ndarray, returns: np.ndarray) -> np.ndarray:
+    """
+    Return, for each point, the index of the best-performing point
+    dominating it (or :data:`NOT_DOMINATED`). Inputs must not contain NaN.
+
+    Points are swept by increasing cost (better return first on ties): a
+    point is dominated iff an earlier point has a higher return, or the same
+    return at a strictly lower cost.
+    """
+    size = cost.size
+    dominators = np.full(size, NOT_DOMINATED, dtype=np.intp)
+    if size < 2:
+        return dominators
+
+    order = np.lexsort((-returns, cost))
+    c, r = cost[order], returns[order]
+
+    best = np.maximum.accumulate(r)
+    positions = np.arange(size)
+    # Earliest (hence cheapest) point reaching each running maximum
+    new_max = np.ones(size, dtype=bool)
+    new_max[1:] = best[1:] > best[:-1]
+    holder = np.maximum.accumulate(np.where(new_max, positions, 0))
+
+    previous_best, previous_holder = best[:-1], holder[:-1]
+    dominated = (previous_best > r[1:]) | ((previous_best == r[1:]) & (c[previous_holder] < c[1:]))
+
+    sorted_dominators = np.full(size, NOT_DOMINATED, dtype=np.intp)
+    sorted_dominators[1:] = np.where(dominated, order[previous_holder], NOT_DOMINATED)
+    dominators[order] = sorted_dominators
+    return dominators
+
+
+def build_pareto_frontiers(snapshot: FundSnapshot) -> Dict[Tuple[str, str], ParetoFrontier]:
+    """Materialize the frontier of every (ISC, return window) pair per categoria."""
+    postings = snapshot.indexes["categoria"].postings
+    frontiers: Dict[Tuple[str, str], ParetoFrontier] = {}
+
+    for cost_metric, return_metric in itertools.product(ISC_COLUMNS, RENDIMENTI_COLUMNS):
+        cost, returns = snapshot.columns[cost_metric], snapshot.columns[return_metric]
+        dominators = np.full(snapshot.size, NOT_RANKED, dtype=np.intp)
+        by_category: Dict[object, np.ndarray] = {}
+
+        for key, rows in postings.items():
+            rows = rows[~(np.isnan(cost[rows]) | np.isnan(returns[rows]))]
+            local = pareto_sweep(cost[rows], returns[rows])
+            dominators[rows] = np.where(local >= 0, rows[np.maximum(local, 0)], NOT_DOMINATED)
+            frontier = rows[local == NOT_DOMINATED]
+            frontier = frontier[np.lexsort((-returns[frontier], cost[frontier]))]
+            frontier.flags.writeable = False
+            by_category[key] = frontier
+
+        dominators.flags.writeable = False
+        frontiers[(cost_metric, return_metric)] = ParetoFrontier(
+            cost=cost_metric,
+            returns=return_metric,
+            dominators=dominators,
+            frontiers=by_category,
+        )
+    return frontiers
+
+
+register_derivation("pareto_frontiers", build_pareto_frontiers)
+
+
+def get_frontier(
+    snapshot: FundSnapshot,
+    cost: str = DEFAULT_COST_METRIC,
+    returns: str = DEFAULT_RETURN_METRIC,
+) -> ParetoFrontier:
+    """Frontier of a (cost, return) pair; raises ValueError for unknown metrics."""
+    if cost not in ISC_COLUMNS:
+        raise ValueError(f"Unsupported cost metric: {cost}. Use one of {', '.join(ISC_COLUMNS)}")
+    if returns not in RENDIMENTI_COLUMNS:
+        raise ValueError(f"Unsupported return metric: {returns}. Use one of {', '.join(RENDIMENTI_COLUMNS)}")
+    return snapshot.derived("pareto_frontiers")[(cost, returns)]
+
+
+def frontier_summary(
+    snapshot: FundSnapshot,
+    frontier: ParetoFrontier,
+    categories: Optional[List[str]] = None,
+) -> List[Dict[str, object]]:
+    """Serialize the frontier of the requested categorie (all when None)."""
+    index = snapshot.indexes["categoria"]
+    if categories:
+        keys = list(dict.fromkeys(index.key(c) for c in categories))
+    else:
+        keys = list(frontier.frontiers)
+
+    summary = []
+    for key in keys:
+        rows = frontier.frontiers.get(key)
+        if rows is None:
+            continue
+        members = index.rows(key)
+        ranked = frontier.dominators[members] != NOT_RANKED
+        summary.append({
+            "categoria": snapshot.columns["categoria"][members[0]],
+            "frontier": snapshot.to_records(rows),
+            "frontier_size": int(rows.size),
+            "dominated_count": int(ranked.sum() - rows.size),
+            "unranked_count": int((~ranked).sum()),
+        })
+    return summary
+
+
+def dominated_by(snapshot: FundSnapshot, row: int) -> List[Dict[str, str]]:
+    """Every (cost, return) pair on which a fund is dominated, with the dominating fund."""
+    ids = snapshot.columns["id"]
+    result = []
+    for (cost, returns), frontier in snapshot.derived("pareto_frontiers").items():
+        dominator = frontier.dominators[row]
+        if dominator >= 0:
+            result.append({"cost": cost, "returns": returns, "fund_id": ids[dominator]})
+    return result
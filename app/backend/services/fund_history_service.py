@@ -0,0 +1,261 @@
+"""
+Fund history service - every dataset version the store served, stored as
+deltas on disk and materialized on demand.
+
+Each version is one gzipped JSON file in the history directory (next to the
+compiled snapshot by default): the rows inserted or changed since its parent
+(the last version recorded before it), keyed by fund id, and the ids
+deleted; the row order only when it changed beyond the deletions (e.g.
+inserts). A version is stored in full once its parent chain reaches
+:data:`KEYFRAME_INTERVAL` deltas, so materializing a version never replays
+more than that many. Materialized snapshots are kept in a small LRU.
+
+The directory may be shared by several workers and by the build (see
+``scripts/build_fund_snapshot.py``): files are created exclusively and never
+rewritten, a version is recorded once, and replay follows the ``parent``
+links rather than the file order.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from backend.services.fund_data_service import (
+    NUMERIC_COLUMNS,
+    STRING_COLUMNS,
+    FundDataError,
+    FundSnapshot,
+    UnknownVersionError,
+)
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FORMAT_VERSION = 1
+KEYFRAME_INTERVAL = 16
+
+# Values stored per fund id, in this order
+HISTORY_COLUMNS = STRING_COLUMNS[1:] + ("nAlbo",) + NUMERIC_COLUMNS
+
+_ENTRY_NAME = re.compile(r"^(\d{6})-(\w+)\.json\.gz$")
+
+
+@dataclass(frozen=True)
+class HistoryEntry:
+    sequence: int
+    version: str
+    recorded_at: float
+    path: Path
+
+
+class FundHistory:
+    """
+    Append-only, delta-compressed log of dataset versions.
+
+    ``record`` appends a version (once), ``snapshot`` rebuilds one. Files
+    are written atomically, so readers in other workers never see a partial
+    entry.
+    """
+
+    def __init__(self, path: Path, cache_size: int = 4):
+        self.path = Path(path)
+        self.cache_size = max(1, cache_size)
+        self._cache: "OrderedDict[str, FundSnapshot]" = OrderedDict()
+        self._recorded_at: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def entries(self) -> List[HistoryEntry]:
+        """Recorded versions, oldest first."""
+        if not self.path.is_dir():
+            return []
+        entries = []
+        for child in self.path.iterdir():
+            match = _ENTRY_NAME.match(child.name)
+            if match:
+                entries.append(HistoryEntry(
+                    sequence=int(match.group(1)),
+                    version=match.group(2),
+                    recorded_at=self._entry_recorded_at(child),
+                    path=child,
+                ))
+        return sorted(entries, key=lambda entry: (entry.sequence, entry.path.name))
+
+    def record(self, snapshot: FundSnapshot) -> bool:
+        """
+        Append ``snapshot`` as a delta against the last recorded version.
+
+        Returns False when the version is already recorded.
+        """
+        with self._lock:
+            entries = self.entries()
+            if any(entry.version == snapshot.version for entry in entries):
+                return False
+
+            ids = snapshot.columns["id"].tolist()
+            payload: Dict[str, object] = {
+                "format": HISTORY_FORMAT_VERSION,
+                "version": snapshot.version,
+                "columns": list(HISTORY_COLUMNS),
+                "recorded_at": time.time(),
+            }
+            # Entries written before depths were stored count as a full chain
+            depth = _read_entry(entries[-1].path).get("depth", KEYFRAME_INTERVAL) + 1 if entries else 0
+            if depth == 0 or depth >= KEYFRAME_INTERVAL:
+                payload.update(
+                    parent=None, depth=0, order=ids, rows=_row_values(snapshot, range(snapshot.size)), deleted=[]
+                )
+            else:
+                previous = self._snapshot(entries, entries[-1].version)
+                inserted, updated, deleted = snapshot.derived("row_hashes").diff(previous.derived("row_hashes"))
+                changed = np.union1d(inserted, updated)
+                payload.update(
+                    parent=previous.version, depth=depth, rows=_row_values(snapshot, changed), deleted=list(deleted)
+                )
+                removed = set(deleted)
+                if ids != [fund_id for fund_id in previous.columns["id"].tolist() if fund_id not in removed]:
+                    payload["order"] = ids
+
+            sequence = entries[-1].sequence + 1 if entries else 1
+            target = self.path / f"{sequence:06d}-{snapshot.version}.json.gz"
+            self.path.mkdir(parents=True, exist_ok=True)
+            content = gzip.compress(json.dumps(payload, separators=(",", ":")).encode("utf-8"))
+            try:
+                # Exclusive: a concurrent writer of the same entry wins
+                with open(target, "xb") as fh:
+                    fh.write(content)
+            except FileExistsError:
+                return False
+            # Another writer may have recorded the version under another
+            # sequence meanwhile: the first entry wins
+            first = min(
+                (entry for entry in self.entries() if entry.version == snapshot.version),
+                key=lambda entry: (entry.sequence, entry.path.name),
+            )
+            if first.path != target:
+                target.unlink(missing_ok=True)
+                return False
+            self._remember(snapshot)
+        logger.info("Recorded fund dataset %s in %s (%d bytes)", snapshot.version, target, target.stat().st_size)
+        return True
+
+    def snapshot(self, version: str) -> FundSnapshot:
+        """
+        Materialize a recorded version, from the LRU when possible.
+
+        Raises :class:`UnknownVersionError` when the version was never recorded.
+        """
+        with self._lock:
+            cached = self._cache.get(version)
+            if cached is not None:
+                self._cache.move_to_end(version)
+                return cached
+            return self._snapshot(self.entries(), version)
+
+    def _snapshot(self, entries: List[HistoryEntry], version: str) -> FundSnapshot:
+        cached = self._cache.get(version)
+        if cached is not None:
+            self._cache.move_to_end(version)
+            return cached
+        by_version: Dict[str, HistoryEntry] = {}
+        for entry in entries:
+            by_version.setdefault(entry.version, entry)
+        if version not in by_version:
+            raise UnknownVersionError(f"Unknown dataset version: {version}")
+
+        # Follow the parent links back to a keyframe, then replay forwards
+        chain: List[Dict[str, object]] = []
+        parent = version
+        while parent is not None:
+            entry = by_version.get(parent)
+            if entry is None or len(chain) > len(by_version):
+                raise FundDataError(f"Broken fund history chain for {version} at {parent}")
+            payload = _read_entry(entry.path)
+            chain.append(payload)
+            parent = payload["parent"]
+        order: List[str] = []
+        rows: Dict[str, list] = {}
+        for payload in reversed(chain):
+            deleted = set(payload["deleted"])
+            for fund_id in deleted:
+                rows.pop(fund_id, None)
+            rows.update(payload["rows"])
+            order = payload.get("order") or [fund_id for fund_id in order if fund_id not in deleted]
+
+        snapshot = _build_snapshot(order, rows, version)
+        self._remember(snapshot)
+        logger.info("Materialized fund dataset %s from %d history entries", version, len(chain))
+        return snapshot
+
+    def _entry_recorded_at(self, path: Path) -> float:
+        # Entries never change, so each is read once per process. The file
+        # time survives neither checkouts nor copies: it only stands in for
+        # entries written before the payload carried the time, or unreadable ones
+        recorded_at = self._recorded_at.get(path.name)
+        if recorded_at is None:
+            try:
+                recorded_at = _read_entry(path).get("recorded_at")
+            except FundDataError:
+                recorded_at = None
+            if recorded_at is None:
+                recorded_at = path.stat().st_mtime
+            self._recorded_at[path.name] = recorded_at
+        return recorded_at
+
+    def _remember(self, snapshot: FundSnapshot) -> None:
+        self._cache[snapshot.version] = snapshot
+        self._cache.move_to_end(snapshot.version)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+def _row_values(snapshot: FundSnapshot, rows) -> Dict[str, list]:
+    rows = np.asarray(rows, dtype=np.intp)
+    columns = []
+    for name in HISTORY_COLUMNS:
+        values = snapshot.columns[name][rows].tolist()
+        if name in NUMERIC_COLUMNS:
+            values = [None if value != value else value for value in values]
+        columns.append(values)
+    return dict(zip(snapshot.columns["id"][rows].tolist(), (list(row) for row in zip(*columns))))
+
+
+def _read_entry(path: Path) -> Dict[str, object]:
+    try:
+        payload = json.loads(gzip.decompress(path.read_bytes()))
+    except (OSError, ValueError) as exc:
+        raise FundDataError(f"Corrupt fund history entry {path}: {exc}") from exc
+    if payload.get("format") != HISTORY_FORMAT_VERSION or payload.get("columns") != list(HISTORY_COLUMNS):
+        raise FundDataError(f"Unsupported fund history entry {path}")
+    return payload
+
+
+def _build_snapshot(order: List[str], rows: Dict[str, list], version: str) -> FundSnapshot:
+    values = [rows[fund_id] for fund_id in order]
+    columns: Dict[str, np.ndarray] = {"id": np.array(order, dtype=object)}
+    for position, name in enumerate(HISTORY_COLUMNS):
+        column = [row[position] for row in values]
+        if name in NUMERIC_COLUMNS:
+            columns[name] = np.array([np.nan if v is None else v for v in column], dtype=np.float64)
+        elif name == "nAlbo":
+            columns[name] = np.array(column, dtype=np.int32)
+        else:
+            columns[name] = np.array(column, dtype=object)
+    return FundSnapshot(columns, version=version)
+
+
+def history_summary(entries: List[HistoryEntry]) -> List[Dict[str, object]]:
+    """Serialize the recorded versions for ``/funds/versions``, newest first."""
+    return [
+        {"version": entry.version, "recorded_at": entry.recorded_at}
+        for entry in reversed(entries)
+    ]
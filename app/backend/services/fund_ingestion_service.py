@@ -0,0 +1,339 @@
+"""
+Fund ingestion service - builds the fund artifacts from the COVIP CSVs.
+
+One pass over ``data/`` emits both the binary snapshot mapped by the backend
+and ``app/frontend/data/funds.ts``, and records the dataset version in the
+fund history (see :mod:`fund_history_service`), so every ingested release
+stays reachable through ``?as_of=`` and ``/funds/changes``. A manifest next to the snapshot records
+the content hash of every input and output:
+
+- nothing is parsed when the inputs and outputs are unchanged;
+- only the inputs whose hash changed are parsed again, the others are read
+  back from a per-file parse cache;
+- an output is only rewritten when its content changes.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+from backend.services.fund_data_service import (
+    ISC_COLUMNS,
+    RENDIMENTI_COLUMNS,
+    REQUIRED_FILENAMES,
+    SOURCE_FILENAMES,
+    FundDataError,
+    build_snapshot,
+    default_history_path,
+    merge_sources,
+    open_snapshot_file,
+    parse_source,
+    write_snapshot_file,
+)
+from backend.services.fund_history_service import FundHistory
+from backend.services.fund_matching_service import MatchReport
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FRONTEND_PATH = Path(__file__).resolve().parents[2] / "frontend" / "data" / "funds.ts"
+
+# Bumped whenever the manifest or the parse cache layout changes
+MANIFEST_FORMAT_VERSION = 2
+_CACHE_DIRNAME = ".ingest-cache"
+_CHUNK_SIZE = 1 << 20
+
+# Column order of the rows embedded in funds.ts
+FRONTEND_ROW_COLUMNS = ("type", "nAlbo", "pip", "societa", "linea", "categoria") + RENDIMENTI_COLUMNS + ISC_COLUMNS + (
+    "categoriaContratto",
+    "sitoWeb",
+)
+
+_FRONTEND_HEADER = """import { PensionFund, FundCategory } from '../types';
+
+const parseFloatOrNull = (val: string): number | null => {
+  if (val === null || val.trim() === '') return null;
+  const num = parseFloat(val.replace(',', '.'));
+  return isNaN(num) ? null : num;
+};
+
+const generateId = (albo: string, comparto: string, suffix?: number): string => {
+  const sanitizedComparto = String(comparto || '').toLowerCase().replace(/[^a-z0-9]+/g, '-').replace(/^-+|-+$/g, '');
+  return suffix ? `${albo}-${sanitizedComparto}-${suffix}` : `${albo}-${sanitizedComparto}`;
+}
+
+const allRows: string[][] = ["""
+
+_FRONTEND_FOOTER = """];
+
+export const pensionFundsData: PensionFund[] = (() => {
+  // Ensure generated IDs are unique by tracking base id occurrences
+  const seen: Record<string, number> = {};
+  return allRows.map((row): PensionFund => {
+  const [
+    type, n_albo, fondo, societa, comparto, categoria,
+    ultimo_anno, ultimi_3_anni, ultimi_5_anni, ultimi_10_anni, ultimi_20_anni,
+    isc_2a, isc_5a, isc_10a, isc_35a, categoria_contratto, sito_web
+  ] = row;
+
+    const isc5aValue = parseFloatOrNull(isc_5a);
+
+    const baseId = generateId(n_albo, comparto);
+    const count = (seen[baseId] || 0) + 1;
+    seen[baseId] = count;
+    const id = count === 1 ? baseId : generateId(n_albo, comparto, count);
+
+    return {
+      id,
+    type: type as 'FPN' | 'FPA' | 'PIP',
+    nAlbo: parseInt(n_albo, 10),
+    pip: fondo,
+    societa: societa || null,
+    linea: comparto,
+    categoria: categoria as FundCategory,
+    ramo: null, // Not available in new data
+    rendimenti: {
+      ultimoAnno: parseFloatOrNull(ultimo_anno),
+      ultimi3Anni: parseFloatOrNull(ultimi_3_anni),
+      ultimi5Anni: parseFloatOrNull(ultimi_5_anni),
+      ultimi10Anni: parseFloatOrNull(ultimi_10_anni),
+      ultimi20Anni: parseFloatOrNull(ultimi_20_anni),
+    },
+    isc: {
+      isc2a: parseFloatOrNull(isc_2a),
+      isc5a: isc5aValue,
+      isc10a: parseFloatOrNull(isc_10a),
+      isc35a: parseFloatOrNull(isc_35a),
+    },
+    costoAnnuo: isc5aValue,
+    categoriaContratto: categoria_contratto || null,
+    sitoWeb: sito_web || null,
+    };
+  }).filter(fund => fund.linea); // Filter out any potentially invalid rows
+})();"""
+
+
+@dataclass(frozen=True)
+class IngestionResult:
+    """Outcome of :func:`ingest_funds`."""
+
+    version: str
+    funds: Optional[int]
+    parsed: Tuple[str, ...]
+    written: Tuple[Path, ...]
+    # Contract category matching; None when nothing was rebuilt
+    matches: Optional[MatchReport] = None
+    # Whether the version was added to the fund history
+    recorded: bool = False
+
+    @property
+    def up_to_date(self) -> bool:
+        return not self.parsed and not self.written and not self.recorded
+
+
+def hash_sources(data_dir: Path) -> Tuple[Dict[str, str], str]:
+    """
+    Stream the source files once: SHA-256 of each file, and the dataset
+    version (identical to :func:`~backend.services.fund_data_service.sources_version`).
+    """
+    data_dir = Path(data_dir)
+    for name in REQUIRED_FILENAMES:
+        if not (data_dir / name).exists():
+            raise FundDataError(f"Fund data file not found: {data_dir / name}")
+
+    hashes: Dict[str, str] = {}
+    version = hashlib.sha256()
+    for name in SOURCE_FILENAMES:
+        path = data_dir / name
+        if not path.exists():
+            continue
+        digest = hashlib.sha256()
+        version.update(name.encode("utf-8"))
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(_CHUNK_SIZE), b""):
+                digest.update(chunk)
+                version.update(chunk)
+        hashes[name] = digest.hexdigest()
+    return hashes, version.hexdigest()[:16]
+
+
+def frontend_rows(rows: Sequence[Mapping[str, object]]) -> List[List[str]]:
+    """Fund rows as the string arrays embedded in funds.ts (decimals with a dot, blanks empty)."""
+    numeric = set(RENDIMENTI_COLUMNS + ISC_COLUMNS)
+    return [
+        [_normalize_decimal(row.get(name)) if name in numeric else str(row.get(name) or "") for name in FRONTEND_ROW_COLUMNS]
+        for row in rows
+    ]
+
+
+def render_frontend_module(rows: Sequence[Mapping[str, object]]) -> str:
+    """Render ``funds.ts`` for the merged fund rows."""
+    lines = [_FRONTEND_HEADER]
+    lines += [json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "," for row in frontend_rows(rows)]
+    lines.append(_FRONTEND_FOOTER)
+    return "\n".join(lines)
+
+
+def ingest_funds(
+    data_dir: Path,
+    snapshot_path: Path,
+    frontend_path: Optional[Path] = DEFAULT_FRONTEND_PATH,
+    manifest_path: Optional[Path] = None,
+    force: bool = False,
+    history_path: Optional[Path] = None,
+) -> IngestionResult:
+    """
+    Build the snapshot (and ``funds.ts`` unless ``frontend_path`` is None)
+    and record its version in the history at ``history_path`` (by default
+    where the backend reads it, see :func:`default_history_path`).
+
+    ``manifest_path`` defaults to ``<snapshot>.manifest.json``; the parse
+    cache lives next to it. ``force`` ignores the manifest and the cache.
+    """
+    data_dir, snapshot_path = Path(data_dir), Path(snapshot_path)
+    history = FundHistory(Path(history_path) if history_path else default_history_path(snapshot_path))
+    manifest_path = Path(manifest_path) if manifest_path else snapshot_path.with_name(f"{snapshot_path.name}.manifest.json")
+    outputs = [snapshot_path] + ([Path(frontend_path)] if frontend_path else [])
+
+    hashes, version = hash_sources(data_dir)
+    manifest = {} if force else _read_manifest(manifest_path)
+    recorded_outputs = manifest.get("outputs", {})
+    if (
+        manifest.get("inputs") == hashes
+        and manifest.get("version") == version
+        and all(recorded_outputs.get(str(path)) == _file_hash(path) for path in outputs)
+    ):
+        logger.info("Fund artifacts already up to date for version %s", version)
+        recorded = False
+        if not any(entry.version == version for entry in history.entries()):
+            recorded = history.record(open_snapshot_file(snapshot_path))
+        return IngestionResult(version=version, funds=None, parsed=(), written=(), recorded=recorded)
+
+    cache_dir = manifest_path.parent / _CACHE_DIRNAME
+    parsed_sources: Dict[str, object] = {}
+    reparsed: List[str] = []
+    for name, digest in hashes.items():
+        cached = None if force else _read_cache(cache_dir, digest)
+        if cached is None:
+            cached = _parse_file(data_dir / name)
+            _write_cache(cache_dir, digest, cached)
+            reparsed.append(name)
+        parsed_sources[name] = cached
+    _prune_cache(cache_dir, keep={_cache_key(digest) for digest in hashes.values()})
+
+    rows, report = merge_sources(parsed_sources)
+    if not rows:
+        raise FundDataError("Fund data files contain no fund rows")
+    snapshot = build_snapshot(rows, version=version)
+
+    written: List[Path] = []
+    output_hashes: Dict[str, str] = {}
+    current = _file_hash(snapshot_path)
+    if force or current is None or current != recorded_outputs.get(str(snapshot_path)) or manifest.get("version") != version:
+        write_snapshot_file(snapshot, snapshot_path)
+        # Read it back so a broken file never reaches an image
+        mapped = open_snapshot_file(snapshot_path)
+        if mapped.version != snapshot.version or mapped.size != snapshot.size:
+            raise FundDataError(f"Snapshot verification failed for {snapshot_path}")
+        written.append(snapshot_path)
+    output_hashes[str(snapshot_path)] = _file_hash(snapshot_path)
+
+    if frontend_path:
+        frontend_path = Path(frontend_path)
+        content = render_frontend_module(rows).encode("utf-8")
+        if force or _file_hash(frontend_path) != hashlib.sha256(content).hexdigest():
+            _write_atomic(frontend_path, content)
+            written.append(frontend_path)
+        output_hashes[str(frontend_path)] = _file_hash(frontend_path)
+
+    _write_atomic(
+        manifest_path,
+        json.dumps(
+            {"format": MANIFEST_FORMAT_VERSION, "version": version, "inputs": hashes, "outputs": output_hashes},
+            indent=2,
+            sort_keys=True,
+        ).encode("utf-8"),
+    )
+    recorded = history.record(snapshot)
+    logger.info(
+        "Ingested fund dataset %s (%d funds): parsed %s, wrote %s",
+        version, snapshot.size, reparsed or "nothing", [str(p) for p in written] or "nothing",
+    )
+    return IngestionResult(
+        version=version,
+        funds=snapshot.size,
+        parsed=tuple(reparsed),
+        written=tuple(written),
+        matches=report,
+        recorded=recorded,
+    )
+
+
+def _parse_file(path: Path) -> object:
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as fh:
+            return parse_source(path.name, fh)
+    except UnicodeDecodeError as exc:
+        raise FundDataError(f"{path.name} is not valid UTF-8: {exc}") from exc
+
+
+def _normalize_decimal(value: object) -> str:
+    text = str(value or "")
+    return text.replace(",", ".", 1) if text.strip() else ""
+
+
+def _file_hash(path: Path) -> Optional[str]:
+    try:
+        with open(path, "rb") as fh:
+            digest = hashlib.sha256()
+            for chunk in iter(lambda: fh.read(_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    except FileNotFoundError:
+        return None
+    return digest.hexdigest()
+
+
+def _read_manifest(path: Path) -> Dict[str, object]:
+    try:
+        manifest = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("format") != MANIFEST_FORMAT_VERSION:
+        return {}
+    return manifest
+
+
+def _read_cache(cache_dir: Path, digest: str) -> Optional[object]:
+    try:
+        return json.loads((cache_dir / f"{_cache_key(digest)}.json").read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(cache_dir: Path, digest: str, parsed: object) -> None:
+    _write_atomic(cache_dir / f"{_cache_key(digest)}.json", json.dumps(parsed, ensure_ascii=False).encode("utf-8"))
+
+
+def _cache_key(digest: str) -> str:
+    # Parsed shapes depend on the code version, not only on the file content
+    return f"v{MANIFEST_FORMAT_VERSION}-{digest}"
+
+
+def _prune_cache(cache_dir: Path, keep: set) -> None:
+    if not cache_dir.is_dir():
+        return
+    for entry in cache_dir.glob("*.json"):
+        if entry.stem not in keep:
+            entry.unlink(missing_ok=True)
+
+
+def _write_atomic(path: Path, content: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    staging = path.with_name(f".{path.name}.tmp")
+    staging.write_bytes(content)
+    os.replace(staging, path)
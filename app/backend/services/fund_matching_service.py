@@ -0,0 +1,215 @@
+"""
+Fund matching service - normalized-token and trigram name matching.
+
+COVIP files name the same fondo differently ("FONDO PENSIONE FONCHIM" in the
+cost and return files, "Fonchim" in ``Fondi di Categoria.csv``). Names are
+folded (accents, case, punctuation), filler tokens are dropped and the
+result is matched in one pass against a trigram inverted index of the
+targets (and a token one for whole-token containment), so every name costs a
+few posting-list lookups instead of a scan of every target.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Tokens carrying no identity in fondo names
+STOP_TOKENS = frozenset({"FONDO", "PENSIONE"})
+
+MIN_CONFIDENCE = 0.6
+# Every token of the target appears in the name ("SCUOLA ESPERO" / "Espero")
+_TOKEN_SUBSET_CONFIDENCE = 0.9
+
+_ABBREVIATION_DOTS = re.compile(r"(?<=\w)\.(?=\w|$)")
+_NON_ALNUM = re.compile(r"[^A-Z0-9]+")
+
+
+def fold(text: object) -> str:
+    """Uppercase ASCII form of ``text``: accents and apostrophes dropped, punctuation as spaces."""
+    decomposed = unicodedata.normalize("NFKD", str(text or ""))
+    ascii_text = decomposed.encode("ascii", "ignore").decode("ascii").upper().replace("'", "")
+    # "FON.TE." is one word, not two
+    ascii_text = _ABBREVIATION_DOTS.sub("", ascii_text)
+    return _NON_ALNUM.sub(" ", ascii_text).strip()
+
+
+def tokens(text: object, stop: Iterable[str] = ()) -> List[str]:
+    stop = frozenset(stop)
+    return [token for token in fold(text).split() if token not in stop]
+
+
+def trigrams(text: str) -> List[str]:
+    """Distinct trigrams of every word, padded like ``pg_trgm`` (two spaces before, one after)."""
+    grams = dict.fromkeys(
+        padded[i:i + 3]
+        for word in text.split()
+        for padded in (f"  {word} ",)
+        for i in range(len(padded) - 2)
+    )
+    return list(grams)
+
+
+class TrigramIndex:
+    """
+    Inverted index from trigrams to document ids.
+
+    Documents are folded strings (see :func:`fold`). Postings are stored as a
+    single CSR-style array, so scoring a query against every document is one
+    ``bincount`` over the postings of the query trigrams.
+    """
+
+    def __init__(self, documents: Sequence[str]):
+        vocabulary: Dict[str, int] = {}
+        postings: List[List[int]] = []
+        sizes = np.zeros(len(documents), dtype=np.int32)
+        for doc, text in enumerate(documents):
+            grams = trigrams(text)
+            sizes[doc] = len(grams)
+            for gram in grams:
+                slot = vocabulary.setdefault(gram, len(postings))
+                if slot == len(postings):
+                    postings.append([])
+                postings[slot].append(doc)
+
+        self.size = len(documents)
+        self.vocabulary = vocabulary
+        self.indptr = np.zeros(len(postings) + 1, dtype=np.int64)
+        np.cumsum([len(p) for p in postings], out=self.indptr[1:])
+        self.doc_ids = np.fromiter((d for p in postings for d in p), dtype=np.int32, count=int(self.indptr[-1]))
+        self.sizes = sizes
+        for array in (self.indptr, self.doc_ids, self.sizes):
+            array.flags.writeable = False
+
+    def shared(self, query: str) -> Tuple[np.ndarray, int]:
+        """Trigrams shared by the query with every document, and the query's trigram count."""
+        grams = trigrams(query)
+        slots = [self.vocabulary[g] for g in grams if g in self.vocabulary]
+        if not slots:
+            return np.zeros(self.size, dtype=np.int64), len(grams)
+        hits = np.concatenate([self.doc_ids[self.indptr[s]:self.indptr[s + 1]] for s in slots])
+        return np.bincount(hits, minlength=self.size), len(grams)
+
+    def similarity(self, query: str) -> np.ndarray:
+        """Dice coefficient of the query trigrams with every document (0 to 1)."""
+        shared, count = self.shared(query)
+        total = self.sizes + count
+        return np.where(total > 0, 2.0 * shared / np.maximum(total, 1), 0.0)
+
+
+class TokenIndex:
+    """
+    Inverted index from tokens to the documents (token sets) containing them.
+
+    A document is a subset of a query when every one of its tokens is hit:
+    one ``bincount`` over the postings of the query tokens, compared with the
+    document sizes.
+    """
+
+    def __init__(self, documents: Sequence[Iterable[str]]):
+        postings: Dict[str, List[int]] = {}
+        sizes = np.zeros(len(documents), dtype=np.int32)
+        for doc, document in enumerate(documents):
+            document = set(document)
+            sizes[doc] = len(document)
+            for token in document:
+                postings.setdefault(token, []).append(doc)
+
+        self.size = len(documents)
+        self.postings = {token: np.array(docs, dtype=np.int32) for token, docs in postings.items()}
+        self.sizes = sizes
+        for array in (self.sizes, *self.postings.values()):
+            array.flags.writeable = False
+
+    def subsets(self, query: Iterable[str]) -> np.ndarray:
+        """Mask of the non-empty documents whose tokens are all in the query."""
+        lists = [self.postings[token] for token in set(query) if token in self.postings]
+        if not lists:
+            return np.zeros(self.size, dtype=bool)
+        hits = np.bincount(np.concatenate(lists), minlength=self.size)
+        return (hits == self.sizes) & (self.sizes > 0)
+
+
+@dataclass(frozen=True)
+class NameMatch:
+    name: str
+    target: int
+    target_name: str
+    confidence: float
+    method: str
+
+
+@dataclass(frozen=True)
+class MatchReport:
+    """``matches`` by name; ``unmatched`` names and ``unused`` targets are listed for review."""
+
+    matches: Dict[str, NameMatch]
+    unmatched: Tuple[str, ...]
+    unused: Tuple[str, ...]
+
+    def get(self, name: str) -> Optional[NameMatch]:
+        return self.matches.get(name)
+
+
+def name_key(name: object) -> str:
+    """Compact matching key: folded tokens without filler words, joined."""
+    return "".join(tokens(name, STOP_TOKENS))
+
+
+def match_names(
+    names: Iterable[str],
+    targets: Sequence[str],
+    min_confidence: float = MIN_CONFIDENCE,
+) -> MatchReport:
+    """
+    Resolve every name to its best target.
+
+    Confidence is 1.0 for identical keys, 0.9 when all the target tokens are
+    tokens of the name, otherwise the trigram Dice similarity of the keys.
+    Names below ``min_confidence`` are reported as unmatched.
+    """
+    target_keys = [name_key(t) for t in targets]
+    token_index = TokenIndex([tokens(t, STOP_TOKENS) for t in targets])
+    exact: Dict[str, int] = {}
+    for i, key in enumerate(target_keys):
+        if key:
+            exact.setdefault(key, i)
+    index = TrigramIndex(target_keys)
+
+    matches: Dict[str, NameMatch] = {}
+    unmatched: List[str] = []
+    for name in dict.fromkeys(names):
+        key = name_key(name)
+        if not key:
+            unmatched.append(name)
+            continue
+        if key in exact:
+            target, confidence, method = exact[key], 1.0, "exact"
+        else:
+            similarity = index.similarity(key)
+            subset = token_index.subsets(tokens(name, STOP_TOKENS))
+            scores = np.where(subset, np.maximum(similarity, _TOKEN_SUBSET_CONFIDENCE), similarity)
+            target = int(np.argmax(scores)) if len(targets) else -1
+            if target < 0 or scores[target] < min_confidence:
+                unmatched.append(name)
+                continue
+            confidence = float(scores[target])
+            method = "token" if subset[target] and similarity[target] < confidence else "trigram"
+        matches[name] = NameMatch(
+            name=name,
+            target=target,
+            target_name=targets[target],
+            confidence=round(confidence, 4),
+            method=method,
+        )
+
+    used = {m.target for m in matches.values()}
+    unused = tuple(t for i, t in enumerate(targets) if i not in used)
+    return MatchReport(matches=matches, unmatched=tuple(unmatched), unused=unused)
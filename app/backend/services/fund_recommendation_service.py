@@ -0,0 +1,289 @@
+"""
+Fund recommendation service - server-side port of ``computeShortlist``.
+
+The browser used to score every fund on each profile change
+(``app/frontend/utils/fundShortlist.ts``). Here the profile-independent parts
+(normalized cost and return vectors, category and contract masks) are
+precomputed once per fund snapshot, so scoring a profile is a single NumPy
+expression over the whole dataset.
+"""
+
+from __future__ import annotations
+
+import logging
+import math
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from backend.config.fund_logic import FUND_LOGIC_CONFIG
+from backend.providers.prometheus import counter
+from backend.services.fund_data_service import FundSnapshot, get_fund_store, register_derivation
+from backend.settings import settings
+
+logger = logging.getLogger(__name__)
+
+AGE_RANGES = ("under35", "35-50", "over50")
+RISK_PREFERENCES = ("low", "medium", "high")
+
+_SHORTLIST_CONFIG = FUND_LOGIC_CONFIG["shortlist"]
+
+RECOMMENDATION_CACHE_HITS = counter(
+    "fund_recommendation_cache_hits",
+    "Recommendation requests served from the per-profile cache",
+)
+RECOMMENDATION_CACHE_MISSES = counter(
+    "fund_recommendation_cache_misses",
+    "Recommendation requests that had to score the fund universe",
+)
+
+
+@dataclass(frozen=True)
+class RecommendationProfile:
+    """The subset of the frontend ``UserProfile`` that drives the shortlist."""
+
+    horizon_years: int
+    age_range: Optional[str] = None
+    risk_preference: Optional[str] = None
+    has_fpn: Optional[bool] = None
+    contractual_category: Optional[str] = None
+
+
+@dataclass(frozen=True)
+class ShortlistVectors:
+    """Profile-independent shortlist inputs for one snapshot."""
+
+    cost_score: np.ndarray
+    return_score: np.ndarray
+    horizon_masks: Tuple[Tuple[float, np.ndarray], ...]
+    equity_like: np.ndarray
+    mixed_like: np.ndarray
+    is_fpn: np.ndarray
+    contract_masks: Dict[str, np.ndarray]
+
+
+@dataclass(frozen=True)
+class Recommendation:
+    row: int
+    score: float
+    cost_score: float
+    return_score: float
+
+
+def build_shortlist_vectors(snapshot: FundSnapshot) -> ShortlistVectors:
+    """Precompute normalized scores and category masks for a snapshot."""
+    missing = _SHORTLIST_CONFIG["missingValues"]
+    patterns = _SHORTLIST_CONFIG["categoryPatterns"]
+
+    costs = np.where(np.isnan(snapshot.columns["isc35a"]), missing["cost"], snapshot.columns["isc35a"])
+    returns = np.where(
+        np.isnan(snapshot.columns["ultimi10Anni"]), missing["returns10y"], snapshot.columns["ultimi10Anni"]
+    )
+
+    categories = [str(c).upper() for c in snapshot.columns["categoria"].tolist()]
+    horizon_masks = tuple(
+        (rule["maxYearsInclusive"], _contains_any(categories, rule["categories"]))
+        for rule in _SHORTLIST_CONFIG["horizonCategoryRules"]
+    )
+
+    # A fund matches a contractual category either on its whole
+    # categoriaContratto (as offered by ChooseFundFlow) or on one of its
+    # comma-separated parts (as compared by computeShortlist).
+    contract_rows: Dict[str, List[int]] = {}
+    for row, contract in enumerate(snapshot.columns["categoriaContratto"].tolist()):
+        if not contract:
+            continue
+        keys = {contract.strip()} | {part.strip() for part in contract.split(",")}
+        for key in keys:
+            contract_rows.setdefault(key, []).append(row)
+    contract_masks: Dict[str, np.ndarray] = {}
+    for key, rows in contract_rows.items():
+        mask = np.zeros(snapshot.size, dtype=bool)
+        mask[rows] = True
+        contract_masks[key] = mask
+
+    types = np.array([str(t).upper().strip() for t in snapshot.columns["type"].tolist()], dtype=object)
+    return ShortlistVectors(
+        cost_score=1 - _normalized(costs),
+        return_score=_normalized(returns),
+        horizon_masks=horizon_masks,
+        equity_like=_contains_any(categories, patterns["equityLike"]),
+        mixed_like=_contains_any(categories, patterns["mixedLike"]),
+        is_fpn=types == "FPN",
+        contract_masks=contract_masks,
+    )
+
+
+register_derivation("shortlist", build_shortlist_vectors)
+
+# One horizon per horizonCategoryRules bucket (results only depend on the bucket)
+_HORIZON_REPRESENTATIVES = tuple(
+    int(rule["maxYearsInclusive"]) if math.isfinite(rule["maxYearsInclusive"]) else 100
+    for rule in _SHORTLIST_CONFIG["horizonCategoryRules"]
+)
+
+
+def compute_shortlist(
+    snapshot: FundSnapshot,
+    profile: RecommendationProfile,
+    max_results: int = 5,
+) -> List[Recommendation]:
+    """
+    Rank funds for a profile, best first (same semantics as ``computeShortlist``).
+
+    - Category candidates are derived from the horizon.
+    - FPN funds are excluded when the user has none, and restricted to the
+      selected contractual category when one is given.
+    - Score = weighted normalized cost (isc35a) and 10y returns, plus risk,
+      age, FPN and contractual-category boosts.
+    """
+    vectors: ShortlistVectors = snapshot.derived("shortlist")
+    weights = _SHORTLIST_CONFIG["weights"]
+
+    eligible = next(
+        (mask for max_years, mask in vectors.horizon_masks if profile.horizon_years <= max_years),
+        vectors.horizon_masks[-1][1],
+    )
+
+    contract_mask = vectors.contract_masks.get((profile.contractual_category or "").strip())
+    if contract_mask is None:
+        contract_mask = np.zeros(snapshot.size, dtype=bool)
+    if profile.has_fpn is False:
+        eligible = eligible & ~vectors.is_fpn
+    elif profile.has_fpn is True and profile.contractual_category:
+        eligible = eligible & (~vectors.is_fpn | contract_mask)
+
+    rows = np.flatnonzero(eligible)
+    if rows.size == 0:
+        return []
+
+    risk_map = _SHORTLIST_CONFIG["riskPreferenceMap"]
+    appetite = risk_map.get(profile.risk_preference or "medium", risk_map["medium"])
+    age_factor = 0.0
+    if profile.age_range == "over50":
+        age_factor = -weights["ageConservatism"]
+    elif profile.age_range == "under35":
+        age_factor = weights["ageConservatism"] * _SHORTLIST_CONFIG["ageBias"]["under35BoostFactor"]
+
+    equity = vectors.equity_like[rows]
+    risk_alignment = np.where(equity, appetite, np.where(vectors.mixed_like[rows], 0.5, 1 - appetite))
+    scores = (
+        weights["cost"] * vectors.cost_score[rows]
+        + weights["returns"] * vectors.return_score[rows]
+        + (risk_alignment - 0.5) * 2 * weights["riskBoostMax"]
+        + equity * age_factor
+        + (vectors.is_fpn[rows] & (profile.has_fpn is True)) * weights["hasFpnBoost"]
+        + contract_mask[rows] * weights["contractualCategoryBoost"]
+    )
+
+    top = np.argsort(-scores, kind="stable")[:max_results]
+    return [
+        Recommendation(
+            row=int(rows[i]),
+            score=float(scores[i]),
+            cost_score=float(vectors.cost_score[rows[i]]),
+            return_score=float(vectors.return_score[rows[i]]),
+        )
+        for i in top
+    ]
+
+
+def canonical_profile(profile: RecommendationProfile) -> RecommendationProfile:
+    """
+    Map a profile to the representative of its equivalence class.
+
+    The shortlist only depends on which horizon rule applies, on whether the
+    age range is under35/over50, and on the risk preference defaulting to
+    medium, so profiles that differ elsewhere share a cache entry.
+    """
+    rules = _SHORTLIST_CONFIG["horizonCategoryRules"]
+    bucket = next((i for i, rule in enumerate(rules) if profile.horizon_years <= rule["maxYearsInclusive"]), len(rules) - 1)
+    return replace(
+        profile,
+        horizon_years=_HORIZON_REPRESENTATIVES[bucket],
+        age_range=profile.age_range if profile.age_range in ("under35", "over50") else None,
+        risk_preference=profile.risk_preference if profile.risk_preference in RISK_PREFERENCES else "medium",
+        contractual_category=(profile.contractual_category or "").strip() or None,
+    )
+
+
+class RecommendationCache:
+    """
+    LRU cache of shortlist results keyed by dataset version and canonical profile.
+
+    Entries for a previous dataset version are dropped as soon as a request
+    is served from a newer snapshot.
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[RecommendationProfile, int], List[Recommendation]]" = OrderedDict()
+        self._version: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_or_compute(
+        self,
+        snapshot: FundSnapshot,
+        profile: RecommendationProfile,
+        max_results: int,
+    ) -> List[Recommendation]:
+        key = (canonical_profile(profile), max_results)
+        with self._lock:
+            if self._version != snapshot.version:
+                self._entries.clear()
+                self._version = snapshot.version
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                RECOMMENDATION_CACHE_HITS.inc()
+                return cached
+
+        RECOMMENDATION_CACHE_MISSES.inc()
+        result = compute_shortlist(snapshot, key[0], max_results=max_results)
+        with self._lock:
+            if self._version == snapshot.version:
+                self._entries[key] = result
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+
+_CACHE = RecommendationCache(maxsize=settings.funds_recommendation_cache_size)
+
+
+def recommend(snapshot: FundSnapshot, profile: RecommendationProfile, max_results: int = 5) -> List[Recommendation]:
+    """
+    Return the shortlist for a profile, served from the LRU cache when possible.
+
+    Past dataset versions (``?as_of=``) bypass the cache, which would
+    otherwise drop the entries of the version being served.
+    """
+    current = get_fund_store().version
+    if current is not None and snapshot.version != current:
+        return compute_shortlist(snapshot, canonical_profile(profile), max_results=max_results)
+    return _CACHE.get_or_compute(snapshot, profile, max_results)
+
+
+def _normalized(values: np.ndarray) -> np.ndarray:
+    if values.size == 0:
+        return values.astype(np.float64)
+    low, high = values.min(), values.max()
+    if high == low:
+        return np.full(values.size, 0.5)
+    return (values - low) / (high - low)
+
+
+def _contains_any(values: List[str], patterns: List[str]) -> np.ndarray:
+    return np.array([any(p in value for p in patterns) for value in values], dtype=bool)
@@ -0,0 +1,144 @@
+"""
+Fund search service - accent and typo tolerant search over FONDO, SOCIETA
+and COMPARTO.
+
+The distinct folded words of those three columns form a small vocabulary,
+indexed once per snapshot by trigram and kept sorted for prefix lookups.
+Each query term is scored against the whole vocabulary in one ``bincount``
+(trigram similarity, for typos) plus a binary search (prefix, for
+search-as-you-type); matching words map back to rows through a posting list.
+"""
+
+from __future__ import annotations
+
+import bisect
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from backend.services.fund_data_service import FundSnapshot, register_derivation
+from backend.services.fund_matching_service import TrigramIndex, tokens
+
+logger = logging.getLogger(__name__)
+
+SEARCH_COLUMNS = ("pip", "societa", "linea")
+
+# Minimum trigram similarity for a typo match, and the shortest term it applies to
+MIN_SIMILARITY = 0.5
+MIN_FUZZY_LENGTH = 3
+
+
+@dataclass(frozen=True)
+class SearchIndex:
+    """
+    Sorted vocabulary of the searchable words, their trigram index and the
+    rows containing each word (``indptr``/``rows`` posting lists).
+    """
+
+    words: Tuple[str, ...]
+    word_lengths: np.ndarray
+    trigrams: TrigramIndex
+    indptr: np.ndarray
+    rows: np.ndarray
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    row: int
+    score: float
+
+
+def build_search_index(snapshot: FundSnapshot) -> SearchIndex:
+    """Index the words of :data:`SEARCH_COLUMNS` for every fund."""
+    postings: Dict[str, List[int]] = {}
+    for name in SEARCH_COLUMNS:
+        for row, value in enumerate(snapshot.columns[name].tolist()):
+            for word in tokens(value):
+                rows = postings.setdefault(word, [])
+                if not rows or rows[-1] != row:
+                    rows.append(row)
+
+    words = tuple(sorted(postings))
+    rows_per_word = [sorted(set(postings[w])) for w in words]
+    indptr = np.zeros(len(words) + 1, dtype=np.int64)
+    np.cumsum([len(r) for r in rows_per_word], out=indptr[1:])
+    rows = np.fromiter((r for group in rows_per_word for r in group), dtype=np.intp, count=int(indptr[-1]))
+    word_lengths = np.array([len(w) for w in words], dtype=np.float64)
+    for array in (indptr, rows, word_lengths):
+        array.flags.writeable = False
+    return SearchIndex(
+        words=words,
+        word_lengths=word_lengths,
+        trigrams=TrigramIndex(words),
+        indptr=indptr,
+        rows=rows,
+    )
+
+
+register_derivation("search_index", build_search_index)
+
+
+def word_scores(index: SearchIndex, term: str) -> np.ndarray:
+    """
+    Score of every vocabulary word for one folded query term: 1 for the
+    word itself, 0.5-1 for words it is a prefix of (by covered length), else
+    the trigram similarity when at least :data:`MIN_SIMILARITY`.
+    """
+    if len(term) >= MIN_FUZZY_LENGTH:
+        scores = index.trigrams.similarity(term)
+        scores[scores < MIN_SIMILARITY] = 0.0
+    else:
+        scores = np.zeros(len(index.words))
+    start = bisect.bisect_left(index.words, term)
+    end = bisect.bisect_left(index.words, term + "\x7f", lo=start)
+    if end > start:
+        prefix = 0.5 + 0.5 * len(term) / index.word_lengths[start:end]
+        scores[start:end] = np.maximum(scores[start:end], prefix)
+    return scores
+
+
+def search_funds(snapshot: FundSnapshot, query: str, limit: int = 10) -> List[SearchHit]:
+    """
+    Funds matching every term of ``query``, best first.
+
+    A fund's score is the mean, over the query terms, of its best matching
+    word; ties keep the dataset order.
+    """
+    terms = list(dict.fromkeys(tokens(query)))
+    if not terms or limit <= 0:
+        return []
+    index: SearchIndex = snapshot.derived("search_index")
+
+    total = np.zeros(snapshot.size)
+    for position, term in enumerate(terms):
+        scores = word_scores(index, term)
+        matched = np.flatnonzero(scores)
+        best = np.zeros(snapshot.size)
+        if matched.size:
+            counts = index.indptr[matched + 1] - index.indptr[matched]
+            starts = np.repeat(index.indptr[matched] - np.cumsum(counts) + counts, counts)
+            rows = index.rows[starts + np.arange(counts.sum())]
+            np.maximum.at(best, rows, np.repeat(scores[matched], counts))
+        # Every term has to match
+        total = np.where((best > 0) & (total > 0), total + best, 0.0) if position else best
+
+    hits = np.flatnonzero(total)
+    hits = hits[np.lexsort((hits, -total[hits]))][:limit]
+    return [SearchHit(row=int(row), score=float(total[row]) / len(terms)) for row in hits]
+
+
+def search_summary(snapshot: FundSnapshot, query: str, limit: int = 10) -> List[Dict[str, object]]:
+    """Serialize :func:`search_funds` for ``/funds/search``."""
+    hits = search_funds(snapshot, query, limit=limit)
+    records = snapshot.to_records([hit.row for hit in hits])
+    return [
+        {
+            "id": record["id"],
+            "name": f"{record['pip']} - {record['linea']}",
+            "score": round(hit.score, 4),
+            "fund": record,
+        }
+        for hit, record in zip(hits, records)
+    ]
@@ -0,0 +1,141 @@
+"""
+Fund similarity service - "similar but cheaper or better" alternatives.
+
+Every fund is described by a standardized feature vector: the categoria risk
+score from ``categoryRiskScores``, the ISC curve and the return windows. The
+vectors and their squared norms are built once per snapshot; a query is a
+single matrix-vector product over the whole universe followed by a partial
+sort, so it stays well under a millisecond for universes many times the
+current size.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+
+from backend.config.fund_logic import FUND_LOGIC_CONFIG
+from backend.services.fund_analysis_service import COST_METRIC, PERFORMANCE_METRIC
+from backend.services.fund_data_service import (
+    ISC_COLUMNS,
+    RENDIMENTI_COLUMNS,
+    FundSnapshot,
+    register_derivation,
+)
+
+logger = logging.getLogger(__name__)
+
+# Each group contributes equally to the distance, whatever its number of columns
+_FEATURE_GROUPS = (("risk",), ISC_COLUMNS, RENDIMENTI_COLUMNS)
+
+
+@dataclass(frozen=True)
+class SimilarityIndex:
+    """Standardized, group-weighted feature vectors of a snapshot."""
+
+    features: np.ndarray
+    squared_norms: np.ndarray
+
+
+@dataclass(frozen=True)
+class SimilarFund:
+    row: int
+    distance: float
+    cheaper: bool
+    better_performing: bool
+
+
+def category_risk_scores(snapshot: FundSnapshot) -> np.ndarray:
+    """``categoryRiskScores`` of every fund, NaN for unknown categorie."""
+    scores = FUND_LOGIC_CONFIG["categoryRiskScores"]
+    return np.array(
+        [scores.get(str(c).strip().upper(), np.nan) for c in snapshot.columns["categoria"].tolist()],
+        dtype=np.float64,
+    )
+
+
+def build_similarity_index(snapshot: FundSnapshot) -> SimilarityIndex:
+    """
+    Standardize the feature columns (z-scores, missing values at the mean)
+    and weight them so that risk, costs and returns count the same.
+    """
+    raw = {"risk": category_risk_scores(snapshot)}
+    raw.update({name: snapshot.columns[name] for name in ISC_COLUMNS + RENDIMENTI_COLUMNS})
+
+    blocks = []
+    for group in _FEATURE_GROUPS:
+        block = np.column_stack([raw[name] for name in group])
+        present = ~np.isnan(block)
+        counts = np.maximum(present.sum(axis=0), 1)
+        mean = np.where(present, block, 0.0).sum(axis=0) / counts
+        centered = np.where(present, block - mean, 0.0)
+        std = np.sqrt((centered ** 2).sum(axis=0) / counts)
+        standardized = centered / np.where(std > 0, std, 1.0)
+        blocks.append(standardized / np.sqrt(len(group)))
+
+    features = np.hstack(blocks)
+    squared_norms = np.einsum("ij,ij->i", features, features)
+    features.flags.writeable = False
+    squared_norms.flags.writeable = False
+    return SimilarityIndex(features=features, squared_norms=squared_norms)
+
+
+register_derivation("similarity_index", build_similarity_index)
+
+
+def similar_alternatives(snapshot: FundSnapshot, row: int, k: int = 5) -> List[SimilarFund]:
+    """
+    The ``k`` funds nearest to ``row`` that are strictly cheaper or strictly
+    better performing on the analysis headline metrics, closest first.
+    """
+    if k <= 0:
+        return []
+    index: SimilarityIndex = snapshot.derived("similarity_index")
+    query = index.features[row]
+    distances = index.squared_norms - 2.0 * (index.features @ query) + index.squared_norms[row]
+
+    cost = snapshot.columns[COST_METRIC]
+    performance = snapshot.columns[PERFORMANCE_METRIC]
+    # Comparisons with NaN are False: unknown metrics never qualify
+    cheaper = cost < cost[row]
+    better = performance > performance[row]
+    candidates = np.flatnonzero(cheaper | better)
+    if candidates.size == 0:
+        return []
+
+    candidate_distances = distances[candidates]
+    if candidates.size > k:
+        nearest = np.argpartition(candidate_distances, k - 1)[:k]
+    else:
+        nearest = np.arange(candidates.size)
+    nearest = nearest[np.argsort(candidate_distances[nearest], kind="stable")]
+
+    return [
+        SimilarFund(
+            row=int(candidates[i]),
+            distance=float(np.sqrt(max(candidate_distances[i], 0.0))),
+            cheaper=bool(cheaper[candidates[i]]),
+            better_performing=bool(better[candidates[i]]),
+        )
+        for i in nearest
+    ]
+
+
+def similar_summary(snapshot: FundSnapshot, row: int, k: int = 5) -> List[Dict[str, object]]:
+    """Serialize :func:`similar_alternatives` for the analysis response."""
+    similar = similar_alternatives(snapshot, row, k=k)
+    records = snapshot.to_records([s.row for s in similar])
+    return [
+        {
+            "id": record["id"],
+            "name": f"{record['pip']} - {record['linea']}",
+            "distance": round(s.distance, 4),
+            "cheaper": s.cheaper,
+            "better_performing": s.better_performing,
+            "fund": record,
+        }
+        for s, record in zip(similar, records)
+    ]
@@ -0,0 +1,64 @@
+"""
+Fund sync service - what changed between two dataset versions.
+
+The fund store keeps the row hashes (one 64-bit content hash per fund id) of
+the last versions it served. Diffing two versions is then a sorted join on
+the ids plus a hash comparison, so a returning client can fetch only the
+inserted and updated funds and the ids to delete, instead of the whole
+dataset. Older versions are rebuilt from the store's history.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+
+from backend.services.fund_data_service import FundSnapshot, FundStore, UnknownVersionError, get_fund_store
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class FundChanges:
+    """Changes from ``since`` to ``version``; rows refer to the current snapshot."""
+
+    since: str
+    version: str
+    inserted: np.ndarray
+    updated: np.ndarray
+    deleted: Tuple[str, ...]
+
+
+def fund_changes(snapshot: FundSnapshot, since: str, store: Optional[FundStore] = None) -> FundChanges:
+    """
+    Changes between the ``since`` version and ``snapshot``.
+
+    Raises :class:`UnknownVersionError` when ``since`` is neither among the
+    recent versions nor in the store's history.
+    """
+    if since == snapshot.version:
+        empty = np.empty(0, dtype=np.intp)
+        return FundChanges(since=since, version=snapshot.version, inserted=empty, updated=empty, deleted=())
+
+    store = store or get_fund_store()
+    previous = store.row_hashes(since)
+    if previous is None:
+        previous = store.history.snapshot(since).derived("row_hashes")
+    inserted, updated, deleted = snapshot.derived("row_hashes").diff(previous)
+    return FundChanges(since=since, version=snapshot.version, inserted=inserted, updated=updated, deleted=deleted)
+
+
+def changes_summary(
+    snapshot: FundSnapshot, changes: FundChanges, fields: Optional[Iterable[str]] = None
+) -> Dict[str, object]:
+    """Serialize :class:`FundChanges` for ``/funds/changes``."""
+    return {
+        "since": changes.since,
+        "dataset_version": changes.version,
+        "inserted": snapshot.to_records(changes.inserted, fields=fields),
+        "updated": snapshot.to_records(changes.updated, fields=fields),
+        "deleted": list(changes.deleted),
+    }
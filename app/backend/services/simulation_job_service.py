@@ -0,0 +1,413 @@
+"""
+Simulation job service - long simulations run in the background and polled.
+
+A job is a list of tasks for the simulation pool plus a function combining
+their results. Submitting returns at once with the job id, the SHA-256 of
+the job kind and its canonical JSON payload: an identical submission finds
+the job already queued, running or done and is not computed again. Job
+records (status, progress) live in a store with a TTL, in process memory or
+in Redis (``simulator_jobs_store = "redis"``) so that every API worker
+answers the polls. A finished job's response, result included, is encoded
+once off the event loop and stored as bytes beside its record. Tasks run in
+the simulation pool of the process that accepted the job.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from backend.providers.prometheus import counter, gauge
+from backend.services import simulation_montecarlo_service, simulation_service
+from backend.services.fund_data_service import RENDIMENTI_COLUMNS, FundSnapshot
+from backend.services.simulation_pool_service import (
+    SimulationPool,
+    SimulationPoolBusyError,
+    SimulationTimeoutError,
+    get_simulation_pool,
+)
+from backend.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SIMULATION_JOBS_SUBMITTED = counter("simulation_jobs_submitted", "Simulation jobs started", ["kind"])
+SIMULATION_JOBS_DEDUPLICATED = counter(
+    "simulation_jobs_deduplicated", "Simulation job submissions answered by an existing job", ["kind"]
+)
+SIMULATION_JOBS_ACTIVE = gauge("simulation_jobs_active", "Simulation jobs queued or running in this process")
+
+_FINISHED = ("done", "failed")
+
+
+class SimulationJobsBusyError(RuntimeError):
+    """Raised when this process already runs ``max_active`` jobs or its store is full."""
+
+
+@dataclass(frozen=True)
+class JobTask:
+    """One call to run in the simulation pool; ``fn`` must be picklable."""
+
+    fn: Callable[..., Any]
+    args: Tuple[Any, ...] = ()
+    kwargs: Mapping[str, Any] = field(default_factory=dict)
+
+
+def job_id(kind: str, payload: Mapping[str, Any]) -> str:
+    """Content hash of a submission: identical submissions share the id."""
+    canonical = json.dumps({"kind": kind, "payload": payload}, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class MemoryJobStore:
+    """
+    Job records in process memory, dropped ``ttl`` seconds after their last
+    update or, oldest first, when more than ``max_jobs`` are kept. Only
+    finished (done or failed) records are dropped for room: a new job is
+    refused with :class:`SimulationJobsBusyError` while ``max_jobs`` records
+    are queued or running.
+    """
+
+    def __init__(self, ttl: float, max_jobs: int = 256):
+        self.ttl = ttl
+        self.max_jobs = max(1, max_jobs)
+        self._records: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._bodies: Dict[str, bytes] = {}
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        self._evict()
+        entry = self._records.get(job_id)
+        return None if entry is None else entry[1]
+
+    async def add(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Store a new record unless a live one has its id; returns that one."""
+        existing = await self.get(record["id"])
+        if existing is not None and existing["status"] != "failed":
+            return existing
+        if existing is None:
+            self._trim(self.max_jobs - 1)
+            if len(self._records) >= self.max_jobs:
+                raise SimulationJobsBusyError(f"Too many simulation jobs stored ({self.max_jobs})")
+        await self.put(record)
+        return None
+
+    async def put(self, record: Dict[str, Any]) -> None:
+        if record["status"] not in _FINISHED:
+            self._bodies.pop(record["id"], None)
+        self._records[record["id"]] = (time.monotonic() + self.ttl, record)
+        self._records.move_to_end(record["id"])
+        self._trim(self.max_jobs)
+
+    async def get_body(self, job_id: str) -> Optional[bytes]:
+        self._evict()
+        return self._bodies.get(job_id)
+
+    async def put_body(self, job_id: str, body: bytes) -> None:
+        """Keep the encoded response of a finished job, as long as its record."""
+        self._bodies[job_id] = body
+
+    def _trim(self, size: int) -> None:
+        # Drop the oldest finished records until at most ``size`` are kept
+        finished = [
+            key for key, (_, record) in self._records.items() if record["status"] in _FINISHED
+        ]
+        for key in finished[:max(0, len(self._records) - size)]:
+            del self._records[key]
+            self._bodies.pop(key, None)
+
+    def _evict(self) -> None:
+        # Records are kept in update order and share the TTL: expired ones lead
+        now = time.monotonic()
+        while self._records and next(iter(self._records.values()))[0] <= now:
+            key, _ = self._records.popitem(last=False)
+            self._bodies.pop(key, None)
+
+
+class RedisJobStore:
+    """
+    Job records as JSON strings under ``prefix + id`` and finished jobs'
+    responses under ``prefix + id + ":body"``, expiring after ``ttl``
+    seconds. ``client`` is a synchronous Redis client; its calls run in a
+    thread so that they do not block the event loop.
+    """
+
+    def __init__(self, client, ttl: float, prefix: str = "simulation_job:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        value = await asyncio.to_thread(self.client.get, self.prefix + job_id)
+        return None if value is None else json.loads(value)
+
+    async def add(self, record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Store a new record unless a live one has its id; returns that one."""
+        key = self.prefix + record["id"]
+        value = json.dumps(record)
+        if await asyncio.to_thread(self.client.set, key, value, nx=True, px=int(self.ttl * 1000)):
+            return None
+        existing = await self.get(record["id"])
+        if existing is not None and existing["status"] != "failed":
+            return existing
+        await self.put(record)
+        return None
+
+    async def put(self, record: Dict[str, Any]) -> None:
+        # Serialized here: the job keeps updating ``record`` on the event loop
+        value = json.dumps(record)
+        await asyncio.to_thread(self.client.set, self.prefix + record["id"], value, px=int(self.ttl * 1000))
+
+    async def get_body(self, job_id: str) -> Optional[bytes]:
+        return await asyncio.to_thread(self._get_body, self.prefix + job_id + ":body")
+
+    async def put_body(self, job_id: str, body: bytes) -> None:
+        """Keep the encoded response of a finished job, as long as its record."""
+        await asyncio.to_thread(self.client.set, self.prefix + job_id + ":body", body, px=int(self.ttl * 1000))
+
+    def _get_body(self, key: str) -> Optional[bytes]:
+        # The client may decode responses: hand back bytes either way
+        value = self.client.get(key)
+        return value.encode("utf-8") if isinstance(value, str) else value
+
+
+class SimulationJobs:
+    """
+    Runs jobs on a :class:`SimulationPool` and keeps their records in ``store``.
+
+    Tasks of all jobs share ``pool.size`` slots, so jobs together never
+    hold more tasks in the pool than it has workers; the rest of its queue
+    is left to the synchronous endpoints. A job whose task the pool still
+    rejects as full fails, and can be submitted again.
+    """
+
+    def __init__(self, store, pool: SimulationPool, max_active: int = 32, task_timeout: float = 600.0):
+        self.store = store
+        self.pool = pool
+        self.max_active = max_active
+        self.task_timeout = task_timeout
+        self._workers = asyncio.Semaphore(pool.size)
+        self._running: Set[asyncio.Task] = set()
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """The job record; a finished job's result is only in :meth:`response`."""
+        return await self.store.get(job_id)
+
+    async def response(self, job_id: str) -> Optional[bytes]:
+        """
+        The ``/jobs/{job_id}`` JSON body: stored when the job finished, so
+        polls never encode its result again. None for unknown or expired jobs.
+        """
+        record = await self.store.get(job_id)
+        if record is None:
+            return None
+        if record["status"] in _FINISHED:
+            return await self.store.get_body(job_id)
+        return job_body(record)
+
+    async def submit(
+        self,
+        kind: str,
+        payload: Mapping[str, Any],
+        tasks: Sequence[JobTask],
+        combine: Callable[[List[Any]], Dict[str, Any]],
+    ) -> Dict[str, Any]:
+        """
+        Start a job, or return the live record of an identical submission.
+
+        Raises :class:`SimulationJobsBusyError` when too many jobs are active.
+        """
+        record = {
+            "id": job_id(kind, payload),
+            "kind": kind,
+            "status": "queued",
+            "progress": 0.0,
+            "tasks_done": 0,
+            "tasks_total": len(tasks),
+            "submitted_at": time.time(),
+            "finished_at": None,
+            "result": None,
+            "error": None,
+        }
+        existing = await self.store.get(record["id"])
+        if existing is not None and existing["status"] != "failed":
+            SIMULATION_JOBS_DEDUPLICATED.labels(kind).inc()
+            return existing
+        if len(self._running) >= self.max_active:
+            raise SimulationJobsBusyError(f"Too many simulation jobs running ({self.max_active})")
+        existing = await self.store.add(record)
+        if existing is not None:
+            SIMULATION_JOBS_DEDUPLICATED.labels(kind).inc()
+            return existing
+
+        SIMULATION_JOBS_SUBMITTED.labels(kind).inc()
+        task = asyncio.get_running_loop().create_task(self._run(record, tasks, combine))
+        self._running.add(task)
+        task.add_done_callback(self._finished)
+        SIMULATION_JOBS_ACTIVE.set(len(self._running))
+        return record
+
+    def shutdown(self) -> None:
+        """Cancel the running jobs; their records end as failed."""
+        for task in list(self._running):
+            task.cancel()
+
+    async def _run(
+        self, record: Dict[str, Any], tasks: Sequence[JobTask], combine: Callable[[List[Any]], Dict[str, Any]]
+    ) -> None:
+        record["status"] = "running"
+        await self.store.put(record)
+
+        async def run_task(task: JobTask) -> Any:
+            async with self._workers:
+                result = await self.pool.run(task.fn, *task.args, timeout=self.task_timeout, **task.kwargs)
+            record["tasks_done"] += 1
+            record["progress"] = round(record["tasks_done"] / record["tasks_total"], 4)
+            await self.store.put(record)
+            return result
+
+        body = None
+        try:
+            results = await asyncio.gather(*(run_task(task) for task in tasks))
+            done = dict(record, status="done", progress=1.0, finished_at=time.time())
+            # Combined and encoded once, off the event loop
+            body = await asyncio.to_thread(_done_body, done, combine, list(results))
+            record.update(status="done", progress=1.0, finished_at=done["finished_at"])
+        except asyncio.CancelledError:
+            record.update(status="failed", error="The server stopped before the job finished")
+            raise
+        except Exception as e:
+            logger.warning("Simulation job %s failed: %s", record["id"], e)
+            known = (ValueError, SimulationPoolBusyError, SimulationTimeoutError)
+            error = str(e) if isinstance(e, known) else "The simulation failed"
+            record.update(status="failed", error=error)
+        finally:
+            if body is None:
+                record["finished_at"] = time.time()
+                body = job_body(record)
+            # The body first: a poll that sees the finished record finds it
+            await self.store.put_body(record["id"], body)
+            await self.store.put(record)
+
+    def _finished(self, task: asyncio.Task) -> None:
+        self._running.discard(task)
+        SIMULATION_JOBS_ACTIVE.set(len(self._running))
+
+
+def monte_carlo_task(eta_attuale: int, *args: Any, **kwargs: Any) -> Dict[str, object]:
+    """:func:`~simulation_montecarlo_service.monte_carlo`, summarized in the worker."""
+    result = simulation_montecarlo_service.monte_carlo(*args, **kwargs)
+    return simulation_montecarlo_service.monte_carlo_summary(result, eta_attuale)
+
+
+def batch_task(columns: Mapping[str, Optional[Sequence[object]]]) -> Dict[str, object]:
+    """:func:`~simulation_service.simulate_batch`, summarized in the worker."""
+    return simulation_service.batch_summary(simulation_service.simulate_batch(columns))
+
+
+def batch_tasks(columns: Mapping[str, Optional[Sequence[object]]], chunk_size: int) -> List[JobTask]:
+    """Split scenario columns into :func:`batch_task` calls of ``chunk_size`` scenarios."""
+    count = max((len(values) for values in columns.values() if values is not None), default=0)
+    chunk_size = max(1, chunk_size)
+    return [
+        JobTask(batch_task, ({
+            name: None if values is None else values[start:start + chunk_size]
+            for name, values in columns.items()
+        },))
+        for start in range(0, max(count, 1), chunk_size)
+    ]
+
+
+def combine_batches(results: List[Dict[str, object]]) -> Dict[str, object]:
+    """Concatenate :func:`batch_task` summaries, in task order."""
+    columns: Dict[str, list] = {name: [] for name in simulation_service.BATCH_RESULT_COLUMNS}
+    for result in results:
+        for name, values in result["columns"].items():
+            columns[name].extend(values)
+    return {"count": sum(result["count"] for result in results), "columns": columns}
+
+
+def fund_projection_columns(
+    snapshot: FundSnapshot, scenario: Mapping[str, object], periodo: str
+) -> Tuple[List[str], Dict[str, list]]:
+    """
+    One scenario per fund with a published return over ``periodo`` (one of
+    RENDIMENTI_COLUMNS), that return as ``rendimento_atteso``.
+
+    Returns the fund ids and the scenario columns for :func:`simulate_batch`.
+    """
+    if periodo not in RENDIMENTI_COLUMNS:
+        raise ValueError(f"Unknown periodo: {periodo}. Use one of {', '.join(RENDIMENTI_COLUMNS)}")
+    returns = snapshot.columns[periodo]
+    rows = np.flatnonzero(~np.isnan(returns))
+    columns: Dict[str, list] = {
+        name: [scenario.get(name, simulation_service.SCENARIO_DEFAULTS.get(name))] * rows.size
+        for name in simulation_service.SCENARIO_COLUMNS
+    }
+    columns["rendimento_atteso"] = returns[rows].tolist()
+    return snapshot.columns["id"][rows].tolist(), columns
+
+
+def combine_fund_projection(fund_ids: List[str], results: List[Dict[str, object]]) -> Dict[str, object]:
+    """:func:`combine_batches` with the fund id of each scenario."""
+    combined = combine_batches(results)
+    combined["ids"] = fund_ids
+    return combined
+
+
+def job_summary(record: Mapping[str, Any]) -> Dict[str, Any]:
+    """Serialize a job record for ``/simulator/jobs``."""
+    return {
+        "job_id": record["id"],
+        "kind": record["kind"],
+        "status": record["status"],
+        "progress": record["progress"],
+        "tasks_done": record["tasks_done"],
+        "tasks_total": record["tasks_total"],
+        "submitted_at": record["submitted_at"],
+        "finished_at": record["finished_at"],
+        "error": record["error"],
+        "result": record["result"],
+    }
+
+
+def job_body(record: Mapping[str, Any]) -> bytes:
+    """:func:`job_summary` encoded as JSON, as the routes' JSONResponse would."""
+    return json.dumps(
+        job_summary(record), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _done_body(
+    record: Dict[str, Any], combine: Callable[[List[Any]], Dict[str, Any]], results: List[Any]
+) -> bytes:
+    return job_body(dict(record, result=combine(results)))
+
+
+_JOBS: Optional[SimulationJobs] = None
+
+
+def get_simulation_jobs() -> SimulationJobs:
+    """Return the process-wide job runner, with the store of ``simulator_jobs_store``."""
+    global _JOBS
+    if _JOBS is None:
+        ttl = settings.simulator_jobs_ttl_seconds
+        if settings.simulator_jobs_store == "redis":
+            from backend.providers.redis import get_redis
+
+            store = RedisJobStore(get_redis(), ttl)
+        else:
+            store = MemoryJobStore(ttl, max_jobs=settings.simulator_jobs_max_stored)
+        _JOBS = SimulationJobs(
+            store,
+            get_simulation_pool(),
+            max_active=settings.simulator_jobs_max_active,
+            task_timeout=settings.simulator_jobs_task_timeout_seconds,
+        )
+    return _JOBS
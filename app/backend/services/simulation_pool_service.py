@@ -0,0 +1,167 @@
+"""
+Simulation pool service - CPU-bound simulator work in worker processes.
+
+Monte Carlo runs and large batches would otherwise block the event loop of
+the (single) uvicorn worker. They are submitted to a process pool instead
+and awaited, so other requests keep being served. The pool admits at most
+``size + max_queue`` tasks at a time, rejecting the rest, and gives up on a
+task after ``timeout`` seconds. Its occupancy is exported as Prometheus
+gauges.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from backend.providers.prometheus import counter, gauge
+from backend.settings import settings
+
+logger = logging.getLogger(__name__)
+
+SIMULATION_POOL_WORKERS = gauge("simulation_pool_workers", "Worker processes of the simulation pool")
+SIMULATION_POOL_BUSY = gauge("simulation_pool_busy_workers", "Simulation pool workers running a task")
+SIMULATION_POOL_QUEUED = gauge("simulation_pool_queued_tasks", "Simulation tasks waiting for a worker")
+SIMULATION_POOL_SATURATION = gauge(
+    "simulation_pool_saturation",
+    "Admitted simulation tasks over the pool capacity (workers + queue depth)",
+)
+SIMULATION_POOL_REJECTED = counter(
+    "simulation_pool_rejected", "Simulation tasks rejected because the pool was full"
+)
+SIMULATION_POOL_TIMEOUTS = counter("simulation_pool_timeouts", "Simulation tasks that exceeded their timeout")
+
+
+class SimulationPoolBusyError(RuntimeError):
+    """Raised when the pool already holds ``size + max_queue`` tasks."""
+
+
+class SimulationTimeoutError(RuntimeError):
+    """Raised when a task does not finish within its timeout."""
+
+
+class SimulationPool:
+    """
+    Bounded process pool for simulator tasks.
+
+    Workers are started with ``spawn`` (the parent runs threads) when the
+    first task arrives or on :meth:`start`; after :meth:`shutdown` tasks are
+    rejected until :meth:`start` is called again. A task that times out while
+    queued is cancelled; one that is already running cannot be interrupted
+    and keeps its worker until it finishes, so it still counts against the
+    capacity.
+    """
+
+    def __init__(self, size: int = 0, max_queue: int = 16, timeout: float = 30.0):
+        self.size = size if size > 0 else (os.cpu_count() or 1)
+        self.max_queue = max(0, max_queue)
+        self.timeout = timeout
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._admitted = 0
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.size + self.max_queue
+
+    @property
+    def admitted(self) -> int:
+        """Tasks running or queued."""
+        return self._admitted
+
+    def start(self) -> None:
+        with self._lock:
+            self._closed = False
+            self._start()
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._closed = True
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            SIMULATION_POOL_WORKERS.set(0)
+
+    async def run(self, fn: Callable[..., Any], *args: Any, timeout: Optional[float] = None, **kwargs: Any) -> Any:
+        """
+        Run ``fn(*args, **kwargs)`` in a worker and await its result.
+
+        ``fn`` and its arguments must be picklable (module-level functions).
+        Raises :class:`SimulationPoolBusyError` when the pool is full or shut
+        down and :class:`SimulationTimeoutError` after ``timeout`` (default:
+        the pool's) seconds; exceptions raised by ``fn`` propagate.
+        """
+        with self._lock:
+            if self._closed:
+                raise SimulationPoolBusyError("Simulation pool is shut down")
+            if self._admitted >= self.capacity:
+                SIMULATION_POOL_REJECTED.inc()
+                raise SimulationPoolBusyError(f"Simulation pool is full ({self.capacity} tasks)")
+            # Started and submitted to under one lock: shutdown() and
+            # _discard() cannot drop the executor in between
+            executor = self._start()
+            try:
+                future = executor.submit(fn, *args, **kwargs)
+            except BrokenProcessPool:
+                self._executor = None
+                logger.error("Simulation pool is broken; restarting it")
+                raise
+            self._admitted += 1
+            self._publish()
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            SIMULATION_POOL_TIMEOUTS.inc()
+            raise SimulationTimeoutError(f"Simulation did not finish within {timeout or self.timeout:g}s") from None
+        except BrokenProcessPool:
+            self._discard(executor)
+            raise
+
+    def _start(self) -> ProcessPoolExecutor:
+        # Called with the lock held
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.size, mp_context=multiprocessing.get_context("spawn")
+            )
+            SIMULATION_POOL_WORKERS.set(self.size)
+            logger.info("Started simulation pool with %d workers", self.size)
+        return self._executor
+
+    def _discard(self, executor: ProcessPoolExecutor) -> None:
+        # A worker died (e.g. killed for memory): the next task starts a new pool
+        with self._lock:
+            if self._executor is executor:
+                logger.error("Simulation pool is broken; restarting it")
+                self._executor = None
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self._admitted -= 1
+            self._publish()
+
+    def _publish(self) -> None:
+        SIMULATION_POOL_BUSY.set(min(self._admitted, self.size))
+        SIMULATION_POOL_QUEUED.set(max(0, self._admitted - self.size))
+        SIMULATION_POOL_SATURATION.set(self._admitted / self.capacity)
+
+
+_POOL = SimulationPool(
+    size=settings.simulator_pool_size,
+    max_queue=settings.simulator_pool_max_queue,
+    timeout=settings.simulator_pool_timeout_seconds,
+)
+
+
+def get_simulation_pool() -> SimulationPool:
+    """Return the process-wide simulation pool."""
+    return _POOL
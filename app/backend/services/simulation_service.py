@@ -0,0 +1,217 @@
+"""
+Simulation service - pension accumulation (montante) paths in closed form.
+
+The yearly recurrence ``M_t = (M_{t-1} + C) * g`` with ``g = 1 + r`` solves to
+``M_t = M_0 * g^t + C * g * (g^t - 1) / (g - 1)``. The growth factors ``g^t``
+come from one cumulative product, so a whole path - or many paths at once,
+broadcast over rates and contributions - costs a few array operations
+whatever the horizon. Batches of scenarios with their own horizons use
+``g ** years`` directly and are evaluated column by column.
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from typing import Dict, List, Mapping, Optional, Sequence
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Average TFR revaluation over the last 10 years (TFR_RATES.ultimi10Anni in simulatorCalc.ts)
+TFR_RATE = 2.91
+
+# Upper bound of each IRPEF bracket and its rate; the last bracket is open
+IRPEF_BRACKETS = ((15000.0, 23.0), (28000.0, 25.0), (50000.0, 35.0), (np.inf, 43.0))
+
+# Scenario columns of simulate_batch (the SimulationRequest fields) and the
+# default of the optional ones
+SCENARIO_COLUMNS = (
+    "eta_attuale", "eta_pensione", "contributo_mensile", "contributo_azienda", "montante_attuale",
+    "tfr_to_fund", "tfr_annuale", "rendimento_atteso", "reddito_annuo", "anni_contribuzione",
+)
+SCENARIO_DEFAULTS = {"montante_attuale": 0.0, "tfr_to_fund": True, "tfr_annuale": 0.0, "rendimento_atteso": 3.0}
+
+# Result columns of simulate_batch (the SimulationResponse totals plus the
+# con fiscale and TFR finals)
+BATCH_RESULT_COLUMNS = (
+    "montante_finale", "anni_accumulo", "contributo_totale", "rendimento_totale",
+    "risparmio_fiscale_annuo", "risparmio_fiscale_totale", "aliquota_irpef",
+    "aliquota_pensione", "tassazione_stimata", "netto_stimato",
+    "montante_con_fiscale", "montante_tfr",
+)
+
+
+@dataclass(frozen=True)
+class MontantePaths:
+    """
+    Year-by-year accumulation of one simulation, year 0 included.
+
+    ``senza_fiscale`` reinvests nothing, ``con_fiscale`` also pays the yearly
+    tax saving into the fund, ``tfr`` leaves the contributions in the TFR.
+    """
+
+    anni: np.ndarray
+    contributi: np.ndarray
+    senza_fiscale: np.ndarray
+    con_fiscale: np.ndarray
+    tfr: np.ndarray
+
+
+def growth_factors(rate: np.ndarray, years: int) -> np.ndarray:
+    """``(1 + rate/100) ** t`` for t = 0..years, on a new last axis."""
+    growth = 1.0 + np.asarray(rate, dtype=np.float64) / 100.0
+    factors = np.empty(growth.shape + (years + 1,))
+    factors[..., 0] = 1.0
+    np.cumprod(np.broadcast_to(growth[..., None], growth.shape + (years,)), axis=-1, out=factors[..., 1:])
+    return factors
+
+
+def accumulate(initial: np.ndarray, contribution: np.ndarray, rate: np.ndarray, years: int) -> np.ndarray:
+    """
+    Montante after t = 0..years yearly contributions, each paid at the start
+    of the year and grown at ``rate`` percent.
+
+    Inputs broadcast together; the result has their shape plus a last axis
+    of length ``years + 1``.
+    """
+    factors = growth_factors(rate, years)
+    growth = 1.0 + np.asarray(rate, dtype=np.float64)[..., None] / 100.0
+    initial = np.asarray(initial, dtype=np.float64)[..., None]
+    contribution = np.asarray(contribution, dtype=np.float64)[..., None]
+    return initial * factors + contribution * _annuity(growth, factors, np.arange(years + 1))
+
+
+def final_montante(initial: np.ndarray, contribution: np.ndarray, rate: np.ndarray, years: np.ndarray) -> np.ndarray:
+    """Last value of :func:`accumulate`, with a horizon per element."""
+    growth = 1.0 + np.asarray(rate, dtype=np.float64) / 100.0
+    factors = np.power(growth, years)
+    return np.asarray(initial, dtype=np.float64) * factors + np.asarray(contribution) * _annuity(growth, factors, years)
+
+
+def _annuity(growth: np.ndarray, factors: np.ndarray, years: np.ndarray) -> np.ndarray:
+    # g + g^2 + ... + g^t, i.e. g (g^t - 1) / (g - 1), or t when g == 1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(growth == 1.0, years, growth * (factors - 1.0) / (growth - 1.0))
+
+
+def simulate_montante(
+    montante_iniziale: float,
+    contributo_annuo: float,
+    rendimento: float,
+    anni: int,
+    risparmio_fiscale_annuo: float = 0.0,
+    tfr_rate: float = TFR_RATE,
+) -> MontantePaths:
+    """The senza fiscale, con fiscale and TFR paths of one simulation, computed together."""
+    paths = accumulate(
+        montante_iniziale,
+        np.array([contributo_annuo, contributo_annuo + risparmio_fiscale_annuo, contributo_annuo]),
+        np.array([rendimento, rendimento, tfr_rate]),
+        anni,
+    )
+    t = np.arange(anni + 1)
+    return MontantePaths(
+        anni=t,
+        contributi=montante_iniziale + contributo_annuo * t,
+        senza_fiscale=paths[0],
+        con_fiscale=paths[1],
+        tfr=paths[2],
+    )
+
+
+def montante_chart(paths: MontantePaths, eta_attuale: int) -> List[Dict[str, float]]:
+    """One point per year after year 0, labelled by age, rounded to cents."""
+    columns = (
+        (eta_attuale + paths.anni[1:]).tolist(),
+        np.round(paths.senza_fiscale[1:], 2).tolist(),
+        np.round(paths.contributi[1:], 2).tolist(),
+        np.round(paths.con_fiscale[1:], 2).tolist(),
+        np.round(paths.tfr[1:], 2).tolist(),
+    )
+    keys = ("anno", "montante", "contributi", "montante_con_fiscale", "montante_tfr")
+    return [dict(zip(keys, point)) for point in zip(*columns)]
+
+
+def aliquota_irpef(reddito: np.ndarray) -> np.ndarray:
+    """Marginal IRPEF rate (percent) for an annual income."""
+    bounds = np.array([bound for bound, _ in IRPEF_BRACKETS[:-1]])
+    rates = np.array([rate for _, rate in IRPEF_BRACKETS])
+    return rates[np.searchsorted(bounds, reddito, side="left")]
+
+
+def aliquota_pensione(anni_contribuzione: np.ndarray) -> np.ndarray:
+    """
+    Withdrawal tax rate (percent): 15% up to 15 years of contribution, then
+    0.3 points less per year down to 9%.
+    """
+    return np.clip(15.0 - (np.asarray(anni_contribuzione, dtype=np.float64) - 15.0) * 0.3, 9.0, 15.0)
+
+
+def simulate_batch(columns: Mapping[str, Optional[Sequence[object]]]) -> Dict[str, np.ndarray]:
+    """
+    Evaluate many scenarios at once, as ``/simulator/calculate`` would one by one.
+
+    ``columns`` maps each of :data:`SCENARIO_COLUMNS` to one value per
+    scenario; the columns of :data:`SCENARIO_DEFAULTS` may be omitted (None)
+    and a null ``tfr_annuale`` counts as 0. Returns the
+    :data:`BATCH_RESULT_COLUMNS` as arrays. Raises ValueError when the
+    columns differ in length or a retirement age is not after the current age.
+    """
+    sizes = {len(values) for values in columns.values() if values is not None}
+    if len(sizes) > 1:
+        raise ValueError("All scenario columns must have the same length")
+    size = sizes.pop() if sizes else 0
+    missing = [name for name in SCENARIO_COLUMNS if columns.get(name) is None and name not in SCENARIO_DEFAULTS]
+    if missing:
+        raise ValueError(f"Missing scenario columns: {', '.join(missing)}")
+
+    def column(name: str, dtype: type) -> np.ndarray:
+        values = columns.get(name)
+        if values is None:
+            return np.full(size, SCENARIO_DEFAULTS[name], dtype=dtype)
+        return np.asarray(values, dtype=dtype)
+
+    anni = column("eta_pensione", np.int64) - column("eta_attuale", np.int64)
+    invalid = np.flatnonzero(anni <= 0)
+    if invalid.size:
+        rows = ", ".join(str(row) for row in invalid[:10].tolist())
+        raise ValueError(f"Retirement age must be greater than current age (scenarios {rows})")
+
+    montante_attuale = column("montante_attuale", np.float64)
+    tfr = np.nan_to_num(column("tfr_annuale", np.float64), nan=0.0) * column("tfr_to_fund", bool)
+    contributo_annuo = (column("contributo_mensile", np.float64) + column("contributo_azienda", np.float64)) * 12 + tfr
+    rendimento = column("rendimento_atteso", np.float64)
+
+    irpef = aliquota_irpef(column("reddito_annuo", np.float64))
+    risparmio_annuo = contributo_annuo * irpef / 100
+    montante = final_montante(montante_attuale, contributo_annuo, rendimento, anni)
+    contributo_totale = montante_attuale + contributo_annuo * anni
+    pensione = aliquota_pensione(column("anni_contribuzione", np.int64))
+    tassazione = montante * pensione / 100
+    return {
+        "montante_finale": montante,
+        "anni_accumulo": anni,
+        "contributo_totale": contributo_totale,
+        "rendimento_totale": montante - contributo_totale,
+        "risparmio_fiscale_annuo": risparmio_annuo,
+        "risparmio_fiscale_totale": risparmio_annuo * anni,
+        "aliquota_irpef": irpef,
+        "aliquota_pensione": pensione,
+        "tassazione_stimata": tassazione,
+        "netto_stimato": montante - tassazione,
+        "montante_con_fiscale": final_montante(montante_attuale, contributo_annuo + risparmio_annuo, rendimento, anni),
+        "montante_tfr": final_montante(montante_attuale, contributo_annuo, TFR_RATE, anni),
+    }
+
+
+def batch_summary(results: Mapping[str, np.ndarray]) -> Dict[str, object]:
+    """Serialize :func:`simulate_batch` columns, amounts rounded to cents."""
+    return {
+        "count": int(results["anni_accumulo"].size),
+        "columns": {
+            name: (results[name] if name == "anni_accumulo" else np.round(results[name], 2)).tolist()
+            for name in BATCH_RESULT_COLUMNS
+        },
+    }
@@ -98,6 +98,47 @@ class Settings(BaseSettings):
     telegram_bot_token: Optional[str] = None
     telegram_chat_id: Optional[str] = None
     feedback_require_auth: bool = False
+
+    # Fund dataset (COVIP CSV exports); defaults to the repository data/ folder
+    funds_data_dir: Optional[str] = None
+    # Compiled binary snapshot mapped at startup when present (scripts/build_fund_snapshot.py)
+    funds_snapshot_path: Optional[str] = None
+    funds_recommendation_cache_size: int = 1024
+    funds_compare_max_funds: int = 100
+    # Seconds between checks of funds_data_dir for new CSVs (0 disables polling)
+    funds_reload_interval_seconds: float = 60.0
+    # Dataset versions whose row hashes are kept for /funds/changes delta sync
+    funds_history_size: int = 10
+    # Delta log of every dataset version, for ?as_of= (defaults to <funds_snapshot_path>.history;
+    # point it at a mounted volume to keep it across restarts)
+    funds_history_path: Optional[str] = None
+    # Past dataset versions kept materialized in memory
+    funds_history_cache_size: int = 4
+
+    # Redis (providers/redis.py)
+    redis_url: str = "redis://localhost:6379/0"
+
+    # Pension simulator
+    simulator_batch_max_scenarios: int = 10000
+    simulator_montecarlo_max_paths: int = 10000
+    # Worker processes for Monte Carlo and batch simulations (0 = one per CPU),
+    # tasks allowed to wait for a worker, and seconds before a task is abandoned
+    simulator_pool_size: int = 0
+    simulator_pool_max_queue: int = 16
+    simulator_pool_timeout_seconds: float = 30.0
+    # Background simulation jobs (/simulator/jobs): record store ("memory" or
+    # "redis"), seconds a record is kept after its last update, records kept
+    # in memory (only finished ones make room: new jobs get 503 while all are
+    # queued or running), jobs running at once, seconds per pool task,
+    # scenarios per task
+    simulator_jobs_store: str = "memory"
+    simulator_jobs_ttl_seconds: float = 3600.0
+    simulator_jobs_max_stored: int = 256
+    simulator_jobs_max_active: int = 32
+    simulator_jobs_task_timeout_seconds: float = 600.0
+    simulator_jobs_chunk_size: int = 5000
+    simulator_jobs_max_paths: int = 100000
+    simulator_jobs_max_scenarios: int = 200000
     
     # Component configurations (loaded dynamically)
     _auth_config: Optional[AuthConfig] = None
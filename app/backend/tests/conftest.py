@@ -4,7 +4,7 @@ Pytest configuration and fixtures for the Webapp Factory API tests.
 
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 # Ensure the API package is on the import path for tests
 import os
@@ -233,3 +233,99 @@ def sample_claims():
         plan="pro",
         features=["vector_search"],
     )
+
+
+# Small COVIP-style dataset used by the fund store tests
+FUND_COSTI_CSV = """﻿TYPE;N. ALBO;FONDO;SOCIETA;COMPARTO;CATEGORIA;ISC a 2 anni;ISC a 5 anni;ISC a 10 anni;ISC a 35 anni
+FPN;1;FONDO PENSIONE FONCHIM;;CRESCITA;AZN;0,82;0,44;0,27;0,15
+FPN;1;FONDO PENSIONE FONCHIM;;GARANTITO;GAR;1,23;0,85;0,69;0,57
+FPN;1;FONDO PENSIONE FONCHIM;;STABILITÀ;OBB;0,81;0,43;0,27;0,14
+FPA;12;ARCA PREVIDENZA;ARCA FONDI SGR S.P.A.;CRESCITA;AZN;1,90;1,40;1,20;1,10
+FPA;12;ARCA PREVIDENZA;ARCA FONDI SGR S.P.A.;OBIETTIVO REDDITO;BIL;1,60;1,20;1,00;0,95
+PIP;5001;PIANO INDIVIDUALE ALFA;ALFA VITA S.P.A.;GESTIONE SEPARATA;GAR;2,50;2,10;1,90;1,80
+PIP;5001;PIANO INDIVIDUALE ALFA;ALFA VITA S.P.A.;AZIONARIO;AZN;3,10;2,60;2,30;2,10
+PIP;5002;PIANO INDIVIDUALE BETA;BETA ASSICURAZIONI S.P.A.;BILANCIATO;BIL;2,20;1,70;1,50;1,30
+"""
+
+FUND_RENDIMENTI_CSV = """﻿TYPE;N. ALBO;FONDO;SOCIETA;COMPARTO;CATEGORIA;Ultimo anno;Ultimi 3 anni;Ultimi 5 anni;Ultimi 10 anni;Ultimi 20 anni
+PIP;5001;PIANO INDIVIDUALE ALFA;ALFA VITA S.P.A.;GESTIONE SEPARATA;GAR;2,10;1,80;1,60;1,90;
+PIP;5001;PIANO INDIVIDUALE ALFA;ALFA VITA S.P.A.;AZIONARIO;AZN;9,50;3,10;4,00;3,80;
+FPN;1;FONDO PENSIONE FONCHIM;;GARANTITO;GAR;2,64;1,63;1,17;0,83;
+FPN;1;FONDO PENSIONE FONCHIM;;STABILITÀ;OBB MISTO;5,92;0,61;2,29;2,48;3,16
+FPN;1;FONDO PENSIONE FONCHIM;;CRESCITA;AZN;10,32;2,66;4,51;4,23;4,3
+FPA;12;ARCA PREVIDENZA;ARCA FONDI SGR S.P.A.;CRESCITA;AZN;11,20;3,40;5,10;4,90;
+FPA;12;ARCA PREVIDENZA;ARCA FONDI SGR S.P.A.;OBIETTIVO REDDITO;BIL;6,10;1,20;2,40;2,70;
+PIP;5002;PIANO INDIVIDUALE BETA;BETA ASSICURAZIONI S.P.A.;BILANCIATO;BIL;7,00;;;;
+"""
+
+FUND_INFO_CSV = """﻿TYPE;N. ALBO;FONDO;Sito
+FPN;1;FONDO PENSIONE FONCHIM;fonchim.it
+FPA;12;ARCA PREVIDENZA;arcaprevidenza.it
+"""
+
+FUND_CATEGORIE_CSV = """﻿Fondo Pensione;Categoria/Contratto di Riferimento;Sito Web
+Fonchim;Chimico-farmaceutico, vetro, lampade, coibenti, minero-metallurgico;fonchim.it
+Cometa;Industria metalmeccanica privata;cometafondo.it
+"""
+
+
+@pytest.fixture
+def fund_data_dir(tmp_path):
+    """Directory containing a small COVIP-style fund dataset."""
+    files = {
+        "FP_costi (1).csv": FUND_COSTI_CSV,
+        "FP_data_rendimenti (1).csv": FUND_RENDIMENTI_CSV,
+        "fondi_info.csv": FUND_INFO_CSV,
+        "Fondi di Categoria.csv": FUND_CATEGORIE_CSV,
+    }
+    for name, content in files.items():
+        (tmp_path / name).write_text(content, encoding="utf-8")
+    return tmp_path
+
+
+@pytest.fixture
+def fund_snapshot(fund_data_dir):
+    """Fund snapshot loaded from the small test dataset."""
+    from backend.services.fund_data_service import load_snapshot
+    return load_snapshot(fund_data_dir)
+
+
+@pytest.fixture
+def fund_store(fund_data_dir, monkeypatch):
+    """Process-wide fund store replaced by one over the small test dataset."""
+    from backend.services import fund_data_service
+    store = fund_data_service.FundStore(data_dir=fund_data_dir, snapshot_path=fund_data_dir / "funds.snapshot")
+    store.load()
+    monkeypatch.setattr(fund_data_service, "_STORE", store)
+    return store
+
+
+def _client_as(client, monkeypatch, role: str, plan: str):
+    """Authenticate ``client`` as an active user with ``role`` (auth_required overridden)."""
+    from backend.auth import auth_required
+    from backend.auth.models import AuthClaims
+    from backend.schemas.user import UserProfile
+    user_id = f"{role}_001"
+    claims = AuthClaims(sub=user_id, email=f"{role}@example.com", orgId="test_org",
+                        roles=[role], plan="pro", features=[])
+    profile = UserProfile(id=user_id, email=f"{role}@example.com", name=role.title(),
+                          plan=plan, status="active", roles=[role])
+    monkeypatch.setattr("backend.services.user_service.get_user_by_id", AsyncMock(return_value=profile))
+    app.dependency_overrides[auth_required] = lambda: claims
+    return client
+
+
+@pytest.fixture
+def subscriber_client(client, monkeypatch):
+    """Test client authenticated as an active subscriber (auth_required overridden)."""
+    from backend.auth import auth_required
+    yield _client_as(client, monkeypatch, "subscriber", "full-access")
+    app.dependency_overrides.pop(auth_required, None)
+
+
+@pytest.fixture
+def free_client(client, monkeypatch):
+    """Test client authenticated as an active free user (auth_required overridden)."""
+    from backend.auth import auth_required
+    yield _client_as(client, monkeypatch, "free", "free")
+    app.dependency_overrides.pop(auth_required, None)
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import pytest
+
+
+def _list(client, **params):
+    return client.get("/api/funds/list", params=params)
+
+
+def test_list_pages_through_every_fund(subscriber_client, fund_store):
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, "sort": "-isc35a"}
+        if cursor:
+            params["cursor"] = cursor
+        response = _list(subscriber_client, **params)
+        assert response.status_code == 200
+        assert response.headers["X-Dataset-Version"] == fund_store.version
+        body = response.json()
+        seen += [fund["id"] for fund in body["funds"]]
+        cursor = body["next_cursor"]
+        if not body["has_more"]:
+            break
+    assert len(seen) == len(set(seen)) == body["total"] == fund_store.snapshot.size
+    assert body["sort"] == "-isc35a"
+
+
+def test_list_filters_and_projects(subscriber_client, fund_store):
+    body = _list(subscriber_client, category="AZN", type=["FPN", "FPA"], fields="name,isc35a").json()
+    assert body["total"] == 2
+    assert all(set(fund) == {"id", "pip", "isc"} for fund in body["funds"])
+
+
+def test_free_users_get_the_first_page_only(free_client, fund_store):
+    body = _list(free_client, limit=3).json()
+    assert len(body["funds"]) == 3
+    assert (body["next_cursor"], body["has_more"]) == (None, False)
+    assert body["user_access"]["max_funds"] == 10
+
+    snapshot = fund_store.snapshot
+    _, cursor = snapshot.paginate(snapshot.select({}), 3)
+    assert _list(free_client, limit=3, cursor=cursor).status_code == 403
+
+
+@pytest.mark.parametrize("params, status", [
+    ({"sort": "colour"}, 400),
+    ({"fields": "colour"}, 400),
+    ({"nAlbo": "twelve"}, 422),
+    ({"cursor": "not-a-cursor"}, 400),
+])
+def test_list_rejects_bad_parameters(subscriber_client, fund_store, params, status):
+    assert _list(subscriber_client, **params).status_code == status
+
+
+def test_list_rejects_a_cursor_from_another_sort(subscriber_client, fund_store):
+    cursor = _list(subscriber_client, limit=2, sort="pip").json()["next_cursor"]
+    response = _list(subscriber_client, limit=2, sort="-pip", cursor=cursor)
+    assert response.status_code == 400
+    assert "sort" in response.json()["detail"]
+
+
+def test_list_rejects_a_cursor_from_another_version(subscriber_client, fund_store, fund_data_dir):
+    cursor = _list(subscriber_client, limit=2).json()["next_cursor"]
+    path = fund_data_dir / "FP_costi (1).csv"
+    path.write_text(path.read_text(encoding="utf-8").replace("0,82", "0,83"), encoding="utf-8")
+    assert fund_store.reload_if_changed() is not None
+
+    response = _list(subscriber_client, limit=2, cursor=cursor)
+    assert response.status_code == 409
+
+
+def test_unknown_as_of_version_is_not_found(subscriber_client, fund_store):
+    assert _list(subscriber_client, as_of="0" * 16).status_code == 404
+
+
+def test_export_csv_is_revalidated_by_etag(subscriber_client, fund_store):
+    response = subscriber_client.get("/api/funds/export")
+    assert response.status_code == 200
+    assert response.headers["ETag"] == f'"{fund_store.version}-csv"'
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.text.count("\n") == fund_store.snapshot.size + 1
+
+    for if_none_match in (response.headers["ETag"], f'W/{response.headers["ETag"]}', '"other", *'):
+        cached = subscriber_client.get("/api/funds/export", headers={"If-None-Match": if_none_match})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["ETag"] == response.headers["ETag"]
+
+
+def test_export_etag_depends_on_the_format(subscriber_client, fund_store, monkeypatch):
+    from backend.services import fund_export_service
+    monkeypatch.setattr(fund_export_service, "pa", None)
+    csv_etag = subscriber_client.get("/api/funds/export").headers["ETag"]
+    response = subscriber_client.get("/api/funds/export", params={"format": "arrow"}, headers={"If-None-Match": csv_etag})
+    assert response.status_code == 501
+
+
+@pytest.mark.parametrize("export_format", ["arrow", "parquet"])
+def test_arrow_exports_need_pyarrow(subscriber_client, fund_store, monkeypatch, export_format):
+    from backend.services import fund_export_service
+    monkeypatch.setattr(fund_export_service, "pa", None)
+    response = subscriber_client.get("/api/funds/export", params={"format": export_format})
+    assert response.status_code == 501
+    assert "pyarrow" in response.json()["detail"]
+
+
+def test_export_rejects_unknown_formats(subscriber_client, fund_store):
+    assert subscriber_client.get("/api/funds/export", params={"format": "xml"}).status_code == 422
@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from backend.routes import simulator
+from backend.services import simulation_job_service
+from backend.services.simulation_job_service import MemoryJobStore, SimulationJobs
+from backend.services.simulation_pool_service import SimulationPoolBusyError, SimulationTimeoutError
+
+SCENARIO = {
+    "eta_attuale": 30, "eta_pensione": 67, "contributo_mensile": 100.0, "contributo_azienda": 50.0,
+    "reddito_annuo": 35000.0, "anni_contribuzione": 37,
+}
+
+
+class InlinePool:
+    """Simulation pool stand-in running tasks in the event loop, or failing them with ``error``."""
+
+    size = 1
+
+    def __init__(self, error: Exception = None):
+        self.error = error
+
+    async def run(self, fn, *args, timeout=None, **kwargs):
+        if self.error is not None:
+            raise self.error
+        return fn(*args, **kwargs)
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    pool = InlinePool()
+    monkeypatch.setattr(simulator, "get_simulation_pool", lambda: pool)
+    return pool
+
+
+@pytest.fixture
+def jobs(pool, monkeypatch):
+    jobs = SimulationJobs(MemoryJobStore(ttl=60, max_jobs=4), pool)
+    monkeypatch.setattr(simulation_job_service, "_JOBS", jobs)
+    return jobs
+
+
+def _columns(count):
+    return {name: [value] * count for name, value in SCENARIO.items()}
+
+
+def test_batch_answers_scenarios_and_columns_alike(subscriber_client, pool):
+    by_scenario = subscriber_client.post("/api/simulator/calculate-batch", json={"scenarios": [SCENARIO] * 3})
+    by_column = subscriber_client.post("/api/simulator/calculate-batch", json={"columns": _columns(3)})
+    assert by_scenario.status_code == by_column.status_code == 200
+    assert by_scenario.json() == by_column.json()
+    assert by_scenario.json()["count"] == 3
+
+
+@pytest.mark.parametrize("body, status", [
+    ({}, 400),
+    ({"scenarios": [SCENARIO], "columns": _columns(1)}, 400),
+    ({"columns": dict(_columns(2), eta_attuale=[30])}, 400),
+    ({"scenarios": [dict(SCENARIO, eta_attuale=60, eta_pensione=55)]}, 400),
+    ({"scenarios": [dict(SCENARIO, eta_pensione=25)]}, 422),
+])
+def test_batch_rejects_bad_requests(subscriber_client, pool, body, status):
+    assert subscriber_client.post("/api/simulator/calculate-batch", json=body).status_code == status
+
+
+def test_batch_limits_the_scenarios(subscriber_client, pool, monkeypatch):
+    monkeypatch.setattr(simulator.settings, "simulator_batch_max_scenarios", 2)
+    response = subscriber_client.post("/api/simulator/calculate-batch", json={"columns": _columns(3)})
+    assert response.status_code == 400
+    assert "Maximum 2" in response.json()["detail"]
+
+
+def test_montecarlo_returns_reproducible_percentiles(subscriber_client, pool):
+    body = dict(SCENARIO, allocazione={"AZN": 0.6, "OBB": 0.4}, n_paths=200, seed=7)
+    first = subscriber_client.post("/api/simulator/montecarlo", json=body)
+    second = subscriber_client.post("/api/simulator/montecarlo", json=body)
+    assert first.status_code == second.status_code == 200
+    assert first.json() == second.json()
+    bands = first.json()["montante_finale"]
+    assert bands["p5"] <= bands["p50"] <= bands["p95"]
+    assert first.json()["anni_accumulo"] == 37
+
+
+@pytest.mark.parametrize("changes, status", [
+    ({"eta_attuale": 60, "eta_pensione": 55}, 400),
+    ({"n_paths": 20000}, 400),
+    ({"allocazione": {"CRYPTO": 1.0}}, 400),
+    ({"n_paths": 10}, 422),
+])
+def test_montecarlo_rejects_bad_requests(subscriber_client, pool, changes, status):
+    body = dict(SCENARIO, **changes)
+    assert subscriber_client.post("/api/simulator/montecarlo", json=body).status_code == status
+
+
+@pytest.mark.parametrize("path, body", [
+    ("/api/simulator/calculate-batch", {"scenarios": [SCENARIO]}),
+    ("/api/simulator/montecarlo", dict(SCENARIO, n_paths=100)),
+])
+def test_full_pool_answers_503_and_slow_tasks_504(subscriber_client, pool, path, body):
+    pool.error = SimulationPoolBusyError("Simulation pool is busy")
+    busy = subscriber_client.post(path, json=body)
+    assert busy.status_code == 503
+    assert busy.headers["Retry-After"] == "1"
+
+    pool.error = SimulationTimeoutError("Simulation took longer than 30s")
+    assert subscriber_client.post(path, json=body).status_code == 504
+
+
+def test_jobs_are_accepted_once_and_polled(subscriber_client, jobs):
+    body = {"batch": {"columns": _columns(3)}}
+    first = subscriber_client.post("/api/simulator/jobs", json=body)
+    second = subscriber_client.post("/api/simulator/jobs", json=body)
+    assert first.status_code == second.status_code == 202
+    assert first.json()["job_id"] == second.json()["job_id"]
+    assert first.json()["kind"] == "batch"
+
+    polled = subscriber_client.get(f"/api/simulator/jobs/{first.json()['job_id']}")
+    assert polled.status_code == 200
+    assert polled.json()["job_id"] == first.json()["job_id"]
+    assert polled.json()["tasks_total"] == 1
+
+
+@pytest.mark.parametrize("body", [
+    {},
+    {"batch": {"columns": _columns(1)}, "montecarlo": SCENARIO},
+])
+def test_jobs_need_exactly_one_kind(subscriber_client, jobs, body):
+    assert subscriber_client.post("/api/simulator/jobs", json=body).status_code == 400
+
+
+def test_unknown_jobs_are_not_found(subscriber_client, jobs):
+    assert subscriber_client.get(f"/api/simulator/jobs/{'0' * 64}").status_code == 404
+
+
+def test_jobs_answer_503_while_the_store_is_full_of_active_jobs(subscriber_client, jobs):
+    for index in range(jobs.store.max_jobs):
+        asyncio.run(jobs.store.put({"id": str(index), "status": "running"}))
+    response = subscriber_client.post("/api/simulator/jobs", json={"batch": {"columns": _columns(1)}})
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+
+
+def test_finished_jobs_are_answered_with_their_stored_body(subscriber_client, jobs):
+    asyncio.run(jobs.store.put_body("a" * 64, b'{"job_id":"aaa","result":{"count":1}}'))
+    asyncio.run(jobs.store.put({"id": "a" * 64, "status": "done"}))
+    response = subscriber_client.get(f"/api/simulator/jobs/{'a' * 64}")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["result"] == {"count": 1}
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from backend.services.fund_analysis_service import analyze_fund, better_alternatives, risk_level
+from backend.services.fund_comparison_service import COMPARISON_METRICS
+from backend.services.fund_data_service import DEFAULT_DATA_DIR, load_snapshot
+
+
+def _percentile(snapshot, fund_id, metric):
+    ranking = snapshot.derived("category_ranking")
+    return ranking.percentiles[snapshot.row_of(fund_id), COMPARISON_METRICS.index(metric)]
+
+
+def test_percentiles_within_categoria(fund_snapshot):
+    # AZN: FONCHIM CRESCITA 4.23, ARCA CRESCITA 4.9, ALFA AZIONARIO 3.8 (10y returns)
+    assert _percentile(fund_snapshot, "12-crescita", "ultimi10Anni") == 100.0
+    assert _percentile(fund_snapshot, "1-crescita", "ultimi10Anni") == 50.0
+    assert _percentile(fund_snapshot, "5001-azionario", "ultimi10Anni") == 0.0
+    # Costs: lower is better
+    assert _percentile(fund_snapshot, "1-crescita", "isc10a") == 100.0
+    assert _percentile(fund_snapshot, "5001-azionario", "isc10a") == 0.0
+
+
+def test_single_fund_and_missing_values(fund_snapshot):
+    # FONCHIM STABILITA is the only OBB MISTO fund
+    assert _percentile(fund_snapshot, "1-stabilit", "isc35a") == 100.0
+    assert math.isnan(_percentile(fund_snapshot, "5002-bilanciato", "ultimi10Anni"))
+
+
+def test_alternatives_come_from_same_categoria_and_score_higher(fund_snapshot):
+    row = fund_snapshot.row_of("5001-azionario")
+    alternatives = fund_snapshot.columns["id"][better_alternatives(fund_snapshot, row)].tolist()
+    assert alternatives == ["1-crescita", "12-crescita"]
+
+    # Best of its categoria: nothing better to suggest
+    assert better_alternatives(fund_snapshot, fund_snapshot.row_of("12-obiettivo-reddito")).size == 0
+
+
+def test_analyze_fund_response(fund_snapshot):
+    analysis = analyze_fund(fund_snapshot, fund_snapshot.row_of("5002-bilanciato"))
+
+    assert analysis["categoria"] == "BIL"
+    assert analysis["peer_count"] == 2
+    assert analysis["performance_score"] is None
+    assert analysis["cost_efficiency"] == 0.0
+    assert analysis["risk_level"] == "medium"
+    assert [alt["id"] for alt in analysis["alternatives"]] == ["12-obiettivo-reddito"]
+    assert set(analysis["percentiles"]) == set(COMPARISON_METRICS)
+
+
+@pytest.mark.parametrize("categoria, level", [("GAR", "low"), ("OBB MISTO", "medium"), ("AZN", "high"), ("XYZ", None)])
+def test_risk_level(categoria, level):
+    assert risk_level(categoria) == level
+
+
+@pytest.mark.skipif(not DEFAULT_DATA_DIR.exists(), reason="repository data/ folder not available")
+def test_percentiles_match_reference_on_repository_dataset():
+    snapshot = load_snapshot(DEFAULT_DATA_DIR)
+    ranking = snapshot.derived("category_ranking")
+    metric = "isc35a"
+    values = snapshot.columns[metric]
+    categories = snapshot.columns["categoria"]
+
+    for row in range(0, snapshot.size, 5):
+        if math.isnan(values[row]):
+            continue
+        peers = [values[i] for i in range(snapshot.size) if categories[i] == categories[row] and not math.isnan(values[i])]
+        not_better = sum(v >= values[row] for v in peers) - 1
+        expected = 100.0 if len(peers) == 1 else 100.0 * not_better / (len(peers) - 1)
+        assert ranking.percentiles[row, COMPARISON_METRICS.index(metric)] == pytest.approx(expected)
+    assert np.isfinite(ranking.score).sum() > 0
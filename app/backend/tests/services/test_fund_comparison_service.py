@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from backend.services.fund_comparison_service import (
+    COMPARISON_METRICS,
+    compare_funds,
+    comparison_summary,
+)
+from backend.services.fund_data_service import DEFAULT_DATA_DIR, load_snapshot
+
+IDS = ["1-garantito", "1-crescita", "12-crescita", "5002-bilanciato"]
+
+
+def _compare(snapshot, ids):
+    rows, missing = snapshot.rows_of(ids)
+    assert not missing
+    return compare_funds(snapshot, rows)
+
+
+def test_ranks_orient_costs_and_returns(fund_snapshot):
+    comparison = _compare(fund_snapshot, IDS)
+    isc35 = COMPARISON_METRICS.index("isc35a")
+    r10 = COMPARISON_METRICS.index("ultimi10Anni")
+
+    values = comparison.values[:, isc35]
+    assert comparison.ranks[np.argmin(values), isc35] == 1
+    assert comparison.ranks[np.argmax(values), isc35] == len(IDS)
+
+    # 5002-bilanciato has no 10y return: no rank, and never the best
+    assert math.isnan(comparison.ranks[3, r10])
+    assert comparison.best_row("ultimi10Anni") == fund_snapshot.row_of("12-crescita")
+
+
+def test_ties_share_the_lowest_rank(fund_snapshot):
+    # FONCHIM CRESCITA and STABILITA share ISC 10a = 0.27
+    comparison = _compare(fund_snapshot, ["1-stabilit", "1-crescita", "1-garantito"])
+    isc10 = COMPARISON_METRICS.index("isc10a")
+    assert comparison.ranks[:, isc10].tolist() == [1.0, 1.0, 3.0]
+
+
+def test_deltas_and_cost_drag(fund_snapshot):
+    comparison = _compare(fund_snapshot, IDS)
+    costs = comparison.values[:, : 4]
+    returns = comparison.values[:, 4:]
+
+    assert np.nanmin(comparison.deltas[:, :4], axis=0).tolist() == [0.0] * 4
+    assert (comparison.deltas[:, :4][~np.isnan(costs)] >= 0).all()
+    assert (comparison.deltas[:, 4:][~np.isnan(returns)] <= 0).all()
+
+    row = IDS.index("1-garantito")
+    isc35 = comparison.values[row, COMPARISON_METRICS.index("isc35a")]
+    assert comparison.cost_drag[row, 3] == pytest.approx(100 * (1 - (1 - isc35 / 100) ** 35))
+    assert np.nanmin(comparison.excess_cost_drag, axis=0) == pytest.approx([0.0] * 4)
+
+
+def test_summary_shape(fund_snapshot):
+    rows, _ = fund_snapshot.rows_of(IDS)
+    summary = comparison_summary(fund_snapshot, compare_funds(fund_snapshot, rows))
+
+    assert summary["lowest_cost_metric"] == "isc35a"
+    assert summary["best_performance_metric"] == "ultimi20Anni"
+    assert summary["best_performance"] == "1-crescita"
+    assert [entry["id"] for entry in summary["ranking"]] == IDS
+    entry = summary["ranking"][3]
+    assert entry["ranks"]["ultimi10Anni"] is None
+    assert set(entry["cost_drag"]) == {"2", "5", "10", "35"}
+
+
+def test_compare_requires_rows(fund_snapshot):
+    with pytest.raises(ValueError):
+        compare_funds(fund_snapshot, np.empty(0, dtype=np.intp))
+
+
+@pytest.mark.skipif(not DEFAULT_DATA_DIR.exists(), reason="repository data/ folder not available")
+def test_ranks_match_pairwise_reference_on_repository_dataset():
+    snapshot = load_snapshot(DEFAULT_DATA_DIR)
+    rows = np.arange(0, snapshot.size, 7)
+    comparison = compare_funds(snapshot, rows)
+
+    for j, metric in enumerate(COMPARISON_METRICS):
+        values = snapshot.columns[metric][rows]
+        lower = metric.startswith("isc")
+        for i, value in enumerate(values):
+            if math.isnan(value):
+                assert math.isnan(comparison.ranks[i, j])
+                continue
+            better = [v for v in values if not math.isnan(v) and (v < value if lower else v > value)]
+            assert comparison.ranks[i, j] == 1 + len(better)
@@ -0,0 +1,335 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from backend.services.fund_data_service import (
+    DEFAULT_DATA_DIR,
+    DEFAULT_SORT,
+    FundDataError,
+    FundStore,
+    InvalidCursorError,
+    StaleCursorError,
+    encode_cursor,
+    load_snapshot,
+    open_snapshot_file,
+    parse_fields,
+    write_snapshot_file,
+)
+
+
+def test_load_snapshot_joins_costs_and_returns(fund_snapshot):
+    assert fund_snapshot.size == 8
+    # Ordered by TYPE (FPN, FPA, PIP) then N. ALBO, preserving the returns file order
+    assert fund_snapshot.columns["type"].tolist() == ["FPN"] * 3 + ["FPA"] * 2 + ["PIP"] * 3
+    assert fund_snapshot.columns["id"][:3].tolist() == ["1-garantito", "1-stabilit", "1-crescita"]
+    assert fund_snapshot.columns["isc35a"].dtype == np.float64
+
+
+def test_categoria_comes_from_returns_file(fund_snapshot):
+    row = fund_snapshot.row_of("1-stabilit")
+    assert fund_snapshot.columns["categoria"][row] == "OBB MISTO"
+
+
+def test_to_record_matches_frontend_shape(fund_snapshot):
+    record = fund_snapshot.to_record(fund_snapshot.row_of("1-garantito"))
+
+    assert record["pip"] == "FONDO PENSIONE FONCHIM"
+    assert record["societa"] is None
+    assert record["isc"] == {"isc2a": 1.23, "isc5a": 0.85, "isc10a": 0.69, "isc35a": 0.57}
+    assert record["costoAnnuo"] == 0.85
+    assert record["rendimenti"]["ultimi20Anni"] is None
+    assert record["sitoWeb"] == "fonchim.it"
+    assert record["categoriaContratto"].startswith("Chimico-farmaceutico")
+
+
+def test_contract_category_only_for_fpn(fund_snapshot):
+    record = fund_snapshot.to_record(fund_snapshot.row_of("12-crescita"))
+    assert record["categoriaContratto"] is None
+    assert record["sitoWeb"] == "arcaprevidenza.it"
+
+
+def test_missing_numbers_are_nan(fund_snapshot):
+    row = fund_snapshot.row_of("5002-bilanciato")
+    assert math.isnan(fund_snapshot.columns["ultimi10Anni"][row])
+
+
+def test_rows_of_reports_missing_ids(fund_snapshot):
+    rows, missing = fund_snapshot.rows_of(["1-crescita", "unknown", "12-crescita"])
+    assert rows.tolist() == [2, 3]
+    assert missing == ["unknown"]
+
+
+def test_columns_are_read_only(fund_snapshot):
+    with pytest.raises(ValueError):
+        fund_snapshot.columns["isc35a"][0] = 0.0
+
+
+def test_version_changes_with_content(fund_data_dir):
+    before = load_snapshot(fund_data_dir).version
+    costi = fund_data_dir / "FP_costi (1).csv"
+    costi.write_text(costi.read_text(encoding="utf-8").replace("0,82", "0,83"), encoding="utf-8")
+    assert load_snapshot(fund_data_dir).version != before
+
+
+def test_missing_data_dir_raises(tmp_path):
+    store = FundStore(data_dir=tmp_path)
+    with pytest.raises(FundDataError):
+        store.snapshot
+
+
+@pytest.mark.skipif(not DEFAULT_DATA_DIR.exists(), reason="repository data/ folder not available")
+def test_repository_dataset_loads():
+    snapshot = load_snapshot(DEFAULT_DATA_DIR)
+    assert snapshot.size > 400
+    assert len(snapshot.id_index) == snapshot.size
+
+
+def test_select_without_filters_returns_all_rows(fund_snapshot):
+    assert fund_snapshot.select({}).tolist() == list(range(fund_snapshot.size))
+
+
+def test_select_single_value_uses_postings(fund_snapshot):
+    rows = fund_snapshot.select({"categoria": ["azn"]})
+    assert fund_snapshot.columns["id"][rows].tolist() == ["1-crescita", "12-crescita", "5001-azionario"]
+
+
+def test_select_intersects_dimensions_and_unions_values(fund_snapshot):
+    rows = fund_snapshot.select({"categoria": ["AZN", "BIL"], "type": ["PIP"]})
+    assert fund_snapshot.columns["id"][rows].tolist() == ["5001-azionario", "5002-bilanciato"]
+
+    rows = fund_snapshot.select({"societa": ["Arca Fondi SGR S.p.A."], "categoria": ["GAR"]})
+    assert rows.size == 0
+
+
+def test_select_by_n_albo_accepts_strings_and_ints(fund_snapshot):
+    assert fund_snapshot.select({"nAlbo": ["12"]}).tolist() == fund_snapshot.select({"nAlbo": [12]}).tolist()
+    assert fund_snapshot.select({"nAlbo": [12]}).size == 2
+
+
+def test_select_unknown_value_and_column(fund_snapshot):
+    assert fund_snapshot.select({"type": ["XYZ"]}).size == 0
+    with pytest.raises(ValueError):
+        fund_snapshot.select({"linea": ["CRESCITA"]})
+
+
+def test_empty_societa_is_not_indexed(fund_snapshot):
+    assert "" not in fund_snapshot.indexes["societa"].postings
+    assert None not in fund_snapshot.indexes["societa"].postings
+
+
+def test_paginate_walks_all_rows_with_cursors(fund_snapshot):
+    rows = fund_snapshot.select({})
+    seen = []
+    cursor = None
+    while True:
+        page, cursor = fund_snapshot.paginate(rows, 3, cursor=cursor)
+        seen.extend(page.tolist())
+        if cursor is None:
+            break
+    assert seen == rows.tolist()
+
+
+def test_paginate_with_filters(fund_snapshot):
+    rows = fund_snapshot.select({"categoria": ["AZN"]})
+    first, cursor = fund_snapshot.paginate(rows, 2)
+    second, last_cursor = fund_snapshot.paginate(rows, 2, cursor=cursor)
+    assert first.tolist() + second.tolist() == rows.tolist()
+    assert last_cursor is None
+
+
+def test_paginate_rejects_stale_cursor(fund_snapshot):
+    rows = fund_snapshot.select({})
+    cursor = encode_cursor("old-version", DEFAULT_SORT, "1-crescita")
+    with pytest.raises(StaleCursorError):
+        fund_snapshot.paginate(rows, 3, cursor=cursor)
+
+
+def test_paginate_rejects_malformed_cursor(fund_snapshot):
+    rows = fund_snapshot.select({})
+    with pytest.raises(InvalidCursorError):
+        fund_snapshot.paginate(rows, 3, cursor="not-a-cursor")
+    with pytest.raises(InvalidCursorError):
+        fund_snapshot.paginate(rows, 3, cursor=encode_cursor(fund_snapshot.version, DEFAULT_SORT, "missing"))
+
+
+def _ids(snapshot, rows):
+    return snapshot.columns["id"][rows].tolist()
+
+
+def test_ordering_numeric_puts_nulls_last_in_both_directions(fund_snapshot):
+    ascending = _ids(fund_snapshot, fund_snapshot.ordering("ultimi10Anni").permutation)
+    descending = _ids(fund_snapshot, fund_snapshot.ordering("-ultimi10Anni").permutation)
+
+    assert ascending[0] == "1-garantito"
+    assert ascending[-1] == "5002-bilanciato"
+    assert descending[0] == "12-crescita"
+    assert descending[-1] == "5002-bilanciato"
+
+
+def test_ordering_ties_keep_dataset_order(fund_snapshot):
+    # FONCHIM CRESCITA and STABILITA share ISC 10a = 0.27
+    ordered = _ids(fund_snapshot, fund_snapshot.ordering("isc10a").permutation)
+    assert ordered[:2] == ["1-stabilit", "1-crescita"]
+    ordered = _ids(fund_snapshot, fund_snapshot.ordering("-isc10a").permutation)
+    assert ordered.index("1-stabilit") < ordered.index("1-crescita")
+
+
+def test_ordering_aliases_and_strings(fund_snapshot):
+    assert fund_snapshot.ordering("costoAnnuo").key == "isc5a"
+    names = fund_snapshot.columns["pip"][fund_snapshot.ordering("name").permutation].tolist()
+    assert names == sorted(names, key=str.casefold)
+    # FPN funds have no societa: they sort last
+    ordered = _ids(fund_snapshot, fund_snapshot.ordering("societa").permutation)
+    assert ordered[-3:] == ["1-garantito", "1-stabilit", "1-crescita"]
+
+
+def test_multi_key_ordering_composes_ranks(fund_snapshot):
+    ordering = fund_snapshot.ordering("type, -ultimoAnno")
+    assert ordering.key == "type,-ultimoAnno"
+    assert _ids(fund_snapshot, ordering.permutation) == [
+        "12-crescita", "12-obiettivo-reddito",
+        "1-crescita", "1-stabilit", "1-garantito",
+        "5001-azionario", "5002-bilanciato", "5001-gestione-separata",
+    ]
+    assert fund_snapshot.ordering("type,-ultimoAnno") is ordering
+
+
+def test_ordering_rejects_unknown_key(fund_snapshot):
+    with pytest.raises(ValueError):
+        fund_snapshot.ordering("ramo")
+
+
+def test_select_with_sort_and_cursor(fund_snapshot):
+    rows = fund_snapshot.select({"categoria": ["AZN", "BIL"]}, sort="-isc35a")
+    assert _ids(fund_snapshot, rows) == [
+        "5001-azionario", "5002-bilanciato", "12-crescita", "12-obiettivo-reddito", "1-crescita",
+    ]
+    first, cursor = fund_snapshot.paginate(rows, 2, sort="-isc35a")
+    second, _ = fund_snapshot.paginate(rows, 2, cursor=cursor, sort="-isc35a")
+    assert second.tolist() == rows[2:4].tolist()
+    with pytest.raises(InvalidCursorError):
+        fund_snapshot.paginate(rows, 2, cursor=cursor, sort="isc35a")
+
+
+def _bump_costs(data_dir):
+    costi = data_dir / "FP_costi (1).csv"
+    costi.write_text(costi.read_text(encoding="utf-8").replace("0,82", "0,83"), encoding="utf-8")
+
+
+def _store(data_dir):
+    # Point at a missing compiled snapshot so a locally built one is not mapped
+    return FundStore(data_dir=data_dir, snapshot_path=data_dir / "funds.snapshot")
+
+
+def test_reload_if_changed_swaps_snapshot(fund_data_dir):
+    store = _store(fund_data_dir)
+    before = store.load()
+    assert store.reload_if_changed() is None
+
+    _bump_costs(fund_data_dir)
+    after = store.reload_if_changed()
+
+    assert after is not None and after.version != before.version
+    assert store.snapshot is after
+    assert store.version == after.version
+    # Requests holding the old reference keep a consistent view
+    assert before.to_record(0)["id"] == after.to_record(0)["id"]
+
+
+def test_reload_keeps_current_snapshot_on_bad_files(fund_data_dir):
+    store = _store(fund_data_dir)
+    before = store.load()
+    (fund_data_dir / "FP_costi (1).csv").write_bytes(b"\xff\xfe not a csv")
+
+    with pytest.raises(FundDataError):
+        store.reload_if_changed()
+    assert store.snapshot is before
+    # The rejected files are not parsed again until they change
+    assert store.reload_if_changed() is None
+
+
+def test_install_validates_then_persists_upload(fund_data_dir):
+    store = _store(fund_data_dir)
+    before = store.load()
+    costi = fund_data_dir / "FP_costi (1).csv"
+    original = costi.read_bytes()
+
+    with pytest.raises(FundDataError):
+        store.install({"other.csv": b""})
+    with pytest.raises(FundDataError):
+        store.install({"FP_costi (1).csv": b"\xff"})
+    assert costi.read_bytes() == original
+    assert store.snapshot is before
+
+    updated = store.install({"FP_costi (1).csv": original.replace(b"0,82", b"0,83")})
+    assert updated.version != before.version
+    assert store.snapshot is updated
+    assert b"0,83" in costi.read_bytes()
+    assert store.reload_if_changed() is None
+
+
+def test_snapshot_file_round_trip(fund_snapshot, tmp_path):
+    path = write_snapshot_file(fund_snapshot, tmp_path / "funds.snapshot")
+    mapped = open_snapshot_file(path)
+
+    assert mapped.version == fund_snapshot.version
+    assert mapped.to_records(range(mapped.size)) == fund_snapshot.to_records(range(fund_snapshot.size))
+    assert not mapped.columns["isc10a"].flags.writeable
+    assert mapped.select({"categoria": ["AZN"]}).size == 3
+
+
+def test_corrupt_snapshot_file_raises(fund_snapshot, tmp_path):
+    path = tmp_path / "funds.snapshot"
+    path.write_bytes(b"not a snapshot")
+    with pytest.raises(FundDataError):
+        open_snapshot_file(path)
+
+    write_snapshot_file(fund_snapshot, path)
+    path.write_bytes(path.read_bytes()[:200])
+    with pytest.raises(FundDataError):
+        open_snapshot_file(path)
+
+
+def test_store_maps_compiled_snapshot_then_follows_sources(fund_data_dir, tmp_path):
+    compiled = write_snapshot_file(load_snapshot(fund_data_dir), tmp_path / "funds.snapshot")
+    store = FundStore(data_dir=fund_data_dir, snapshot_path=compiled)
+    mapped = store.load()
+
+    assert mapped.version == load_snapshot(fund_data_dir).version
+    # Same content hash as the CSVs: nothing to reparse
+    assert store.reload_if_changed() is None
+    assert store.snapshot is mapped
+
+    _bump_costs(fund_data_dir)
+    reloaded = store.reload_if_changed()
+    assert reloaded is not None and reloaded.version != mapped.version
+
+
+def test_parse_fields():
+    assert parse_fields(None) is None
+    assert parse_fields(" , ") is None
+    assert parse_fields("name, isc35a") == ("id", "isc35a", "pip")
+    assert parse_fields("dominated_by", extra=("dominated_by",)) == ("dominated_by", "id")
+    with pytest.raises(ValueError):
+        parse_fields("isc35a,password")
+
+
+def test_projected_records_only_carry_requested_fields(fund_snapshot):
+    rows = fund_snapshot.select({"type": ["FPN"]})
+    full = fund_snapshot.to_records(rows)
+    projected = fund_snapshot.to_records(rows, fields=parse_fields("name,categoria,isc35a,ultimi10Anni"))
+
+    assert projected[0] == {
+        "id": full[0]["id"],
+        "pip": full[0]["pip"],
+        "categoria": full[0]["categoria"],
+        "isc": {"isc35a": full[0]["isc"]["isc35a"]},
+        "rendimenti": {"ultimi10Anni": full[0]["rendimenti"]["ultimi10Anni"]},
+    }
+    # A whole group, and nullable columns keep their null mapping
+    row = fund_snapshot.row_of("1-crescita")
+    record = fund_snapshot.to_record(row, fields=parse_fields("isc,societa"))
+    assert record == {"id": "1-crescita", "isc": fund_snapshot.to_record(row)["isc"], "societa": None}
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import csv
+import io
+
+import numpy as np
+import pytest
+
+from backend.services import fund_export_service
+from backend.services.fund_export_service import EXPORT_COLUMNS, ExportUnavailableError, export_funds
+
+
+def _payload(export):
+    return b"".join(export.chunks)
+
+
+def test_csv_export_has_one_flat_row_per_fund(fund_snapshot):
+    export = export_funds(fund_snapshot, "csv")
+    rows = list(csv.DictReader(io.StringIO(_payload(export).decode("utf-8"))))
+
+    assert export.filename == f"funds-{fund_snapshot.version}.csv"
+    assert [r["id"] for r in rows] == fund_snapshot.columns["id"].tolist()
+    crescita = next(r for r in rows if r["id"] == "1-crescita")
+    assert crescita["isc10a"] == "0.27"
+    assert crescita["societa"] == ""
+    # Missing values are empty cells
+    bilanciato = next(r for r in rows if r["id"] == "5002-bilanciato")
+    assert bilanciato["ultimi10Anni"] == ""
+
+
+def test_csv_export_streams_in_batches(fund_snapshot):
+    chunks = list(fund_export_service.iter_csv(fund_snapshot, batch_rows=3))
+    assert len(chunks) == 3
+    assert chunks[0].decode("utf-8").splitlines()[0] == ",".join(EXPORT_COLUMNS)
+
+
+def test_unknown_format(fund_snapshot):
+    with pytest.raises(ValueError):
+        export_funds(fund_snapshot, "xml")
+
+
+def test_arrow_formats_need_pyarrow(fund_snapshot, monkeypatch):
+    monkeypatch.setattr(fund_export_service, "pa", None)
+    with pytest.raises(ExportUnavailableError):
+        export_funds(fund_snapshot, "parquet")
+    # CSV does not depend on it
+    assert _payload(export_funds(fund_snapshot, "csv"))
+
+
+def test_arrow_export_round_trip_shares_numeric_buffers(fund_snapshot):
+    pa = pytest.importorskip("pyarrow")
+    table = pa.ipc.open_stream(_payload(export_funds(fund_snapshot, "arrow"))).read_all()
+
+    assert table.column_names == list(EXPORT_COLUMNS)
+    assert table.schema.metadata[b"dataset_version"] == fund_snapshot.version.encode()
+    assert table.column("ultimi10Anni").null_count == int(np.isnan(fund_snapshot.columns["ultimi10Anni"]).sum())
+    assert table.column("nAlbo").to_pylist() == fund_snapshot.columns["nAlbo"].tolist()
+
+    cached = fund_snapshot.derived("export_arrow_table").column("isc35a").chunk(0)
+    assert np.shares_memory(np.frombuffer(cached.buffers()[1], dtype="<f8"), fund_snapshot.columns["isc35a"])
+
+
+def test_parquet_export_round_trip(fund_snapshot):
+    pytest.importorskip("pyarrow")
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(io.BytesIO(_payload(export_funds(fund_snapshot, "parquet"))))
+    assert table.num_rows == fund_snapshot.size
+    assert table.column("id").to_pylist() == fund_snapshot.columns["id"].tolist()
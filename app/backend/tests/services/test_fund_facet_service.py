@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.services.fund_facet_service import facet_counts
+
+
+def _counts(facet):
+    return {v["value"]: v["count"] for v in facet}
+
+
+def test_counts_without_selection(fund_snapshot):
+    facets = facet_counts(fund_snapshot)
+
+    assert facets["total"] == fund_snapshot.size
+    assert [v["value"] for v in facets["types"]] == ["FPN", "FPA", "PIP"]
+    assert _counts(facets["types"]) == {"FPN": 3, "FPA": 2, "PIP": 3}
+    assert _counts(facets["categories"])["AZN"] == 3
+    # Funds without a societa are not counted under an empty company
+    assert "" not in _counts(facets["companies"])
+    assert _counts(facets["contract_categories"]) == {
+        "Chimico-farmaceutico, vetro, lampade, coibenti, minero-metallurgico": 3,
+    }
+
+
+def test_counts_follow_the_other_facets(fund_snapshot):
+    facets = facet_counts(fund_snapshot, {"type": ["FPA"]})
+
+    assert facets["total"] == 2
+    # AZN (1) given type=FPA; categorie without FPA funds stay listed at 0
+    assert _counts(facets["categories"]) == {"AZN": 1, "BIL": 1, "GAR": 0, "OBB MISTO": 0}
+    # The selected facet keeps the counts of its alternatives
+    assert _counts(facets["types"]) == {"FPN": 3, "FPA": 2, "PIP": 3}
+    assert [v["value"] for v in facets["types"] if v["selected"]] == ["FPA"]
+
+
+def test_multiple_values_are_ored_and_facets_intersected(fund_snapshot):
+    facets = facet_counts(fund_snapshot, {"type": ["fpa", "PIP"], "categoria": ["AZN"]})
+
+    assert facets["total"] == 2
+    assert _counts(facets["types"]) == {"FPN": 1, "FPA": 1, "PIP": 1}
+    assert _counts(facets["categories"])["GAR"] == 1
+    assert {v["value"] for v in facets["types"] if v["selected"]} == {"FPA", "PIP"}
+
+
+def test_unknown_filter_column(fund_snapshot):
+    with pytest.raises(ValueError):
+        facet_counts(fund_snapshot, {"pip": ["X"]})
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import itertools
+import math
+
+import numpy as np
+import pytest
+
+from backend.services.fund_data_service import DEFAULT_DATA_DIR, ISC_COLUMNS, RENDIMENTI_COLUMNS, load_snapshot
+from backend.services.fund_frontier_service import (
+    NOT_DOMINATED,
+    NOT_RANKED,
+    dominated_by,
+    frontier_summary,
+    get_frontier,
+    pareto_sweep,
+)
+
+
+def _dominates(c1, r1, c2, r2):
+    return c1 <= c2 and r1 >= r2 and (c1 < c2 or r1 > r2)
+
+
+def test_sweep_handles_ties_and_duplicates():
+    cost = np.array([1.0, 1.0, 2.0, 0.5, 2.0, 1.0])
+    returns = np.array([3.0, 3.0, 4.0, 1.0, 3.0, 2.0])
+    dominators = pareto_sweep(cost, returns)
+
+    # Identical points do not dominate each other
+    assert dominators[0] == NOT_DOMINATED and dominators[1] == NOT_DOMINATED
+    assert dominators[2] == NOT_DOMINATED
+    assert dominators[3] == NOT_DOMINATED
+    # Same cost with a lower return, and same return at a higher cost
+    assert dominators[4] == 2
+    assert dominators[5] in (0, 1)
+
+
+def test_sweep_matches_brute_force_on_random_points():
+    rng = np.random.default_rng(7)
+    cost = rng.integers(0, 6, 200).astype(float)
+    returns = rng.integers(0, 6, 200).astype(float)
+    dominators = pareto_sweep(cost, returns)
+
+    for j in range(cost.size):
+        dominated = any(_dominates(cost[i], returns[i], cost[j], returns[j]) for i in range(cost.size))
+        assert (dominators[j] != NOT_DOMINATED) == dominated
+        if dominated:
+            i = dominators[j]
+            assert _dominates(cost[i], returns[i], cost[j], returns[j])
+
+
+def test_frontier_per_categoria(fund_snapshot):
+    frontier = get_frontier(fund_snapshot, "isc10a", "ultimi10Anni")
+    ids = fund_snapshot.columns["id"]
+
+    # AZN: FONCHIM CRESCITA (cheapest), ARCA CRESCITA (best return); ALFA AZIONARIO dominated
+    azn = frontier.frontiers["AZN"]
+    assert ids[azn].tolist() == ["1-crescita", "12-crescita"]
+    assert frontier.dominators[fund_snapshot.row_of("5001-azionario")] == fund_snapshot.row_of("12-crescita")
+    # BETA BILANCIATO has no 10y return
+    assert frontier.dominators[fund_snapshot.row_of("5002-bilanciato")] == NOT_RANKED
+
+
+def test_frontier_summary_and_dominated_by(fund_snapshot):
+    frontier = get_frontier(fund_snapshot)
+    summary = frontier_summary(fund_snapshot, frontier, ["azn", "BIL"])
+    assert [entry["categoria"] for entry in summary] == ["AZN", "BIL"]
+    assert summary[0]["dominated_count"] == 1
+    assert summary[1]["unranked_count"] == 1
+
+    pairs = dominated_by(fund_snapshot, fund_snapshot.row_of("5001-azionario"))
+    assert {"cost": "isc10a", "returns": "ultimi10Anni", "fund_id": "12-crescita"} in pairs
+    assert dominated_by(fund_snapshot, fund_snapshot.row_of("1-stabilit")) == []
+
+
+def test_get_frontier_rejects_unknown_metrics(fund_snapshot):
+    with pytest.raises(ValueError):
+        get_frontier(fund_snapshot, "ultimi10Anni", "isc10a")
+
+
+@pytest.mark.skipif(not DEFAULT_DATA_DIR.exists(), reason="repository data/ folder not available")
+def test_frontiers_match_brute_force_on_repository_dataset():
+    snapshot = load_snapshot(DEFAULT_DATA_DIR)
+    categories = snapshot.columns["categoria"]
+    for cost_metric, return_metric in itertools.product(ISC_COLUMNS[::3], RENDIMENTI_COLUMNS[::2]):
+        frontier = get_frontier(snapshot, cost_metric, return_metric)
+        cost, returns = snapshot.columns[cost_metric], snapshot.columns[return_metric]
+        for j in range(0, snapshot.size, 3):
+            if math.isnan(cost[j]) or math.isnan(returns[j]):
+                assert frontier.dominators[j] == NOT_RANKED
+                continue
+            dominated = any(
+                categories[i] == categories[j] and _dominates(cost[i], returns[i], cost[j], returns[j])
+                for i in range(snapshot.size)
+                if not (math.isnan(cost[i]) or math.isnan(returns[i]))
+            )
+            assert (frontier.dominators[j] >= 0) == dominated
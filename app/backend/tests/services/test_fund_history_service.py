@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+import pytest
+
+from backend.services import fund_history_service
+from backend.services.fund_data_service import FundStore, UnknownVersionError, load_snapshot
+from backend.services.fund_history_service import FundHistory, history_summary
+
+
+def _store(data_dir):
+    return FundStore(data_dir=data_dir, snapshot_path=data_dir / "funds.snapshot")
+
+
+def _edit(data_dir, old, new, names=("FP_costi (1).csv",)):
+    for name in names:
+        path = data_dir / name
+        path.write_text(path.read_text(encoding="utf-8").replace(old, new), encoding="utf-8")
+
+
+def _assert_same(materialized, original):
+    assert materialized.version == original.version
+    assert set(materialized.columns) == set(original.columns)
+    for name, column in original.columns.items():
+        if column.dtype == np.float64:
+            np.testing.assert_array_equal(materialized.columns[name], column)
+        else:
+            assert materialized.columns[name].tolist() == column.tolist()
+
+
+def _payload(entry):
+    return json.loads(gzip.decompress(entry.path.read_bytes()))
+
+
+def test_store_records_versions_as_deltas(fund_data_dir):
+    store = _store(fund_data_dir)
+    first = store.load()
+    _edit(fund_data_dir, "0,82", "0,83")
+    second = store.reload_if_changed()
+    _edit(fund_data_dir, ";BILANCIATO;", ";PRUDENTE;", names=("FP_costi (1).csv", "FP_data_rendimenti (1).csv"))
+    third = store.reload_if_changed()
+
+    entries = store.history.entries()
+    assert [e.version for e in entries] == [first.version, second.version, third.version]
+    keyframe, update, rename = (_payload(e) for e in entries)
+    assert keyframe["parent"] is None and len(keyframe["rows"]) == first.size
+    # Only the changed fund; no row order without inserts
+    assert (update["parent"], list(update["rows"]), update["deleted"]) == (first.version, ["1-crescita"], [])
+    assert "order" not in update
+    assert (list(rename["rows"]), rename["deleted"]) == (["5002-prudente"], ["5002-bilanciato"])
+    assert [v["version"] for v in history_summary(entries)] == [third.version, second.version, first.version]
+
+
+def test_past_versions_are_materialized_from_a_fresh_log(fund_data_dir):
+    store = _store(fund_data_dir)
+    first = store.load()
+    _edit(fund_data_dir, "0,82", "0,83")
+    second = store.reload_if_changed()
+    _edit(fund_data_dir, ";BILANCIATO;", ";PRUDENTE;", names=("FP_costi (1).csv", "FP_data_rendimenti (1).csv"))
+    third = store.reload_if_changed()
+
+    history = FundHistory(store.history_path, cache_size=2)
+    for snapshot in (first, second, third):
+        _assert_same(history.snapshot(snapshot.version), snapshot)
+    # LRU: the last materialized versions are reused
+    assert history.snapshot(third.version) is history.snapshot(third.version)
+    assert history.snapshot(first.version).to_record(2)["isc"]["isc2a"] == 0.82
+    with pytest.raises(UnknownVersionError):
+        history.snapshot("0123abcd")
+
+
+def test_keyframes_bound_the_replay(fund_data_dir, monkeypatch):
+    monkeypatch.setattr(fund_history_service, "KEYFRAME_INTERVAL", 2)
+    store = _store(fund_data_dir)
+    snapshots = [store.load()]
+    for old, new in (("0,82", "0,83"), ("0,83", "0,84"), ("0,84", "0,85")):
+        _edit(fund_data_dir, old, new)
+        snapshots.append(store.reload_if_changed())
+
+    parents = [_payload(e)["parent"] for e in store.history.entries()]
+    assert parents == [None, snapshots[0].version, None, snapshots[2].version]
+    history = FundHistory(store.history_path)
+    _assert_same(history.snapshot(snapshots[3].version), snapshots[3])
+
+
+def test_recording_is_idempotent_and_snapshot_at_serves_current(fund_data_dir):
+    store = _store(fund_data_dir)
+    snapshot = store.load()
+    assert store.history.record(snapshot) is False
+    assert len(store.history.entries()) == 1
+    assert store.snapshot_at(snapshot.version) is snapshot
+    with pytest.raises(UnknownVersionError):
+        store.snapshot_at("0123abcd")
+
+
+def test_replay_follows_parents_across_interleaved_writers(fund_data_dir, tmp_path):
+    store = _store(fund_data_dir)
+    first = store.load()
+    # A second worker records its own reload from the first version in another log
+    other = FundHistory(tmp_path / "other")
+    other.record(first)
+    _edit(fund_data_dir, ";BILANCIATO;", ";PRUDENTE;", names=("FP_costi (1).csv", "FP_data_rendimenti (1).csv"))
+    renamed = load_snapshot(fund_data_dir)
+    other.record(renamed)
+    # Meanwhile this worker recorded a different version under the same sequence
+    _edit(fund_data_dir, ";PRUDENTE;", ";BILANCIATO;", names=("FP_costi (1).csv", "FP_data_rendimenti (1).csv"))
+    _edit(fund_data_dir, "0,82", "0,83")
+    updated = store.reload_if_changed()
+    interleaved = other.entries()[-1]
+    (store.history_path / interleaved.path.name).write_bytes(interleaved.path.read_bytes())
+
+    history = FundHistory(store.history_path)
+    assert [e.sequence for e in history.entries()] == [1, 2, 2]
+    _assert_same(history.snapshot(renamed.version), renamed)
+    _assert_same(history.snapshot(updated.version), updated)
+
+
+def test_a_version_is_recorded_once_across_writers(fund_data_dir):
+    store = _store(fund_data_dir)
+    snapshot = store.load()
+    assert FundHistory(store.history_path).record(snapshot) is False
+    assert len(FundHistory(store.history_path).entries()) == 1
+
+
+def test_a_corrupt_history_does_not_fail_the_load(fund_data_dir, caplog):
+    store = _store(fund_data_dir)
+    store.history_path.mkdir(parents=True)
+    (store.history_path / "000001-0123abcd.json.gz").write_bytes(b"not gzip")
+    snapshot = store.load()
+    assert store.snapshot is snapshot
+    assert "Could not record fund dataset" in caplog.text
+
+    _edit(fund_data_dir, "0,82", "0,83")
+    assert store.reload_if_changed() is not snapshot
+    assert [entry.version for entry in store.history.entries()] == ["0123abcd"]
+
+
+def test_recorded_at_is_stored_in_the_entry(fund_data_dir, tmp_path):
+    before = time.time()
+    store = _store(fund_data_dir)
+    store.load()
+    (entry,) = store.history.entries()
+    assert before <= _payload(entry)["recorded_at"] == entry.recorded_at <= time.time()
+
+    # A copied or checked-out history keeps the recording time, not the file time
+    copy = tmp_path / "copy"
+    shutil.copytree(store.history_path, copy)
+    os.utime(copy / entry.path.name, (0, 0))
+    assert FundHistory(copy).entries()[0].recorded_at == entry.recorded_at
@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from backend.services.fund_data_service import (
+    FundDataError,
+    FundStore,
+    load_snapshot,
+    open_snapshot_file,
+    read_sources,
+    sources_version,
+)
+from backend.services.fund_history_service import FundHistory
+from backend.services.fund_ingestion_service import hash_sources, ingest_funds
+
+
+@pytest.fixture
+def outputs(tmp_path_factory):
+    out = tmp_path_factory.mktemp("artifacts")
+    return out / "funds.snapshot", out / "funds.ts"
+
+
+def _ingest(data_dir, outputs, **kwargs):
+    snapshot_path, frontend_path = outputs
+    return ingest_funds(data_dir, snapshot_path, frontend_path=frontend_path, **kwargs)
+
+
+def test_hash_sources_version_matches_store(fund_data_dir):
+    hashes, version = hash_sources(fund_data_dir)
+    assert version == sources_version(read_sources(fund_data_dir))
+    assert set(hashes) == {p.name for p in fund_data_dir.glob("*.csv")}
+
+
+def test_ingest_emits_snapshot_and_frontend_module(fund_data_dir, outputs):
+    result = _ingest(fund_data_dir, outputs)
+    snapshot_path, frontend_path = outputs
+
+    expected = load_snapshot(fund_data_dir)
+    mapped = open_snapshot_file(snapshot_path)
+    assert result.version == mapped.version == expected.version
+    assert result.funds == expected.size
+    assert mapped.to_records(range(mapped.size)) == expected.to_records(range(expected.size))
+
+    module = frontend_path.read_text(encoding="utf-8")
+    assert module.startswith("import { PensionFund, FundCategory } from '../types';")
+    rows = [json.loads(line.rstrip(",")) for line in module.splitlines() if line.startswith('["')]
+    assert len(rows) == expected.size
+    # Same row layout and order as the backend, decimals with a dot
+    first = expected.to_record(0)
+    assert rows[0][:6] == [first["type"], str(first["nAlbo"]), first["pip"], first["societa"] or "", first["linea"], first["categoria"]]
+    assert all("," not in value for row in rows for value in row[6:15])
+
+
+def test_unchanged_inputs_skip_parsing_and_writing(fund_data_dir, outputs):
+    _ingest(fund_data_dir, outputs)
+    snapshot_path, _ = outputs
+    mtime = snapshot_path.stat().st_mtime_ns
+
+    result = _ingest(fund_data_dir, outputs)
+    assert result.up_to_date
+    assert snapshot_path.stat().st_mtime_ns == mtime
+
+
+def test_one_file_correction_only_reparses_that_file(fund_data_dir, outputs):
+    first = _ingest(fund_data_dir, outputs)
+    costi = fund_data_dir / "FP_costi (1).csv"
+    costi.write_text(costi.read_text(encoding="utf-8").replace("0,82", "0,83"), encoding="utf-8")
+
+    result = _ingest(fund_data_dir, outputs)
+    assert result.parsed == ("FP_costi (1).csv",)
+    assert result.version != first.version
+    assert set(result.written) == set(outputs)
+    assert open_snapshot_file(outputs[0]).version == load_snapshot(fund_data_dir).version
+
+
+def test_deleted_output_is_rebuilt_from_cache(fund_data_dir, outputs):
+    _ingest(fund_data_dir, outputs)
+    _, frontend_path = outputs
+    frontend_path.unlink()
+
+    result = _ingest(fund_data_dir, outputs)
+    assert result.parsed == ()
+    assert result.written == (frontend_path,)
+
+
+def test_frontend_output_is_optional(fund_data_dir, tmp_path):
+    snapshot_path = tmp_path / "out" / "funds.snapshot"
+    result = ingest_funds(fund_data_dir, snapshot_path, frontend_path=None)
+    assert result.written == (snapshot_path,)
+
+
+def test_every_ingested_version_is_recorded_in_the_history(fund_data_dir, outputs):
+    first = _ingest(fund_data_dir, outputs)
+    assert first.recorded
+    costi = fund_data_dir / "FP_costi (1).csv"
+    costi.write_text(costi.read_text(encoding="utf-8").replace("0,82", "0,83"), encoding="utf-8")
+    second = _ingest(fund_data_dir, outputs)
+    assert second.recorded
+
+    # A fresh process serving the built snapshot reaches the earlier release
+    store = FundStore(data_dir=fund_data_dir, snapshot_path=outputs[0])
+    assert store.snapshot.version == second.version
+    assert [e.version for e in store.history.entries()] == [first.version, second.version]
+    assert store.snapshot_at(first.version).to_record(2)["isc"]["isc2a"] == 0.82
+
+
+def test_up_to_date_artifacts_are_recorded_in_a_new_history(fund_data_dir, outputs, tmp_path):
+    _ingest(fund_data_dir, outputs)
+    history_path = tmp_path / "durable-history"
+    result = _ingest(fund_data_dir, outputs, history_path=history_path)
+    assert result.recorded and not result.up_to_date
+    assert [e.version for e in FundHistory(history_path).entries()] == [result.version]
+    assert _ingest(fund_data_dir, outputs, history_path=history_path).up_to_date
+
+
+def test_missing_required_file_raises(fund_data_dir, outputs):
+    (fund_data_dir / "FP_costi (1).csv").unlink()
+    with pytest.raises(FundDataError):
+        _ingest(fund_data_dir, outputs)
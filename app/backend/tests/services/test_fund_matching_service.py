@@ -0,0 +1,90 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.services.fund_data_service import DEFAULT_DATA_DIR, load_snapshot
+from backend.services.fund_matching_service import TokenIndex, TrigramIndex, fold, match_names, name_key, trigrams
+
+CATEGORY_NAMES = ["Agrifondo", "Alifond", "Espero", "Fon.Te.", "Gommaplastica", "PerseoSirio", "Solidarietà Veneto"]
+
+
+@pytest.mark.parametrize(
+    "name, key",
+    [
+        ("FONDO PENSIONE FONCHIM", "FONCHIM"),
+        ("ASTRI - FONDO PENSIONE", "ASTRI"),
+        ("FONDO PENSIONE FON.TE.", "FONTE"),
+        ("Solidarietà Veneto", "SOLIDARIETAVENETO"),
+        ("FONDOSANITA'", "FONDOSANITA"),
+    ],
+)
+def test_name_key(name, key):
+    assert name_key(name) == key
+
+
+def test_fold_and_trigrams():
+    assert fold("STABILITÀ") == "STABILITA"
+    assert trigrams("AB") == ["  A", " AB", "AB "]
+    # Distinct trigrams only
+    assert len(trigrams("AAAA")) == len(set(trigrams("AAAA")))
+
+
+def test_trigram_similarity_scores_every_document():
+    index = TrigramIndex(["FONCHIM", "FONCER", "COMETA"])
+    scores = index.similarity("FONCHIM")
+    assert scores[0] == 1.0
+    assert 0 < scores[1] < 1.0
+    assert scores[2] == 0.0
+    assert index.similarity("ZZZ").tolist() == [0.0, 0.0, 0.0]
+
+
+def test_token_index_finds_documents_contained_in_the_query():
+    index = TokenIndex([["ESPERO"], ["SCUOLA", "ESPERO"], [], ["PREVIDENZA", "COOPERATIVA"]])
+    assert index.subsets(["SCUOLA", "ESPERO", "ESPERO"]).tolist() == [True, True, False, False]
+    assert index.subsets(["PREVIDENZA"]).tolist() == [False, False, False, False]
+    assert index.subsets(["UNKNOWN"]).tolist() == [False, False, False, False]
+
+
+def test_match_names_with_confidence():
+    report = match_names(
+        [
+            "FONDO PENSIONE AGRIFONDO",
+            "FONDO PENSIONE FON.TE.",
+            "FONDO PENSIONE FONDO GOMMA PLASTICA",
+            "FONDO PERSEO SIRIO",
+            "FONDO PENSIONE FONDO SCUOLA ESPERO",
+            "FONDO PENSIONE ALIFONDO",
+            "FONDOSANITA'",
+        ],
+        CATEGORY_NAMES,
+    )
+
+    exact = {name: m.target_name for name, m in report.matches.items() if m.method == "exact"}
+    assert exact == {
+        "FONDO PENSIONE AGRIFONDO": "Agrifondo",
+        "FONDO PENSIONE FON.TE.": "Fon.Te.",
+        "FONDO PENSIONE FONDO GOMMA PLASTICA": "Gommaplastica",
+        "FONDO PERSEO SIRIO": "PerseoSirio",
+    }
+    espero = report.get("FONDO PENSIONE FONDO SCUOLA ESPERO")
+    assert (espero.target_name, espero.method, espero.confidence) == ("Espero", "token", 0.9)
+    # One-letter typo still resolves, with a lower confidence
+    typo = report.get("FONDO PENSIONE ALIFONDO")
+    assert typo.target_name == "Alifond" and typo.method == "trigram" and 0.6 <= typo.confidence < 0.9
+
+    assert report.unmatched == ("FONDOSANITA'",)
+    assert report.unused == ("Solidarietà Veneto",)
+
+
+def test_contract_category_and_website_from_matched_entry(fund_snapshot):
+    records = {r["id"]: r for r in fund_snapshot.to_records(range(fund_snapshot.size))}
+    assert records["1-crescita"]["categoriaContratto"].startswith("Chimico-farmaceutico")
+    assert records["1-crescita"]["sitoWeb"] == "fonchim.it"
+
+
+@pytest.mark.skipif(not DEFAULT_DATA_DIR.exists(), reason="repository data/ folder not available")
+def test_repository_fpn_funds_get_contract_categories():
+    snapshot = load_snapshot(DEFAULT_DATA_DIR)
+    fpn = snapshot.columns["type"] == "FPN"
+    missing = set(snapshot.columns["pip"][fpn & (snapshot.columns["categoriaContratto"] == "")].tolist())
+    assert missing == {"FONDOSANITA'"}
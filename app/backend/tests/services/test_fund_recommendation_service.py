@@ -0,0 +1,182 @@
+from __future__ import annotations
+
+import itertools
+
+import pytest
+
+from backend.config.fund_logic import FUND_LOGIC_CONFIG
+from backend.services.fund_data_service import DEFAULT_DATA_DIR, load_snapshot
+from backend.services.fund_recommendation_service import (
+    RECOMMENDATION_CACHE_HITS,
+    RECOMMENDATION_CACHE_MISSES,
+    RecommendationCache,
+    RecommendationProfile,
+    canonical_profile,
+    compute_shortlist,
+)
+
+
+def _reference_shortlist(funds, profile, max_results=5):
+    """Line-by-line port of computeShortlist (app/frontend/utils/fundShortlist.ts)."""
+    cfg = FUND_LOGIC_CONFIG["shortlist"]
+    weights, missing = cfg["weights"], cfg["missingValues"]
+    rule = next(
+        (r for r in cfg["horizonCategoryRules"] if profile.horizon_years <= r["maxYearsInclusive"]),
+        cfg["horizonCategoryRules"][-1],
+    )
+
+    def cost(f):
+        return missing["cost"] if f["isc"]["isc35a"] is None else f["isc"]["isc35a"]
+
+    def ret(f):
+        r = f["rendimenti"]["ultimi10Anni"]
+        return missing["returns10y"] if r is None else r
+
+    def norm(v, lo, hi):
+        return 0.5 if hi == lo else (v - lo) / (hi - lo)
+
+    def contracts(f):
+        text = f["categoriaContratto"] or ""
+        return {text.strip()} | {c.strip() for c in text.split(",")} if text else set()
+
+    costs, rets = [cost(f) for f in funds], [ret(f) for f in funds]
+    scored = []
+    for f in funds:
+        cat = f["categoria"].upper()
+        if not any(t in cat for t in rule["categories"]):
+            continue
+        is_fpn = f["type"] == "FPN"
+        if profile.has_fpn is False and is_fpn:
+            continue
+        if profile.has_fpn is True and profile.contractual_category and is_fpn:
+            if profile.contractual_category not in contracts(f):
+                continue
+        equity = any(p in cat for p in cfg["categoryPatterns"]["equityLike"])
+        mixed = any(p in cat for p in cfg["categoryPatterns"]["mixedLike"])
+        appetite = cfg["riskPreferenceMap"][profile.risk_preference or "medium"]
+        alignment = appetite if equity else (0.5 if mixed else 1 - appetite)
+        age = 0.0
+        if profile.age_range == "over50" and equity:
+            age -= weights["ageConservatism"]
+        if profile.age_range == "under35" and equity:
+            age += weights["ageConservatism"] * cfg["ageBias"]["under35BoostFactor"]
+        score = (
+            weights["cost"] * (1 - norm(cost(f), min(costs), max(costs)))
+            + weights["returns"] * norm(ret(f), min(rets), max(rets))
+            + (alignment - 0.5) * 2 * weights["riskBoostMax"]
+            + age
+            + (weights["hasFpnBoost"] if profile.has_fpn is True and is_fpn else 0)
+            + (weights["contractualCategoryBoost"]
+               if profile.contractual_category and profile.contractual_category in contracts(f) else 0)
+        )
+        scored.append((f["id"], score))
+    scored.sort(key=lambda item: -item[1])
+    return scored[:max_results]
+
+
+PROFILES = [
+    RecommendationProfile(horizon_years=h, age_range=a, risk_preference=r, has_fpn=fpn, contractual_category=c)
+    for h, a, r, (fpn, c) in itertools.product(
+        (5, 15, 30),
+        (None, "under35", "over50"),
+        ("low", "high"),
+        ((None, None), (False, None), (True, None), (True, "Chimico-farmaceutico")),
+    )
+]
+
+
+@pytest.mark.parametrize("profile", PROFILES[:12])
+def test_shortlist_matches_reference(fund_snapshot, profile):
+    funds = fund_snapshot.to_records(range(fund_snapshot.size))
+    expected = _reference_shortlist(funds, profile, max_results=10)
+    actual = compute_shortlist(fund_snapshot, profile, max_results=10)
+
+    assert [fund_snapshot.columns["id"][r.row] for r in actual] == [fund_id for fund_id, _ in expected]
+    assert [r.score for r in actual] == pytest.approx([score for _, score in expected])
+
+
+@pytest.mark.skipif(not DEFAULT_DATA_DIR.exists(), reason="repository data/ folder not available")
+def test_shortlist_matches_reference_on_repository_dataset():
+    snapshot = load_snapshot(DEFAULT_DATA_DIR)
+    funds = snapshot.to_records(range(snapshot.size))
+    for profile in PROFILES:
+        expected = _reference_shortlist(funds, profile)
+        actual = compute_shortlist(snapshot, profile)
+        assert [snapshot.columns["id"][r.row] for r in actual] == [fund_id for fund_id, _ in expected]
+
+
+def test_shortlist_excludes_fpn_when_user_has_none(fund_snapshot):
+    profile = RecommendationProfile(horizon_years=30, has_fpn=False)
+    rows = [r.row for r in compute_shortlist(fund_snapshot, profile, max_results=50)]
+    assert rows
+    assert "FPN" not in fund_snapshot.columns["type"][rows].tolist()
+
+
+def test_shortlist_contract_category_keeps_only_matching_fpn(fund_snapshot):
+    profile = RecommendationProfile(horizon_years=30, has_fpn=True, contractual_category="Industria metalmeccanica privata")
+    rows = [r.row for r in compute_shortlist(fund_snapshot, profile, max_results=50)]
+    assert "FPN" not in fund_snapshot.columns["type"][rows].tolist()
+
+
+def test_shortlist_vectors_are_built_once_per_snapshot(fund_snapshot):
+    assert fund_snapshot.derived("shortlist") is fund_snapshot.derived("shortlist")
+
+
+def test_canonical_profile_collapses_equivalent_profiles():
+    a = canonical_profile(RecommendationProfile(horizon_years=12, age_range="35-50", risk_preference=None))
+    b = canonical_profile(RecommendationProfile(horizon_years=18, age_range=None, risk_preference="medium"))
+    assert a == b
+    assert canonical_profile(RecommendationProfile(horizon_years=21)) == canonical_profile(
+        RecommendationProfile(horizon_years=60)
+    )
+
+
+@pytest.mark.parametrize("horizon", [1, 10, 11, 20, 21, 45])
+def test_canonical_profile_preserves_shortlist(fund_snapshot, horizon):
+    profile = RecommendationProfile(horizon_years=horizon, age_range="35-50", has_fpn=True, contractual_category=" Chimico-farmaceutico ")
+    assert compute_shortlist(fund_snapshot, canonical_profile(profile)) == compute_shortlist(fund_snapshot, profile)
+
+
+def test_recommendation_cache_hits_and_counters(fund_snapshot):
+    cache = RecommendationCache(maxsize=4)
+    hits, misses = RECOMMENDATION_CACHE_HITS._value.get(), RECOMMENDATION_CACHE_MISSES._value.get()
+
+    first = cache.get_or_compute(fund_snapshot, RecommendationProfile(horizon_years=12), 5)
+    second = cache.get_or_compute(fund_snapshot, RecommendationProfile(horizon_years=15, age_range="35-50"), 5)
+
+    assert second is first
+    assert len(cache) == 1
+    assert RECOMMENDATION_CACHE_MISSES._value.get() == misses + 1
+    assert RECOMMENDATION_CACHE_HITS._value.get() == hits + 1
+
+
+def test_recommendation_cache_evicts_least_recently_used(fund_snapshot):
+    cache = RecommendationCache(maxsize=2)
+    short, mid, long = (RecommendationProfile(horizon_years=h) for h in (5, 15, 30))
+    cache.get_or_compute(fund_snapshot, short, 5)
+    cache.get_or_compute(fund_snapshot, mid, 5)
+    cache.get_or_compute(fund_snapshot, short, 5)
+    cache.get_or_compute(fund_snapshot, long, 5)
+
+    assert len(cache) == 2
+    misses = RECOMMENDATION_CACHE_MISSES._value.get()
+    cache.get_or_compute(fund_snapshot, short, 5)
+    assert RECOMMENDATION_CACHE_MISSES._value.get() == misses
+    cache.get_or_compute(fund_snapshot, mid, 5)
+    assert RECOMMENDATION_CACHE_MISSES._value.get() == misses + 1
+
+
+def test_recommendation_cache_is_invalidated_by_new_dataset_version(fund_data_dir, fund_snapshot):
+    cache = RecommendationCache()
+    profile = RecommendationProfile(horizon_years=30)
+    cache.get_or_compute(fund_snapshot, profile, 5)
+
+    costi = fund_data_dir / "FP_costi (1).csv"
+    costi.write_text(costi.read_text(encoding="utf-8").replace("0,82", "0,83"), encoding="utf-8")
+    updated = load_snapshot(fund_data_dir)
+    assert updated.version != fund_snapshot.version
+
+    misses = RECOMMENDATION_CACHE_MISSES._value.get()
+    cache.get_or_compute(updated, profile, 5)
+    assert RECOMMENDATION_CACHE_MISSES._value.get() == misses + 1
+    assert len(cache) == 1
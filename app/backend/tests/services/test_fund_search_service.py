@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.services.fund_data_service import DEFAULT_DATA_DIR, load_snapshot
+from backend.services.fund_search_service import search_funds, search_summary
+
+
+def _ids(snapshot, query, limit=10):
+    return [snapshot.columns["id"][hit.row] for hit in search_funds(snapshot, query, limit=limit)]
+
+
+def test_accents_and_case_are_ignored(fund_snapshot):
+    assert _ids(fund_snapshot, "stabilita") == ["1-stabilit"]
+    assert _ids(fund_snapshot, "STABILITÀ") == ["1-stabilit"]
+
+
+def test_typos_are_tolerated(fund_snapshot):
+    assert _ids(fund_snapshot, "stabilta") == ["1-stabilit"]
+    assert _ids(fund_snapshot, "fonchm garantito") == ["1-garantito"]
+
+
+def test_prefix_matches_for_search_as_you_type(fund_snapshot):
+    assert set(_ids(fund_snapshot, "cre")) == {"1-crescita", "12-crescita"}
+    assert _ids(fund_snapshot, "bi") == ["5002-bilanciato"]
+
+
+def test_every_term_must_match(fund_snapshot):
+    assert _ids(fund_snapshot, "arca crescita") == ["12-crescita"]
+    assert _ids(fund_snapshot, "arca garantito") == []
+
+
+def test_societa_is_searchable_and_exact_words_rank_first(fund_snapshot):
+    hits = search_funds(fund_snapshot, "alfa vita")
+    assert [fund_snapshot.columns["id"][h.row] for h in hits] == ["5001-gestione-separata", "5001-azionario"]
+    assert all(h.score == 1.0 for h in hits)
+    # An exact word beats a prefix match
+    assert search_funds(fund_snapshot, "crescita")[0].score > search_funds(fund_snapshot, "cresc")[0].score
+
+
+def test_empty_or_unknown_queries(fund_snapshot):
+    assert search_funds(fund_snapshot, "  -- ") == []
+    assert search_funds(fund_snapshot, "zzzzqq") == []
+    assert len(search_funds(fund_snapshot, "s", limit=2)) <= 2
+
+
+def test_summary_shape(fund_snapshot):
+    (result,) = search_summary(fund_snapshot, "beta")
+    assert result["id"] == "5002-bilanciato"
+    assert result["name"] == "PIANO INDIVIDUALE BETA - BILANCIATO"
+    assert result["fund"]["id"] == result["id"]
+
+
+@pytest.mark.skipif(not DEFAULT_DATA_DIR.exists(), reason="repository data/ folder not available")
+def test_repository_dataset_search():
+    snapshot = load_snapshot(DEFAULT_DATA_DIR)
+    hits = search_funds(snapshot, "fonchim stabilta")
+    assert [snapshot.columns["linea"][h.row] for h in hits] == ["STABILITÀ"]
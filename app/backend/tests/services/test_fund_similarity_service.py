@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+import math
+
+import numpy as np
+import pytest
+
+from backend.services.fund_data_service import DEFAULT_DATA_DIR, load_snapshot
+from backend.services.fund_similarity_service import (
+    category_risk_scores,
+    similar_alternatives,
+    similar_summary,
+)
+
+
+def _brute_force(snapshot, row, k):
+    features = snapshot.derived("similarity_index").features
+    cost, performance = snapshot.columns["isc10a"], snapshot.columns["ultimi10Anni"]
+    candidates = [
+        i for i in range(snapshot.size)
+        if cost[i] < cost[row] or performance[i] > performance[row]
+    ]
+    distances = {i: float(np.linalg.norm(features[i] - features[row])) for i in candidates}
+    return sorted(candidates, key=lambda i: (distances[i], i))[:k], distances
+
+
+def test_risk_scores_follow_fund_logic_config(fund_snapshot):
+    scores = category_risk_scores(fund_snapshot)
+    assert scores[fund_snapshot.row_of("1-garantito")] == 10
+    assert scores[fund_snapshot.row_of("1-stabilit")] == 40
+    assert scores[fund_snapshot.row_of("12-crescita")] == 85
+
+
+def test_alternatives_are_strictly_cheaper_or_better(fund_snapshot):
+    row = fund_snapshot.row_of("5001-azionario")
+    similar = similar_alternatives(fund_snapshot, row, k=10)
+
+    assert similar
+    assert row not in [s.row for s in similar]
+    cost, performance = fund_snapshot.columns["isc10a"], fund_snapshot.columns["ultimi10Anni"]
+    for s in similar:
+        assert s.cheaper == (cost[s.row] < cost[row])
+        assert s.better_performing == (performance[s.row] > performance[row])
+        assert s.cheaper or s.better_performing
+    assert [s.distance for s in similar] == sorted(s.distance for s in similar)
+    # ARCA CRESCITA (same categoria, similar costs) is among the closest matches
+    assert fund_snapshot.row_of("12-crescita") in [s.row for s in similar[:2]]
+
+
+def test_no_alternatives_for_cheapest_best_fund(fund_snapshot):
+    # FONCHIM STABILITA has the lowest ISC 10a; ARCA CRESCITA the best 10y return
+    row = fund_snapshot.row_of("1-stabilit")
+    assert all(not s.cheaper for s in similar_alternatives(fund_snapshot, row, k=10))
+    assert similar_alternatives(fund_snapshot, row, k=0) == []
+
+
+def test_summary_shape(fund_snapshot):
+    summary = similar_summary(fund_snapshot, fund_snapshot.row_of("5001-azionario"), k=2)
+    assert len(summary) == 2
+    assert set(summary[0]) == {"id", "name", "distance", "cheaper", "better_performing", "fund"}
+    assert summary[0]["fund"]["id"] == summary[0]["id"]
+
+
+@pytest.mark.skipif(not DEFAULT_DATA_DIR.exists(), reason="repository data/ folder not available")
+def test_matches_brute_force_on_repository_dataset():
+    snapshot = load_snapshot(DEFAULT_DATA_DIR)
+    for row in range(0, snapshot.size, 37):
+        expected, distances = _brute_force(snapshot, row, 5)
+        similar = similar_alternatives(snapshot, row, k=5)
+        assert [s.distance for s in similar] == pytest.approx([distances[i] for i in expected], abs=1e-6)
+        assert all(not math.isnan(s.distance) for s in similar)
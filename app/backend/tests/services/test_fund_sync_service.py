@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+import pytest
+
+from backend.services.fund_data_service import FundStore
+from backend.services.fund_sync_service import UnknownVersionError, changes_summary, fund_changes
+from backend.settings import settings
+
+
+def _store(data_dir):
+    return FundStore(data_dir=data_dir, snapshot_path=data_dir / "funds.snapshot")
+
+
+def _edit(data_dir, old, new, names=("FP_costi (1).csv",)):
+    for name in names:
+        path = data_dir / name
+        path.write_text(path.read_text(encoding="utf-8").replace(old, new), encoding="utf-8")
+
+
+def test_same_version_has_no_changes(fund_data_dir):
+    store = _store(fund_data_dir)
+    snapshot = store.load()
+    summary = changes_summary(snapshot, fund_changes(snapshot, snapshot.version, store=store))
+    assert summary == {
+        "since": snapshot.version,
+        "dataset_version": snapshot.version,
+        "inserted": [],
+        "updated": [],
+        "deleted": [],
+    }
+
+
+def test_updated_inserted_and_deleted_funds(fund_data_dir):
+    store = _store(fund_data_dir)
+    before = store.load()
+    _edit(fund_data_dir, "0,82", "0,83")
+    # Renaming a comparto deletes its id and inserts a new one
+    _edit(fund_data_dir, ";BILANCIATO;", ";PRUDENTE;", names=("FP_costi (1).csv", "FP_data_rendimenti (1).csv"))
+    after = store.reload_if_changed()
+
+    changes = fund_changes(after, before.version, store=store)
+    summary = changes_summary(after, changes, fields=("id", "isc"))
+    assert [r["id"] for r in summary["updated"]] == ["1-crescita"]
+    assert summary["updated"][0]["isc"]["isc2a"] == 0.83
+    assert [r["id"] for r in summary["inserted"]] == ["5002-prudente"]
+    assert summary["deleted"] == ["5002-bilanciato"]
+    assert summary["dataset_version"] == after.version
+
+
+def test_recent_hashes_are_bounded_and_older_versions_come_from_history(fund_data_dir, monkeypatch):
+    monkeypatch.setattr(settings, "funds_history_size", 2, raising=False)
+    store = _store(fund_data_dir)
+    first = store.load()
+    versions = [first.version]
+    for old, new in (("0,82", "0,83"), ("0,83", "0,84")):
+        _edit(fund_data_dir, old, new)
+        versions.append(store.reload_if_changed().version)
+
+    current = store.snapshot
+    assert store.row_hashes(versions[0]) is None
+    assert store.row_hashes(versions[1]) is not None
+    for since in versions[:2]:
+        updated = changes_summary(current, fund_changes(current, since, store=store))["updated"]
+        assert [r["id"] for r in updated] == ["1-crescita"]
+    with pytest.raises(UnknownVersionError):
+        fund_changes(current, "not-a-version", store=store)
@@ -0,0 +1,206 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+
+import numpy as np
+import pytest
+
+from backend.services import simulation_job_service, simulation_service
+from backend.services.fund_data_service import FundStore
+from backend.services.simulation_job_service import (
+    MemoryJobStore,
+    SimulationJobs,
+    SimulationJobsBusyError,
+    batch_tasks,
+    combine_batches,
+    fund_projection_columns,
+    job_id,
+)
+from backend.services.simulation_pool_service import SimulationPool, SimulationPoolBusyError
+
+SCENARIO = {
+    "eta_attuale": 30, "eta_pensione": 67, "contributo_mensile": 100.0, "contributo_azienda": 50.0,
+    "montante_attuale": 0.0, "tfr_to_fund": True, "tfr_annuale": None, "rendimento_atteso": 3.0,
+    "reddito_annuo": 35000.0, "anni_contribuzione": 37,
+}
+
+
+@pytest.fixture
+def pool():
+    pool = SimulationPool(size=1, max_queue=0, timeout=30.0)
+    yield pool
+    pool.shutdown()
+
+
+def _columns(count):
+    columns = {name: [SCENARIO[name]] * count for name in simulation_service.SCENARIO_COLUMNS}
+    columns["rendimento_atteso"] = np.linspace(-2, 8, count).tolist()
+    return columns
+
+
+def test_job_id_is_a_content_hash():
+    assert job_id("batch", {"a": 1, "b": [1, 2]}) == job_id("batch", {"b": [1, 2], "a": 1})
+    assert job_id("batch", {"a": 1}) != job_id("batch", {"a": 2})
+    assert job_id("batch", {"a": 1}) != job_id("funds", {"a": 1})
+
+
+def test_memory_store_expires_records():
+    store = MemoryJobStore(ttl=0.05)
+
+    async def scenario():
+        record = {"id": "a", "status": "running"}
+        assert await store.add(record) is None
+        assert await store.add({"id": "a", "status": "queued"}) is record
+        await asyncio.sleep(0.06)
+        assert await store.get("a") is None
+
+    asyncio.run(scenario())
+
+
+def test_memory_store_replaces_failed_records():
+    store = MemoryJobStore(ttl=60, max_jobs=2)
+
+    async def scenario():
+        await store.put({"id": "a", "status": "failed"})
+        assert await store.add({"id": "a", "status": "queued"}) is None
+        assert (await store.get("a"))["status"] == "queued"
+        await store.put({"id": "b", "status": "done"})
+        await store.put({"id": "c", "status": "done"})
+        # Only finished records make room, oldest first
+        assert (await store.get("a"))["status"] == "queued"
+        assert await store.get("b") is None
+        assert await store.get("c") is not None
+
+    asyncio.run(scenario())
+
+
+def test_full_memory_store_keeps_active_records():
+    store = MemoryJobStore(ttl=60, max_jobs=2)
+
+    async def scenario():
+        await store.add({"id": "a", "status": "running"})
+        await store.add({"id": "b", "status": "queued"})
+        with pytest.raises(SimulationJobsBusyError):
+            await store.add({"id": "c", "status": "queued"})
+        assert [(await store.get(key))["status"] for key in "ab"] == ["running", "queued"]
+        await store.put({"id": "a", "status": "done"})
+        assert await store.add({"id": "c", "status": "queued"}) is None
+        assert await store.get("a") is None
+
+    asyncio.run(scenario())
+
+
+def test_chunked_batch_matches_one_batch():
+    columns = _columns(25)
+    tasks = batch_tasks(columns, chunk_size=10)
+    assert len(tasks) == 3
+    combined = combine_batches([task.fn(*task.args) for task in tasks])
+    assert combined == simulation_service.batch_summary(simulation_service.simulate_batch(columns))
+
+
+def test_identical_jobs_run_once(pool):
+    jobs = SimulationJobs(MemoryJobStore(ttl=60), pool)
+    columns = _columns(30)
+
+    async def scenario():
+        first = await jobs.submit("batch", columns, batch_tasks(columns, 10), combine_batches)
+        second = await jobs.submit("batch", columns, batch_tasks(columns, 10), combine_batches)
+        assert second is first
+        while (await jobs.get(first["id"]))["status"] in ("queued", "running"):
+            await asyncio.sleep(0.01)
+        return json.loads(await jobs.response(first["id"]))
+
+    record = asyncio.run(scenario())
+    assert record["status"] == "done"
+    assert (record["progress"], record["tasks_done"], record["tasks_total"]) == (1.0, 3, 3)
+    assert record["result"]["count"] == 30
+    assert record["finished_at"] is not None
+
+
+def test_failed_jobs_report_the_error(pool):
+    jobs = SimulationJobs(MemoryJobStore(ttl=60), pool)
+    columns = dict(_columns(2), eta_pensione=[20, 67])
+
+    async def scenario():
+        record = await jobs.submit("batch", columns, batch_tasks(columns, 10), combine_batches)
+        while (await jobs.get(record["id"]))["status"] in ("queued", "running"):
+            await asyncio.sleep(0.01)
+        return await jobs.get(record["id"])
+
+    record = asyncio.run(scenario())
+    assert record["status"] == "failed"
+    assert "Retirement age" in record["error"]
+
+
+class CountingPool:
+    """Pool stand-in recording how many tasks it holds at once."""
+
+    size = 2
+
+    def __init__(self, busy=False):
+        self.busy = busy
+        self.running = self.peak = 0
+
+    async def run(self, fn, *args, timeout=None, **kwargs):
+        if self.busy:
+            raise SimulationPoolBusyError("Simulation pool is full (2 tasks)")
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        return fn(*args, **kwargs)
+
+
+def test_jobs_share_the_pool_workers():
+    pool = CountingPool()
+    jobs = SimulationJobs(MemoryJobStore(ttl=60), pool)
+
+    async def scenario():
+        records = [
+            await jobs.submit("batch", _columns(count), batch_tasks(_columns(count), 2), combine_batches)
+            for count in (10, 11, 12)
+        ]
+        await asyncio.gather(*jobs._running)
+        return [await jobs.get(record["id"]) for record in records]
+
+    assert [record["status"] for record in asyncio.run(scenario())] == ["done"] * 3
+    assert pool.peak == pool.size
+
+
+def test_jobs_rejected_by_a_full_pool_fail():
+    jobs = SimulationJobs(MemoryJobStore(ttl=60), CountingPool(busy=True))
+
+    async def scenario():
+        record = await jobs.submit("batch", _columns(2), batch_tasks(_columns(2), 10), combine_batches)
+        await asyncio.gather(*jobs._running)
+        return await jobs.get(record["id"])
+
+    record = asyncio.run(scenario())
+    assert (record["status"], record["error"]) == ("failed", "Simulation pool is full (2 tasks)")
+
+
+def test_finished_responses_are_encoded_once(monkeypatch):
+    jobs = SimulationJobs(MemoryJobStore(ttl=60), CountingPool())
+    encoded = []
+    monkeypatch.setattr(simulation_job_service, "job_summary", lambda record: encoded.append(record) or {})
+
+    async def scenario():
+        record = await jobs.submit("batch", _columns(2), batch_tasks(_columns(2), 10), combine_batches)
+        await asyncio.gather(*jobs._running)
+        return [await jobs.response(record["id"]) for _ in range(3)]
+
+    assert asyncio.run(scenario()) == [b"{}"] * 3
+    assert len(encoded) == 1 and encoded[0]["result"]["count"] == 2
+
+
+def test_fund_projection_uses_each_fund_return(fund_data_dir):
+    snapshot = FundStore(data_dir=fund_data_dir, snapshot_path=fund_data_dir / "funds.snapshot").load()
+    ids, columns = fund_projection_columns(snapshot, SCENARIO, "ultimi10Anni")
+    rows, _ = snapshot.rows_of(ids)
+    np.testing.assert_array_equal(columns["rendimento_atteso"], snapshot.columns["ultimi10Anni"][rows])
+    assert not np.isnan(columns["rendimento_atteso"]).any()
+    assert len(columns["eta_attuale"]) == len(ids)
+    with pytest.raises(ValueError, match="Unknown periodo"):
+        fund_projection_columns(snapshot, SCENARIO, "isc2a")
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from backend.services.simulation_montecarlo_service import (
+    CATEGORIES,
+    PERCENTILES,
+    category_weights,
+    draw_returns,
+    monte_carlo,
+    monte_carlo_summary,
+    simulate_paths,
+)
+from backend.services.simulation_service import accumulate
+
+
+def test_constant_returns_match_the_closed_form():
+    returns = np.full((30, 3), 0.04)
+    np.testing.assert_allclose(simulate_paths(1000.0, 2400.0, returns)[:, 0], accumulate(1000.0, 2400.0, 4.0, 30))
+
+
+def test_paths_follow_the_yearly_recurrence():
+    returns = np.random.default_rng(0).normal(0.04, 0.1, (20, 5))
+    paths = simulate_paths(500.0, 1200.0, returns)
+    expected = np.full(5, 500.0)
+    for year in range(20):
+        expected = (expected + 1200.0) * (1 + returns[year])
+    np.testing.assert_allclose(paths[-1], expected)
+
+
+def test_category_weights():
+    weights = category_weights({"azn": 3, "OBB PURO": 1})
+    assert weights[CATEGORIES.index("AZN")] == 0.75
+    assert weights[CATEGORIES.index("OBB")] == 0.25
+    with pytest.raises(ValueError, match="Unknown categoria"):
+        category_weights({"CRYPTO": 1})
+    with pytest.raises(ValueError):
+        category_weights({"BIL": 0})
+
+
+def test_seed_makes_bands_reproducible_and_ordered():
+    first = monte_carlo(1000.0, 3000.0, 30, {"BIL": 1}, paths=2000, seed=7)
+    second = monte_carlo(1000.0, 3000.0, 30, {"BIL": 1}, paths=2000, seed=7)
+    np.testing.assert_array_equal(first.bands, second.bands)
+    assert first.bands.shape == (len(PERCENTILES), 31)
+    assert np.all(np.diff(first.bands[:, 1:], axis=0) > 0)
+    # Equity spreads the outcomes more than guaranteed lines
+    equity = monte_carlo(1000.0, 3000.0, 30, {"AZN": 1}, paths=2000, seed=7)
+    guaranteed = monte_carlo(1000.0, 3000.0, 30, {"GAR": 1}, paths=2000, seed=7)
+    assert equity.bands[-1, -1] - equity.bands[0, -1] > guaranteed.bands[-1, -1] - guaranteed.bands[0, -1]
+
+
+def test_expected_return_override_and_correlations():
+    rng = np.random.default_rng(1)
+    weights = category_weights({"BIL": 1, "AZN": 1})
+    returns = draw_returns(weights, 40, 20000, rng, mean=3.0)
+    assert returns.mean() == pytest.approx(0.03, abs=2e-3)
+    # BIL/AZN are 0.9 correlated: the mix is almost as volatile as its average
+    assert returns.std() == pytest.approx(np.sqrt(0.25 * (0.09**2 + 0.14**2 + 2 * 0.9 * 0.09 * 0.14)), rel=0.02)
+
+
+def test_bootstrap_draws_from_published_returns(fund_snapshot):
+    pools = fund_snapshot.derived("return_pools")
+    np.testing.assert_allclose(pools[CATEGORIES.index("AZN")], [0.095, 0.1032, 0.112])
+    weights = category_weights({"AZN": 1})
+    returns = draw_returns(weights, 10, 1000, np.random.default_rng(2), pools=pools)
+    assert set(np.round(returns, 4).ravel().tolist()) == {0.095, 0.1032, 0.112}
+    # Categories without funds fall back to the normal assumptions
+    mixed = draw_returns(category_weights({"AZN": 1, "OBB": 1}), 10, 1000, np.random.default_rng(2), pools=pools)
+    assert np.unique(mixed).size > 3
+
+
+def test_summary_shape():
+    summary = monte_carlo_summary(monte_carlo(0.0, 1200.0, 5, {"GAR": 1}, paths=200, seed=1), eta_attuale=60)
+    assert summary["anni_accumulo"] == 5
+    assert summary["contributo_totale"] == 6000.0
+    assert [point["anno"] for point in summary["montante_chart"]] == [61, 62, 63, 64, 65]
+    assert set(summary["montante_chart"][0]) == {"anno", "contributi", "p5", "p25", "p50", "p75", "p95"}
+    assert summary["montante_finale"]["p95"] == summary["montante_chart"][-1]["p95"]
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+
+from backend.services import simulation_service
+from backend.services.simulation_pool_service import (
+    SIMULATION_POOL_SATURATION,
+    SimulationPool,
+    SimulationPoolBusyError,
+    SimulationTimeoutError,
+)
+
+
+@pytest.fixture
+def pool():
+    pool = SimulationPool(size=1, max_queue=1, timeout=30.0)
+    yield pool
+    pool.shutdown()
+
+
+def test_run_returns_the_worker_result(pool):
+    results = asyncio.run(pool.run(simulation_service.aliquota_pensione, 20))
+    assert float(results) == 13.5
+    assert pool.admitted == 0
+
+
+def test_worker_errors_propagate(pool):
+    with pytest.raises(ValueError, match="Missing scenario columns"):
+        asyncio.run(pool.run(simulation_service.simulate_batch, {"eta_attuale": [30]}))
+    assert pool.admitted == 0
+
+
+def test_full_pool_rejects_tasks(pool):
+    async def scenario():
+        running = [asyncio.ensure_future(pool.run(time.sleep, 0.5)) for _ in range(pool.capacity)]
+        await asyncio.sleep(0)
+        assert SIMULATION_POOL_SATURATION._value.get() == 1.0
+        with pytest.raises(SimulationPoolBusyError):
+            await pool.run(time.sleep, 0)
+        await asyncio.gather(*running)
+
+    asyncio.run(scenario())
+    assert pool.admitted == 0
+    assert SIMULATION_POOL_SATURATION._value.get() == 0.0
+
+
+def test_slow_tasks_time_out(pool):
+    with pytest.raises(SimulationTimeoutError):
+        asyncio.run(pool.run(time.sleep, 2, timeout=0.2))
+
+
+def test_shut_down_pool_rejects_tasks(pool):
+    pool.start()
+    pool._discard(pool._executor)
+    # A discarded (broken) pool restarts on the next task
+    assert float(asyncio.run(pool.run(simulation_service.aliquota_pensione, 20))) == 13.5
+    pool.shutdown()
+    with pytest.raises(SimulationPoolBusyError, match="shut down"):
+        asyncio.run(pool.run(simulation_service.aliquota_pensione, 20))
+    assert pool.admitted == 0
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import numpy as np
+import pytest
+
+from backend.services.simulation_service import (
+    BATCH_RESULT_COLUMNS,
+    TFR_RATE,
+    accumulate,
+    aliquota_irpef,
+    aliquota_pensione,
+    batch_summary,
+    montante_chart,
+    simulate_batch,
+    simulate_montante,
+)
+
+
+def _loop(initial, contribution, rate, years):
+    path = [initial]
+    for _ in range(years):
+        path.append((path[-1] + contribution) * (1 + rate / 100))
+    return path
+
+
+@pytest.mark.parametrize("rate", [-5.0, 0.0, 0.001, 3.0, 15.0])
+def test_closed_form_matches_the_yearly_recurrence(rate):
+    np.testing.assert_allclose(accumulate(5000.0, 2400.0, rate, 40), _loop(5000.0, 2400.0, rate, 40), rtol=1e-9)
+
+
+def test_accumulate_broadcasts_scenarios():
+    paths = accumulate(np.array([0.0, 1000.0])[:, None], 1200.0, np.array([2.0, 4.0, 6.0]), 10)
+    assert paths.shape == (2, 3, 11)
+    np.testing.assert_allclose(paths[1, 2], _loop(1000.0, 1200.0, 6.0, 10))
+    assert accumulate(100.0, 10.0, 5.0, 0).tolist() == [100.0]
+
+
+def test_simulate_montante_series():
+    paths = simulate_montante(1000.0, 2400.0, 4.0, 30, risparmio_fiscale_annuo=600.0)
+    np.testing.assert_allclose(paths.senza_fiscale, _loop(1000.0, 2400.0, 4.0, 30))
+    np.testing.assert_allclose(paths.con_fiscale, _loop(1000.0, 3000.0, 4.0, 30))
+    np.testing.assert_allclose(paths.tfr, _loop(1000.0, 2400.0, TFR_RATE, 30))
+    assert paths.contributi[-1] == 1000.0 + 2400.0 * 30
+
+    chart = montante_chart(paths, eta_attuale=35)
+    assert len(chart) == 30
+    assert chart[0] == {
+        "anno": 36,
+        "montante": round((1000.0 + 2400.0) * 1.04, 2),
+        "contributi": 3400.0,
+        "montante_con_fiscale": round((1000.0 + 3000.0) * 1.04, 2),
+        "montante_tfr": round((1000.0 + 2400.0) * (1 + TFR_RATE / 100), 2),
+    }
+
+
+def test_tax_rates():
+    assert aliquota_irpef(np.array([0, 15000, 15001, 28000, 50000, 50001])).tolist() == [23, 23, 25, 25, 35, 43]
+    assert aliquota_pensione(np.array([0, 15, 25, 35, 50])).tolist() == pytest.approx([15, 15, 12, 9, 9])
+
+
+def _scenarios(size, seed=0):
+    rng = np.random.default_rng(seed)
+    eta = rng.integers(18, 60, size)
+    return {
+        "eta_attuale": eta.tolist(),
+        "eta_pensione": np.minimum(eta + rng.integers(1, 40, size), 70).tolist(),
+        "contributo_mensile": rng.uniform(0, 500, size).tolist(),
+        "contributo_azienda": rng.uniform(0, 200, size).tolist(),
+        "montante_attuale": rng.uniform(0, 50000, size).tolist(),
+        "tfr_to_fund": (rng.random(size) < 0.5).tolist(),
+        "tfr_annuale": [None if i % 3 == 0 else 1500.0 for i in range(size)],
+        "rendimento_atteso": rng.uniform(-5, 15, size).tolist(),
+        "reddito_annuo": rng.uniform(0, 80000, size).tolist(),
+        "anni_contribuzione": rng.integers(0, 50, size).tolist(),
+    }
+
+
+def test_batch_matches_single_simulations():
+    columns = _scenarios(50)
+    results = simulate_batch(columns)
+    for i in range(50):
+        anni = columns["eta_pensione"][i] - columns["eta_attuale"][i]
+        tfr = (columns["tfr_annuale"][i] or 0.0) if columns["tfr_to_fund"][i] else 0.0
+        contributo = (columns["contributo_mensile"][i] + columns["contributo_azienda"][i]) * 12 + tfr
+        risparmio = contributo * aliquota_irpef(columns["reddito_annuo"][i]) / 100
+        paths = simulate_montante(
+            columns["montante_attuale"][i], contributo, columns["rendimento_atteso"][i], anni,
+            risparmio_fiscale_annuo=risparmio,
+        )
+        assert results["anni_accumulo"][i] == anni
+        assert results["montante_finale"][i] == pytest.approx(paths.senza_fiscale[-1], rel=1e-9)
+        assert results["montante_con_fiscale"][i] == pytest.approx(paths.con_fiscale[-1], rel=1e-9)
+        assert results["montante_tfr"][i] == pytest.approx(paths.tfr[-1], rel=1e-9)
+        assert results["contributo_totale"][i] == pytest.approx(paths.contributi[-1])
+
+
+def test_batch_defaults_and_summary():
+    columns = {name: values[:2] for name, values in _scenarios(2).items()}
+    for name in ("montante_attuale", "tfr_to_fund", "tfr_annuale", "rendimento_atteso"):
+        columns[name] = None
+    summary = batch_summary(simulate_batch(columns))
+    assert summary["count"] == 2
+    assert list(summary["columns"]) == list(BATCH_RESULT_COLUMNS)
+    assert all(len(values) == 2 for values in summary["columns"].values())
+
+
+@pytest.mark.parametrize(
+    "change, message",
+    [
+        ({"eta_pensione": [50, 30]}, "scenarios 1"),
+        ({"reddito_annuo": [1.0]}, "same length"),
+        ({"reddito_annuo": None}, "Missing scenario columns: reddito_annuo"),
+    ],
+)
+def test_batch_rejects_invalid_columns(change, message):
+    columns = {name: values[:2] for name, values in _scenarios(2).items()}
+    columns["eta_attuale"] = [30, 30]
+    columns.update(change)
+    with pytest.raises(ValueError, match=message):
+        simulate_batch(columns)
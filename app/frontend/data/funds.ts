@@ -68,9 +68,9 @@ const allRows: string[][] = [
 ["FPN","124","FONDO PENSIONE BYBLOS","","GARANTITO","GAR","2.59","-0.44","-0.04","0.52","","1.53","0.95","0.76","0.62","Industria carta e cartone, aziende grafiche editoriali, comunicazione, spettacolo, sport e tempo libero","fondobyblos.it"],
 ["FPN","124","FONDO PENSIONE BYBLOS","","BILANCIATO","BIL","7.29","1.01","2.49","2.86","3.41","1.28","0.7","0.51","0.37","Industria carta e cartone, aziende grafiche editoriali, comunicazione, spettacolo, sport e tempo libero","fondobyblos.it"],
 ["FPN","124","FONDO PENSIONE BYBLOS","","DINAMICO","AZN","11.49","3.02","5.43","4.86","","1.16","0.57","0.38","0.25","Industria carta e cartone, aziende grafiche editoriali, comunicazione, spettacolo, sport e tempo libero","fondobyblos.it"],
-["FPN","125","FONDO PENSIONE FONDO GOMMA PLASTICA","","CONSERVATIVO CON GARANZIA","GAR","3.72","1.63","1.04","0.8","","1.58","1.02","0.84","0.71","","fondogommaplastica.it"],
-["FPN","125","FONDO PENSIONE FONDO GOMMA PLASTICA","","BILANCIATO","BIL","6.04","0.21","2.08","2.75","","1.18","0.62","0.43","0.3","","fondogommaplastica.it"],
-["FPN","125","FONDO PENSIONE FONDO GOMMA PLASTICA","","DINAMICO","AZN","9.05","1.56","4","4.37","","1.06","0.5","0.31","0.18","","fondogommaplastica.it"],
+["FPN","125","FONDO PENSIONE FONDO GOMMA PLASTICA","","CONSERVATIVO CON GARANZIA","GAR","3.72","1.63","1.04","0.8","","1.58","1.02","0.84","0.71","Gomma, cavi elettrici, materie plastiche","fondogommaplastica.it"],
+["FPN","125","FONDO PENSIONE FONDO GOMMA PLASTICA","","BILANCIATO","BIL","6.04","0.21","2.08","2.75","","1.18","0.62","0.43","0.3","Gomma, cavi elettrici, materie plastiche","fondogommaplastica.it"],
+["FPN","125","FONDO PENSIONE FONDO GOMMA PLASTICA","","DINAMICO","AZN","9.05","1.56","4","4.37","","1.06","0.5","0.31","0.18","Gomma, cavi elettrici, materie plastiche","fondogommaplastica.it"],
 ["FPN","126","FONDO PENSIONE MEDIAFOND","","COMPARTO GARANTITO","GAR","3.09","0.42","0.9","0.78","","1.06","0.72","0.57","0.44","Dipendenti Gruppo Mediaset","mediafond.it"],
 ["FPN","126","FONDO PENSIONE MEDIAFOND","","COMPARTO OBBLIGAZIONARIO","OBB PURO","3.35","-0.52","0.02","0.71","","0.8","0.46","0.31","0.18","Dipendenti Gruppo Mediaset","mediafond.it"],
 ["FPN","126","FONDO PENSIONE MEDIAFOND","","COMPARTO AZIONARIO","AZN","15.36","3.01","7.61","7.19","","0.85","0.51","0.36","0.23","Dipendenti Gruppo Mediaset","mediafond.it"],
@@ -92,11 +92,11 @@ const allRows: string[][] = [
 ["FPN","145","FONDO PENSIONE FONDO SCUOLA ESPERO","","DINAMICO","AZN","","","","","","0.82","0.46","0.33","0.22","Scuola","fondoespero.it"],
 ["FPN","148","ASTRI - FONDO PENSIONE","","GARANTITO","GAR","2.76","1.95","1.25","0.9","","1.2","0.79","0.64","0.54","Autostrade, strade, trasporti e infrastrutture","astrifondopensione.it"],
 ["FPN","148","ASTRI - FONDO PENSIONE","","BILANCIATO","BIL","6.13","0.22","2.11","2.71","","0.84","0.42","0.28","0.17","Autostrade, strade, trasporti e infrastrutture","astrifondopensione.it"],
-["FPN","157","FONDO PENSIONE AGRIFONDO","","GARANTITO","GAR","3.38","0.3","0.65","0.68","","0.94","0.61","0.45","0.33","","fondoagrifondo.it"],
-["FPN","157","FONDO PENSIONE AGRIFONDO","","BILANCIATO","BIL","5.29","1.49","2.42","2.68","","0.85","0.51","0.36","0.23","","fondoagrifondo.it"],
-["FPN","164","FONDO PERSEO SIRIO","","OBBLIGAZIONARIO","OBB","1.84","","","","","0.59","0.38","0.28","0.21","","fondoperseosirio.it"],
-["FPN","164","FONDO PERSEO SIRIO","","GARANTITO","GAR","3.23","0.34","0.69","0.91","","0.78","0.57","0.47","0.39","","fondoperseosirio.it"],
-["FPN","164","FONDO PERSEO SIRIO","","AZIONARIO","AZN","12.26","","","","","0.64","0.43","0.34","0.26","","fondoperseosirio.it"],
+["FPN","157","FONDO PENSIONE AGRIFONDO","","GARANTITO","GAR","3.38","0.3","0.65","0.68","","0.94","0.61","0.45","0.33","Agricoltura - Operai, impiegati, contoterzisti, aziende cooperative, consorzi agrari","fondoagrifondo.it"],
+["FPN","157","FONDO PENSIONE AGRIFONDO","","BILANCIATO","BIL","5.29","1.49","2.42","2.68","","0.85","0.51","0.36","0.23","Agricoltura - Operai, impiegati, contoterzisti, aziende cooperative, consorzi agrari","fondoagrifondo.it"],
+["FPN","164","FONDO PERSEO SIRIO","","OBBLIGAZIONARIO","OBB","1.84","","","","","0.59","0.38","0.28","0.21","Pubblica Amministrazione, Sanità, Università, Centri Ricerca, Agenzie Fiscali, Federazioni Sportive, Coni","fondoperseosirio.it"],
+["FPN","164","FONDO PERSEO SIRIO","","GARANTITO","GAR","3.23","0.34","0.69","0.91","","0.78","0.57","0.47","0.39","Pubblica Amministrazione, Sanità, Università, Centri Ricerca, Agenzie Fiscali, Federazioni Sportive, Coni","fondoperseosirio.it"],
+["FPN","164","FONDO PERSEO SIRIO","","AZIONARIO","AZN","12.26","","","","","0.64","0.43","0.34","0.26","Pubblica Amministrazione, Sanità, Università, Centri Ricerca, Agenzie Fiscali, Federazioni Sportive, Coni","fondoperseosirio.it"],
 ["FPN","170","PREVIDENZA COOPERATIVA","","SICURO","GAR","2.3","0.91","0.5","0.52","","1.04","0.76","0.67","0.6","Cooperative e lavoratori addetti sistemi idraulico-forestale","previdenzacooperativa.it"],
 ["FPN","170","PREVIDENZA COOPERATIVA","","BILANCIATO","OBB MISTO","8.27","1.65","3.15","","","0.75","0.47","0.38","0.31","Cooperative e lavoratori addetti sistemi idraulico-forestale","previdenzacooperativa.it"],
 ["FPN","170","PREVIDENZA COOPERATIVA","","DINAMICO","AZN","11.04","2.26","4.49","","","0.64","0.36","0.27","0.2","Cooperative e lavoratori addetti sistemi idraulico-forestale","previdenzacooperativa.it"],
@@ -91,6 +91,9 @@ echo "Using project: $GCP_PROJECT_ID"
 gcloud config set project "$GCP_PROJECT_ID" >/dev/null
 
 if [[ "$DO_BUILD" == "true" ]]; then
+  echo "Compiling fund snapshot into app/backend/data/funds.snapshot"
+  python3 app/backend/scripts/build_fund_snapshot.py --data-dir data --output app/backend/data/funds.snapshot --no-frontend
+
   echo "Building backend image: $BACKEND_IMAGE"
   gcloud builds submit app/backend --tag "$BACKEND_IMAGE"
 fi